@@ -1,21 +1,87 @@
-import os, sys, signal, random, importlib, getopt, datetime, consts
+import os, sys, json, signal, random, importlib, getopt, datetime, time, consts, simulation, gamelog
 from operator import add
-from utils import int_input, tell_everyone, create_plot
+from utils import int_input, create_plot
+from events import EventBus, Message
+from scorelog import ScoreLog
+from gamelog import GameLog
+from stats import SimulationStats
 from Card import Card, Deck
-from player.Player import HumanPlayer, RandomPlayer
-from player.HeuristicPlayer import HeuristicPlayer
-from player.MCPlayer import MCPlayer
-from player.CLIHumanPlayer import CLIHumanPlayer
-from player.GUIHumanPlayer import GUIHumanPlayer
+from game import get_game_class
+from player.Player import HumanPlayer
+
+# Player types, in the order they are offered: name -> module, and
+# whether it is a human player (not available in simulation mode)
+PLAYER_TYPES = {'RandomPlayer':    ('player.Player', False),
+                'HeuristicPlayer': ('player.HeuristicPlayer', False),
+                'MCPlayer':        ('player.MCPlayer', False),
+                'CLIHumanPlayer':  ('player.CLIHumanPlayer', True),
+                'GUIHumanPlayer':  ('player.GUIHumanPlayer', True)}
+
+# Options of simulation mode, which can be given in a config file
+# (and on the command line, which takes precedence)
+DEFAULT_OPTIONS = {'players': None,
+                   'matches': None,
+                   'seed': None,
+                   'workers': 1,
+                   'output': None,
+                   'records': None,
+                   'contracts': False,
+                   'interval': 10.0,
+                   'duplicate': False,
+                   'plot': True}
+
+# Types of the options: config files are checked against them
+OPTION_TYPES = {'players': (list,),
+                'matches': (int,),
+                'seed': (int,),
+                'workers': (int,),
+                'output': (str,),
+                'records': (str,),
+                'contracts': (bool,),
+                'interval': (int, float),
+                'duplicate': (bool,),
+                'plot': (bool, str)}
+
+# Options which may be left unset
+OPTIONAL = ['players', 'matches', 'seed', 'output', 'records']
+
+def get_player_type(name):
+    '''
+        Returns the class of a player type from its name. Its module
+        is imported only now: the search players, and tkinter for the
+        GUI, take time to import and are not always needed.
+    '''
+    return getattr(importlib.import_module(PLAYER_TYPES[name][0]), name)
 
 class Barbu():
 
-    def __init__(self, players):
+    def __init__(self, players, record=False):
         assert len(players) == consts.NUM_PLAYERS, '[-] Please give a list of exactly {} players!'.format(consts.NUM_PLAYERS)
         self.players = players
         self.total_scores = [0 for _ in range(consts.NUM_PLAYERS)]
+        self.bus = EventBus.for_players(players)
+
+        # List of (dealer ID, game number, game scores) of every game played
+        self.contracts = []
+
+        # If record, the record of every game played (see gamelog.py)
+        self.records = [] if record else None
+
+        # Number of moves played in every game (Domino passes included)
+        self.moves = 0
+
+    def play(self, dealer_ID=-1, deals=None):
+        '''
+            Plays a whole match and returns the total scores.
+
+            If deals is given, it must contain the cards (in the order
+            they are drawn, as in Deck) of every game of the match, which
+            are used instead of shuffled decks: this allows to replay the
+            same cards with different players.
+        '''
+        if deals is not None:
+            deals = iter(deals)
 
-    def play(self, dealer_ID=-1):
         # Reset players to default (empty hand, no played games)
         for player in self.players:
             player.reset()
@@ -25,7 +91,7 @@ class Barbu():
             dealer_ID = random.randint(0, 3)
         
         # Tell players who is the first dealer
-        tell_everyone(self.players, 'First dealer: {}'.format(dealer_ID))
+        self.bus.publish(Message, 'First dealer: {}', dealer_ID)
 
         # Main loop (every game is played for every player)
         for _ in range(len(self.players)):
@@ -35,7 +101,7 @@ class Barbu():
                     self.players[i].hand = []
 
                 # Create a new deck and distribute cards to players' hands
-                self.deck = Deck()
+                self.deck = Deck(next(deals) if deals is not None else None)
                 self.distribute_cards()
                 assert self.deck.is_empty(), '[-] Not all cards have been distributed!'
                 for player in self.players:
@@ -52,7 +118,7 @@ class Barbu():
                 self.players[dealer_ID].played_games[game_num] = True
 
                 # Tell players the chosen game
-                tell_everyone(self.players, 'Player {} called {}!'.format(dealer_ID, consts.GAMES[game_num].split('.')[1]))
+                self.bus.publish(Message, 'Player {} called {}!', dealer_ID, consts.GAMES[game_num].split('.')[1])
 
                 # If the dealer chose Atout, ask them for a trump suit
                 trump_suit = None
@@ -60,16 +126,20 @@ class Barbu():
                     while trump_suit not in Card.suits:
                         trump_suit = self.players[dealer_ID].get_trump_suit()
 
-                    tell_everyone(self.players, '(trump suit: {})'.format(trump_suit))
+                    self.bus.publish(Message, '(trump suit: {})', trump_suit)
 
                 # Initialize and play chosen game
-                game = self.get_game(game_num, self.players, dealer_ID, trump_suit)
+                game = self.get_game(game_num, self.players, dealer_ID, trump_suit, self.bus)
                 game_scores = game.play()
-                tell_everyone(self.players, 'Game scores: {}'.format(game_scores))
+                self.moves += len(game.history)
+                if self.records is not None:
+                    self.records.append(gamelog.encode(game, dealer_ID))
+                self.bus.publish(Message, 'Game scores: {}', game_scores)
 
                 # Update final scores
+                self.contracts.append((dealer_ID, game_num, game_scores))
                 self.total_scores = list(map(add, self.total_scores, game_scores))
-                tell_everyone(self.players, 'Total scores: {}'.format(self.total_scores))
+                self.bus.publish(Message, 'Total scores: {}', self.total_scores)
 
             # Check if the total scores sum to zero, pass dealer to next player
             assert sum(self.total_scores) == 0, 'The total scores do not sum to zero after a complete dealer!'
@@ -84,57 +154,89 @@ class Barbu():
 
         # Sort cards according to their integer representation (♥ ♦ ♣ ♠ ascending value)
         for i in range(len(self.players)):
-            self.players[i].hand = list(map(Card.int_to_card, sorted(map(int, self.players[i].hand))))
+            self.players[i].hand.sort(key=int)
 
-    def get_game(self, game_num, players, first_player, trump_suit=None):
+    def get_game(self, game_num, players, first_player, trump_suit=None, bus=None):
         '''
-            Imports the module corresponding to the chosen game,
-            creates the corresponding Game object, initializes it
-            and returns it.
+            Creates the Game object of the chosen game,
+            initializes it and returns it.
         '''
-        module_name = consts.GAMES[game_num]
-        class_name = module_name.split('.')[1]
+        class_ = get_game_class(consts.GAMES[game_num].split('.')[1])
 
-        module = importlib.import_module(module_name)
-        class_ = getattr(module, class_name)
-
-        return class_(players, first_player, trump_suit)
+        return class_(players, first_player, trump_suit, bus)
 
 
 
 def create_players(simulate=False):
     players = []
 
+    names = [name for name, (_, human) in PLAYER_TYPES.items() if not (simulate and human)]
+
     print('Player types:')
-    print('    0: RandomPlayer')
-    print('    1: HeuristicPlayer')
-    print('    2: MCPlayer')
-    if not simulate:
-        print('    3: CLIHumanPlayer')
-        print('    4: GUIHumanPlayer')
+    for i, name in enumerate(names):
+        print('    {}: {}'.format(i, name))
 
     while len(players) != consts.NUM_PLAYERS:
         choice = int_input('Please insert the player type for player {}: '.format(len(players)))
+        if choice not in range(len(names)):
+            continue
 
-        if choice == 0:
-            players.append(RandomPlayer(ID=len(players)))
-        elif choice == 1:
-            players.append(HeuristicPlayer(ID=len(players)))
-        elif choice == 2:
-            print('[-] Not implemented yet!')
-        elif not simulate and choice == 3:
-            if any([isinstance(player, CLIHumanPlayer) for player in players]):
-                print('[-] Multiple CLIHumanPlayers are not implemented yet!')
-            else:
-                players.append(CLIHumanPlayer(ID=len(players)))
-        elif not simulate and choice == 4:
-            if any([isinstance(player, CLIHumanPlayer) for player in players]):
-                print('[-] Multiple GUIHumanPlayers are not implemented yet!')
-            else:
-                players.append(GUIHumanPlayer(ID=len(players)))
+        name = names[choice]
+        if PLAYER_TYPES[name][1] and any([type(player).__name__ == name for player in players]):
+            print('[-] Multiple {}s are not implemented yet!'.format(name))
+        else:
+            players.append(get_player_type(name)(ID=len(players)))
 
     return players
 
+def load_config(path):
+    '''
+        Returns the options of simulation mode read from a
+        TOML (.toml) or JSON config file, as a dictionary.
+    '''
+    if path.endswith('.toml'):
+        import tomllib
+
+        with open(path, 'rb') as f:
+            config = tomllib.load(f)
+    else:
+        with open(path) as f:
+            config = json.load(f)
+
+    return config
+
+def check_options(options):
+    '''
+        Raises ValueError if an option (from a config file or
+        the command line) is unknown or has an invalid value.
+    '''
+    unknown = [key for key in options if key not in DEFAULT_OPTIONS]
+    if unknown:
+        raise ValueError('unknown options: {}'.format(', '.join(unknown)))
+
+    for key, value in options.items():
+        if value is None and key in OPTIONAL:
+            continue
+
+        # bool is a subclass of int, but true is not a number of matches
+        valid = isinstance(value, OPTION_TYPES[key]) and (bool in OPTION_TYPES[key] or not isinstance(value, bool))
+        if key == 'players':
+            valid = valid and all(isinstance(name, str) for name in value)
+        elif key in ('matches', 'workers', 'interval'):
+            valid = valid and value > 0
+
+        if not valid:
+            raise ValueError('invalid value for option {}: {!r}'.format(key, value))
+
+def parse_option(opt, arg, type_):
+    '''
+        Returns the value of a command line option, converted to type_.
+    '''
+    try:
+        return type_(arg)
+    except ValueError:
+        raise ValueError('invalid value for option {}: {!r}'.format(opt, arg))
+
 def usage():
     print('barbu-python')
     print('    by Michele Ferri (@limi7break)')
@@ -147,50 +249,170 @@ def usage():
     print('usage:')
     print('    [-s]\tsimulation mode: play simulated games between computer')
     print('        \tplayers until stopped, collecting data about scores.')
+    print('    [-w N]\tsimulation mode: number of worker processes that play')
+    print('        \tthe simulated games (default: 1).')
+    print('    [-o PATH]\tsimulation mode: score log where results are appended')
+    print('        \t(default: scores/<date>_<time>.bin).')
+    print('    [-c]\tsimulation mode: log the scores of every game too.')
+    print('    [-R PATH]\tsimulation mode: game log where the deal and the moves')
+    print('        \tof every game are appended (see gamelog.py).')
+    print('    [-i SECONDS]\tsimulation mode: interval between reports of the')
+    print('        \tstatistics of the simulation (default: 10).')
+    print('    [-d]\tsimulation mode: duplicate deals. Every match is played')
+    print('        \tfour times on the same cards, rotating the players through')
+    print('        \tthe seats, and the four matches count as one result.')
+    print('    [-n N]\tsimulation mode: stop after N matches (default: never).')
+    print('    [-r SEED]\tsimulation mode: seed of the random number generators.')
+    print('    [-g PATH]\tsimulation mode: plot of the scores, written when the')
+    print('        \tsimulation ends (default: plot/<date>_<time>.png).')
+    print('    [-G]\tsimulation mode: do not plot the scores.')
+    print('    [-p TYPES]\tbatch mode: simulation mode without prompts, with the')
+    print('        \tplayer types of the seats separated by commas (e.g.')
+    print('        \tRandomPlayer,HeuristicPlayer,MCPlayer,HeuristicPlayer).')
+    print('        \tReports are written to stderr, and a JSON summary of the')
+    print('        \tthroughput and scores to stdout when the simulation ends')
+    print('        \t(after N matches, or on SIGINT / SIGTERM).')
+    print('    [-f PATH]\tbatch mode: TOML (.toml) or JSON config file with the')
+    print('        \toptions players (list of types), matches, seed, workers,')
+    print('        \toutput, records, contracts, interval, duplicate and plot')
+    print('        \t(a path, or false). Options on the command line take')
+    print('        \tprecedence.')
     print('     -h\thelp')
     print()
 
 if __name__ == '__main__':
-    print('Welcome to barbu-python 1.0!')
-
     simulate = False
+    options = dict(DEFAULT_OPTIONS)
 
     try:
-        opts, args = getopt.getopt(sys.argv[1:],'sh')
-    except getopt.GetoptError as e:
-        print(colors.fail('Error: {}. Type -h for help'.format(str(e))))
+        opts, args = getopt.getopt(sys.argv[1:],'sw:o:R:ci:dn:r:g:Gp:f:h')
+
+        # The config file is read first, so that the other options override it
+        for opt, arg in opts:
+            if opt in ('-f'):
+                config = load_config(arg)
+                try:
+                    if not isinstance(config, dict):
+                        raise ValueError('not a table of options')
+
+                    check_options(config)
+                except ValueError as e:
+                    raise ValueError('{} in {}'.format(str(e), arg))
+
+                options.update(config)
+
+        for opt, arg in opts:
+            if opt in ('-h','--help'):
+                usage()
+                sys.exit(0)
+            elif opt in ('-s'):
+                simulate = True
+            elif opt in ('-w'):
+                options['workers'] = parse_option(opt, arg, int)
+            elif opt in ('-o'):
+                options['output'] = arg
+            elif opt in ('-R'):
+                options['records'] = arg
+            elif opt in ('-c'):
+                options['contracts'] = True
+            elif opt in ('-i'):
+                options['interval'] = parse_option(opt, arg, float)
+            elif opt in ('-d'):
+                options['duplicate'] = True
+            elif opt in ('-n'):
+                options['matches'] = parse_option(opt, arg, int)
+            elif opt in ('-r'):
+                options['seed'] = parse_option(opt, arg, int)
+            elif opt in ('-g'):
+                options['plot'] = arg
+            elif opt in ('-G'):
+                options['plot'] = False
+            elif opt in ('-p'):
+                options['players'] = arg.split(',')
+
+        check_options(options)
+    except (getopt.GetoptError, OSError, ValueError) as e:
+        print('Error: {}. Type -h for help'.format(str(e)), file=sys.stderr)
         sys.exit(1)
 
-    for opt, arg in opts:
-        if opt in ('-h','--help'):
-            usage()
-            sys.exit(0)
-        elif opt in ('-s'):
-            simulate = True
-            all_scores = []
+    # With a lineup, the simulation runs unattended: stdout is left for the summary
+    batch = options['players'] is not None
+    simulate = simulate or batch
 
-    players = create_players(simulate=simulate)
+    if batch:
+        names = options['players']
+        invalid = [name for name in names if name not in PLAYER_TYPES or PLAYER_TYPES[name][1]]
+        if len(names) != consts.NUM_PLAYERS or invalid:
+            print('Error: please give {} computer player types ({}). Type -h for help'.format(
+                  consts.NUM_PLAYERS, ', '.join(name for name, (_, human) in PLAYER_TYPES.items() if not human)), file=sys.stderr)
+            sys.exit(1)
+
+        player_types = [get_player_type(name) for name in names]
+    else:
+        print('Welcome to barbu-python 1.0!')
+
+        players = create_players(simulate=simulate)
+        player_types = [type(player) for player in players]
 
     if simulate:
-        # Define a signal handler to create plot before exiting
-        def signal_handler(sig, frame):
-            if not os.path.exists('plot/'):
-                os.makedirs('plot/')
-            
-            now = datetime.datetime.now()
-            path = 'plot/{}{}{}_{}{}.png'.format(now.year, now.month, now.day, now.hour, now.minute)
-            
-            create_plot(players, all_scores, path)
-            
+        now = datetime.datetime.now()
+
+        # Results are streamed to the score log as they arrive
+        log_path = options['output']
+        if log_path is None:
+            log_path = 'scores/{}{}{}_{}{}.bin'.format(now.year, now.month, now.day, now.hour, now.minute)
+        
+        score_log = ScoreLog(log_path, contracts=options['contracts'])
+        game_log = GameLog(options['records']) if options['records'] else None
+        simulation_stats = SimulationStats()
+        names = [player_type.__name__ for player_type in player_types]
+
+        # Reports the statistics and creates the plot before exiting
+        def finish(sig=None, frame=None):
+            score_log.close()
+            if game_log is not None:
+                game_log.close()
+
+            summary = simulation_stats.summary()
+
+            path = options['plot']
+            if path is True:
+                now = datetime.datetime.now()
+                path = 'plot/{}{}{}_{}{}.png'.format(now.year, now.month, now.day, now.hour, now.minute)
+
+            if path:
+                directory = os.path.dirname(path)
+                if directory and not os.path.exists(directory):
+                    os.makedirs(directory)
+
+                create_plot(names, log_path, path, show=not batch)
+
+            if batch:
+                summary.update(players=names, seed=options['seed'], log=log_path, records=options['records'], plot=path or None)
+                print(json.dumps(summary))
+            else:
+                print(simulation_stats.report())
+
             sys.exit(0)
 
-        # Bind the handler to SIGINT (Ctrl-C)
-        signal.signal(signal.SIGINT, signal_handler)
+        # Bind the handler to SIGINT (Ctrl-C) and SIGTERM (e.g. from a job scheduler)
+        signal.signal(signal.SIGINT, finish)
+        signal.signal(signal.SIGTERM, finish)
 
-    while simulate:
-        barbu = Barbu(players)
-        all_scores.append(barbu.play())
-        print('Simulated game {}.'.format(len(all_scores)))
+        # Every worker creates its own players of the chosen types
+        last_report = time.monotonic()
+        for result in simulation.simulate(player_types, options['workers'], options['matches'], options['seed'],
+                                          duplicate=options['duplicate'], record=game_log is not None):
+            score_log.append(result.scores, result.contracts)
+            if game_log is not None:
+                game_log.append(result.records)
+            simulation_stats.push(result)
+
+            if time.monotonic() - last_report >= options['interval']:
+                print(simulation_stats.report(), file=sys.stderr if batch else sys.stdout)
+                last_report = time.monotonic()
+
+        finish()
     else:
         # Ask who should be the first dealer
         dealer_ID = None
@@ -198,7 +420,16 @@ if __name__ == '__main__':
             dealer_ID = int_input('Please insert ID of first dealer (-1 for random): ')
         
         barbu = Barbu(players)
-        scores = barbu.play(dealer_ID)
-        tell_everyone(players, 'Game finished! Final scores: {}'.format(scores))
-        if all([not isinstance(player, HumanPlayer) for player in players]):
-            print('Game finished! Final scores: {}'.format(scores))
\ No newline at end of file
+
+        def play():
+            scores = barbu.play(dealer_ID)
+            barbu.bus.publish(Message, 'Game finished! Final scores: {}', scores)
+            if all([not isinstance(player, HumanPlayer) for player in players]):
+                print('Game finished! Final scores: {}'.format(scores))
+
+        # The GUI keeps the main thread for its event loop
+        gui = [player for player in players if type(player).__name__ == 'GUIHumanPlayer']
+        if gui:
+            gui[0].run(play)
+        else:
+            play()
\ No newline at end of file
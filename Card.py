@@ -2,11 +2,19 @@ import consts
 from random import shuffle
 
 class Card():
+    '''
+        There are exactly 52 Card objects, created when this module is
+        imported: Card(suit, value) validates its arguments and returns
+        the existing card, so cards can be compared by identity.
+
+        Cards are immutable, and copying a card returns the card itself.
+    '''
+    __slots__ = ('suit', 'value', '_int', '_hash', '_str')
 
     suits  = ['♥', '♦', '♣', '♠']
     labels = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
 
-    def __init__(self, suit, value):
+    def __new__(cls, suit, value):
         suit = Card.suit_to_symbol(suit)
 
         if not isinstance(value, int):
@@ -21,32 +29,48 @@ class Card():
         if suit not in Card.suits:
             raise ValueError('[-] Invalid Card suit! (suit: {})'.format(suit))
         
-        self.suit  = suit
-        self.value = value
+        return CARDS[Card.suits.index(suit)*13 + value]
+
+    @classmethod
+    def _create(cls, x):
+        card = object.__new__(cls)
+        object.__setattr__(card, 'suit', Card.suits[x//13])
+        object.__setattr__(card, 'value', x % 13)
+        object.__setattr__(card, '_int', x)
+        object.__setattr__(card, '_hash', hash((card.suit, card.value)))
+        object.__setattr__(card, '_str', '[{}{}]'.format(card.suit, Card.labels[card.value]))
+        return card
+
+    def __setattr__(self, name, value):
+        raise AttributeError('[-] Cards are immutable!')
+
+    def __delattr__(self, name):
+        raise AttributeError('[-] Cards are immutable!')
 
     def __str__(self):
-        return '[{}{}]'.format(self.suit, Card.labels[self.value])
+        return self._str
 
     def __repr__(self):
-        return str(self)
+        return self._str
 
     def __hash__(self):
-        return hash((self.suit, self.value))
+        return self._hash
 
-    def __eq__(self, other):
-        return (self.suit, self.value) == (other.suit, other.value)
+    def __int__(self):
+        return self._int
 
-    def __ne__(self, other):
-        return not(self == other)
+    def __copy__(self):
+        return self
 
-    def __int__(self):
-        return Card.suits.index(self.suit)*13 + self.value
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (Card.int_to_card, (self._int,))
 
     @staticmethod
     def int_to_card(x):
-        suit = Card.suits[x//13]
-        value = x % 13
-        return Card(suit, value)
+        return CARDS[x]
 
     @staticmethod
     def suit_to_symbol(x):
@@ -61,11 +85,23 @@ class Card():
 
         return x
 
+# The only Card objects, indexed by their integer representation
+CARDS = tuple(Card._create(x) for x in range(consts.DIFFERENT_CARDS))
+
 class Deck():
 
-    def __init__(self):
+    def __init__(self, cards=None):
+        '''
+            Creates a shuffled deck, or a deck with the
+            given cards in the given order (the last card
+            is drawn first).
+        '''
+        if cards is not None:
+            self.cards = list(cards)
+            return
+
         # Add four suits with 1-13 cards.
-        self.cards = [Card(suit, value) for suit in Card.suits for value in range(13)]
+        self.cards = list(CARDS)
         shuffle(self.cards)
 
     def draw(self, num=1):
@@ -0,0 +1,438 @@
+'''
+    Benchmarks of the engine and player hot paths.
+
+    Every benchmark measures how many operations per second it runs.
+    Operations per second depend on the machine, so they are divided
+    by those of the reference benchmark (plain Python work which does
+    not use the repo), which is always run.
+
+    Results are compared with a JSON baseline (a dictionary mapping
+    every benchmark name to its speed relative to the reference):
+    benchmarks slower than the baseline by more than the tolerance
+    are reported as regressions, and the exit code is 1.
+'''
+import os, sys, json, time, random, getopt, tempfile, consts, tablebase
+from Card import Card, Deck, is_new_winner, get_trick_winner
+from bitboard import popcount, iter_cards, cards_to_mask, trick_winner
+from solver import Solver
+from game import get_game_class
+from game.Game import PlayerState, to_cards
+from player.Player import RandomPlayer
+from player.HeuristicPlayer import HeuristicPlayer
+from player.MCPlayer import MCPlayer, simulate_contracts
+from player.DealSampler import DealSampler
+from Barbu import Barbu
+
+BASELINE = 'bench/baseline.json'
+REFERENCE = 'reference'
+
+# Name -> function returning a callable, which runs some
+# operations and returns how many it ran
+BENCHMARKS = {}
+
+def benchmark(name):
+    def register(function):
+        BENCHMARKS[name] = function
+        return function
+
+    return register
+
+def deal(player_type=RandomPlayer):
+    deck = Deck()
+    players = [player_type(ID=i) for i in range(consts.NUM_PLAYERS)]
+    for i, player in enumerate(players):
+        player.hand = sorted(deck.cards[i*13:(i+1)*13], key=int)
+
+    return players
+
+def new_game(game_num, players, first_player=0):
+    trump_suit = random.choice(Card.suits) if consts.GAMES[game_num] == 'game.Atout' else None
+    return get_game_class(consts.GAMES[game_num].split('.')[1])(players, first_player, trump_suit)
+
+@benchmark(REFERENCE)
+def bench_reference():
+    # Integer arithmetic, dictionary updates and sorting
+    numbers = [random.getrandbits(52) for _ in range(1000)]
+
+    def run():
+        counts = {}
+        for number in numbers:
+            key = number * 2654435761 >> 20 & 255
+            counts[key] = counts.get(key, 0) + 1
+        sorted(numbers)
+
+        return len(numbers)
+
+    return run
+
+def random_tricks(num):
+    tricks = []
+    for _ in range(num):
+        cards = random.sample(Deck().cards, 4)
+        tricks.append((random.randrange(4), cards, random.choice([None] + Card.suits)))
+
+    return tricks
+
+@benchmark('is_new_winner')
+def bench_is_new_winner():
+    pairs = [(trick[1][0], trick[1][1], trick[2]) for trick in random_tricks(1000)]
+
+    def run():
+        for new_card, winning_card, trump_suit in pairs:
+            is_new_winner(new_card, winning_card, trump_suit)
+
+        return len(pairs)
+
+    return run
+
+@benchmark('get_trick_winner')
+def bench_get_trick_winner():
+    tricks = random_tricks(1000)
+
+    def run():
+        for first_player, cards, trump_suit in tricks:
+            get_trick_winner(first_player, cards, trump_suit)
+
+        return len(tricks)
+
+    return run
+
+@benchmark('bitboard.trick_winner')
+def bench_trick_winner():
+    tricks = [(first_player, [int(card) for card in cards], Card.suits.index(trump_suit) if trump_suit else None)
+              for first_player, cards, trump_suit in random_tricks(1000)]
+
+    def run():
+        for first_player, cards, trump in tricks:
+            trick_winner(first_player, cards, trump)
+
+        return len(tricks)
+
+    return run
+
+def positions(game_num, num_games=5):
+    '''
+        Returns copies of the states met while playing
+        random games, together with a game to evaluate them.
+    '''
+    states = []
+    for _ in range(num_games):
+        game = new_game(game_num, deal())
+        while not game.state.terminal:
+            states.append(game.state.copy())
+            game.apply(random.choice(list(iter_cards(game.get_playable_cards())) or [-1]))
+
+    return game, states
+
+def bench_get_playable_actions(game_num):
+    game, states = positions(game_num)
+
+    def run():
+        for state in states:
+            game.state = state
+            game.get_playable_actions()
+
+        return len(states)
+
+    return run
+
+def bench_get_next_state(game_num):
+    def run():
+        moves = 0
+        game = new_game(game_num, deal())
+        while not game.state.terminal:
+            game.get_next_state(game.get_playable_actions()[0])
+            moves += 1
+
+        return moves
+
+    return run
+
+def bench_apply_undo(game_num):
+    game = new_game(game_num, deal())
+
+    def run():
+        moves = 0
+        while not game.state.terminal:
+            game.apply(random.choice(list(iter_cards(game.get_playable_cards())) or [-1]))
+            moves += 1
+
+        for _ in range(moves):
+            game.undo()
+
+        return moves
+
+    return run
+
+def bench_heuristic_get_next_action(game_num):
+    # Record the hand of the current player, the state and the playable actions
+    decisions = []
+    for _ in range(5):
+        players = deal(HeuristicPlayer)
+        game = new_game(game_num, players)
+        while not game.state.terminal:
+            player = players[game.state.current_player]
+            actions = game.get_playable_actions()
+            decisions.append((player, list(player.hand), game.state.copy(), actions))
+            game.get_next_state(player.get_next_action(PlayerState(game.state, actions)))
+
+    def run():
+        # A new view every time, as views cache what they compute
+        for player, hand, state, actions in decisions:
+            player.hand = hand
+            player.get_next_action(PlayerState(state, actions))
+
+        return len(decisions)
+
+    return run
+
+for game_num, module_name in consts.GAMES.items():
+    game_name = module_name.split('.')[1]
+    benchmark('{}.get_playable_actions'.format(game_name))((lambda n: lambda: bench_get_playable_actions(n))(game_num))
+    benchmark('{}.get_next_state'.format(game_name))((lambda n: lambda: bench_get_next_state(n))(game_num))
+    benchmark('{}.apply_undo'.format(game_name))((lambda n: lambda: bench_apply_undo(n))(game_num))
+    benchmark('HeuristicPlayer.get_next_action.{}'.format(game_name))((lambda n: lambda: bench_heuristic_get_next_action(n))(game_num))
+
+@benchmark('Domino.attach_card')
+def bench_attach_card():
+    game, states = positions(6)
+
+    # Pair every position with a card that can be attached
+    attachable = []
+    for state in states:
+        game.state = state
+        cards = list(iter_cards(game.get_playable_cards()))
+        if cards:
+            attachable.append((state, state.played, random.choice(cards)))
+
+    def run():
+        for state, played, card in attachable:
+            game.state = state
+            state.played = played
+            game.attach_card(card)
+
+        return len(attachable)
+
+    return run
+
+@benchmark('DealSampler.sample')
+def bench_deal_sampler():
+    # Sample the hidden hands in the middle of a NoHearts game
+    game, states = positions(2, num_games=1)
+    state = states[len(states) // 2]
+    hand = to_cards(state.hands[state.current_player])
+    sampler = DealSampler.from_state(PlayerState(state, []), hand)
+
+    def run():
+        sampler.batch(256)
+        return 256
+
+    return run
+
+@benchmark('DealSampler.build')
+def bench_deal_sampler_build():
+    # Build the samplers of every position of NoHearts games, as MCPlayer does for every move
+    game, states = positions(2, num_games=2)
+    views = [(PlayerState(state, []), to_cards(state.hands[state.current_player])) for state in states]
+
+    def run():
+        for view, hand in views:
+            DealSampler.from_state(view, hand)
+
+        return len(views)
+
+    return run
+
+@benchmark('MCPlayer.iterations')
+def bench_mcplayer_iterations():
+    # Search the first move of a NoHearts game, counting iterations
+    players = deal(MCPlayer)
+    game = new_game(2, players)
+    state = PlayerState(game.state, game.get_playable_actions())
+    player = players[game.state.current_player]
+    player.iterations = 100
+
+    def run():
+        # A new tree every time, as for a new move
+        player.root = None
+        player.search(state, player.iterations)
+        return player.iterations
+
+    return run
+
+@benchmark('MCPlayer.simulate_contracts')
+def bench_simulate_contracts():
+    # Play out every contract of a dealer on deals of the other cards
+    hand = cards_to_mask(deal()[0].hand)
+    candidates = [(0, suit) for suit in Card.suits] + [(game_num, None) for game_num in range(1, 6)] + [(6, value) for value in range(13)]
+
+    def run():
+        return simulate_contracts(hand, 0, candidates, None, 5, {})[1]
+
+    return run
+
+def bench_solver(game_num):
+    # Solve endgames with 5 cards in every hand, for the first player
+    games = []
+    for _ in range(5):
+        game = new_game(game_num, deal())
+        while popcount(game.state.played) < 32:
+            game.apply(random.choice(list(iter_cards(game.get_playable_cards()))))
+        games.append(game)
+
+    def run():
+        for game in games:
+            Solver(game.state.copy()).solve(0)
+
+        return len(games)
+
+    return run
+
+for game_num in [1, 5]:
+    benchmark('solver.{}'.format(consts.GAMES[game_num].split('.')[1]))((lambda n: lambda: bench_solver(n))(game_num))
+
+@benchmark('tablebase.lookup')
+def bench_tablebase_lookup():
+    # Look up the last tricks of NoTricks games in a table built on the fly
+    # The table stays mapped once its directory is removed
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'NoTricks.tb')
+        tablebase.build('NoTricks', path, max_cards=1)
+        table = tablebase.Tablebase(path)
+
+    states = [state for state in positions(1)[1] if not state.trick and popcount(state.hands[state.current_player]) == 1]
+
+    def run():
+        for state in states:
+            table.lookup(state)
+
+        return len(states)
+
+    return run
+
+def bench_match(player_type, **kwargs):
+    players = [player_type(ID=i, **kwargs) for i in range(consts.NUM_PLAYERS)]
+
+    def run():
+        Barbu(players).play()
+        return 1
+
+    return run
+
+benchmark('match.RandomPlayer')(lambda: bench_match(RandomPlayer))
+benchmark('match.HeuristicPlayer')(lambda: bench_match(HeuristicPlayer))
+
+# A few iterations and rollouts for every decision, which
+# must also end within a few milliseconds, to keep it short
+benchmark('match.MCPlayer')(lambda: bench_match(MCPlayer, time_budget=0.01, iterations=5, tablebases={},
+                                                contract_budget=0.05, contract_rollouts=1))
+
+def measure(name, min_time):
+    '''
+        Returns the operations per second of a benchmark, running
+        it repeatedly for at least min_time seconds.
+    '''
+    random.seed(0)
+    run = BENCHMARKS[name]()
+
+    # Warm up
+    run()
+
+    ops = 0
+    start = time.perf_counter()
+    while True:
+        ops += run()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return ops / elapsed
+
+def normalise(results):
+    '''
+        Returns the speed of every benchmark relative to the reference.
+    '''
+    return {name: ops / results[REFERENCE] for name, ops in results.items() if name != REFERENCE}
+
+def compare(results, baseline, tolerance):
+    '''
+        Returns the names of the benchmarks which are slower
+        than their baseline by more than the tolerance.
+    '''
+    return [name for name, ops in results.items()
+            if name in baseline and ops < baseline[name] * (1 - tolerance)]
+
+def usage():
+    print('usage: python benchmark.py [-b BASELINE] [-s] [-t TOLERANCE] [-m SECONDS] [-k PATTERN]')
+    print('    -b\tbaseline file (default: {})'.format(BASELINE))
+    print('    -s\tsave the results as the new baseline')
+    print('    -t\tfraction of the baseline speed that can be lost before')
+    print('      \ta benchmark counts as a regression (default: 0.2)')
+    print('    -m\tminimum time for every benchmark, in seconds (default: 1)')
+    print('    -k\tonly run benchmarks whose name contains PATTERN')
+    print('      \t(and the reference)')
+    print('    -h\thelp')
+
+if __name__ == '__main__':
+    baseline_path = BASELINE
+    save = False
+    tolerance = 0.2
+    min_time = 1.0
+    pattern = ''
+
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], 'b:st:m:k:h')
+    except getopt.GetoptError as e:
+        print('Error: {}. Type -h for help'.format(str(e)))
+        sys.exit(2)
+
+    for opt, arg in opts:
+        if opt == '-h':
+            usage()
+            sys.exit(0)
+        elif opt == '-b':
+            baseline_path = arg
+        elif opt == '-s':
+            save = True
+        elif opt == '-t':
+            tolerance = float(arg)
+        elif opt == '-m':
+            min_time = float(arg)
+        elif opt == '-k':
+            pattern = arg
+
+    baseline = {}
+    if os.path.exists(baseline_path):
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+
+    # The reference first, to compare the others as they run
+    results = {REFERENCE: measure(REFERENCE, min_time)}
+    print('{:50} {:14.2f} ops/s'.format(REFERENCE, results[REFERENCE]))
+
+    for name in BENCHMARKS:
+        if pattern not in name or name == REFERENCE:
+            continue
+
+        results[name] = measure(name, min_time)
+        relative = results[name] / results[REFERENCE]
+
+        if name in baseline:
+            change = relative / baseline[name] - 1
+            print('{:50} {:14.2f} ops/s  {:11.4g}  ({:+.1%})'.format(name, results[name], relative, change))
+        else:
+            print('{:50} {:14.2f} ops/s  {:11.4g}'.format(name, results[name], relative))
+
+    relative = normalise(results)
+    regressions = compare(relative, baseline, tolerance)
+    for name in regressions:
+        print('[-] Regression: {} ({:.4g} of the reference, baseline {:.4g})'.format(name, relative[name], baseline[name]))
+
+    if save:
+        directory = os.path.dirname(baseline_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        baseline.update(relative)
+        with open(baseline_path, 'w') as f:
+            json.dump(baseline, f, indent=4, sort_keys=True)
+
+    sys.exit(1 if regressions else 0)
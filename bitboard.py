@@ -0,0 +1,164 @@
+'''
+    Bitboard helpers used by the game engine.
+
+    A set of cards is represented as a 52-bit integer, where bit i is set
+    if the card with integer representation i (see Card.__int__) belongs
+    to the set. Suits occupy 13 consecutive bits each, in the same order
+    as Card.suits (♥ ♦ ♣ ♠), and values are ascending inside every suit.
+
+    Since hands are kept sorted by their integer representation, the
+    position of a card inside a hand is the number of cards of that
+    hand with a lower integer representation.
+'''
+import consts
+
+SUIT_SIZE = 13
+SUIT_BITS = (1 << SUIT_SIZE) - 1
+FULL_DECK = (1 << consts.DIFFERENT_CARDS) - 1
+
+SUIT_MASKS = [SUIT_BITS << (suit * SUIT_SIZE) for suit in range(4)]
+
+HEARTS = SUIT_MASKS[0]
+HIGH_HEARTS = sum(1 << value for value in range(8, 13))
+KING_OF_HEARTS = 1 << 11
+QUEENS = sum(1 << (suit * SUIT_SIZE + 10) for suit in range(4))
+
+try:
+    popcount = int.bit_count
+except AttributeError:
+    # Python < 3.10
+    def popcount(mask):
+        return bin(mask).count('1')
+
+def card_bit(card):
+    return 1 << card
+
+def suit_of(card):
+    return card // SUIT_SIZE
+
+def value_of(card):
+    return card % SUIT_SIZE
+
+def highest(mask):
+    '''
+        Returns the integer representation of the highest
+        card in the mask, or -1 if the mask is empty.
+    '''
+    return mask.bit_length() - 1
+
+def lowest(mask):
+    '''
+        Returns the integer representation of the lowest
+        card in the mask, or -1 if the mask is empty.
+    '''
+    return (mask & -mask).bit_length() - 1
+
+def iter_cards(mask):
+    '''
+        Yields the integer representation of every card
+        in the mask, in ascending order.
+    '''
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+def cards_to_mask(cards):
+    mask = 0
+    for card in cards:
+        mask |= 1 << int(card)
+
+    return mask
+
+def position(hand, card):
+    '''
+        Returns the index of the card in the (sorted) hand.
+    '''
+    return popcount(hand & ((1 << card) - 1))
+
+def nth_card(hand, n):
+    '''
+        Returns the integer representation of the
+        card at index n of the (sorted) hand.
+    '''
+    for _ in range(n):
+        hand &= hand - 1
+
+    return lowest(hand)
+
+def actions(hand, playable):
+    '''
+        Converts a mask of playable cards into the list of their
+        indexes in the (sorted) hand, which is what players expect
+        as playable actions.
+    '''
+    playable_actions = []
+    i = 0
+    while hand:
+        low = hand & -hand
+        if low & playable:
+            playable_actions.append(i)
+        hand ^= low
+        i += 1
+
+    return playable_actions
+
+def trick_winner(first_player, trick, trump=None):
+    '''
+        Returns the index of the player who played the winning card
+        in the trick, where trick is the list of the integer
+        representations of the played cards, in order.
+
+        The winning card is the highest trump if any trump has been
+        played, otherwise the highest card of the suit that was led.
+    '''
+    trick_mask = cards_to_mask(trick)
+
+    winning_suit = trick[0] // SUIT_SIZE
+    if trump is not None and trick_mask & SUIT_MASKS[trump]:
+        winning_suit = trump
+
+    winning_card = highest(trick_mask & SUIT_MASKS[winning_suit])
+
+    return (trick.index(winning_card) + first_player) % consts.NUM_PLAYERS
+
+def domino_playable(hand, played, starting_value):
+    '''
+        Returns the mask of the cards of the hand that can be
+        attached to the Domino chains in played.
+
+        A suit which has not been opened only accepts its card
+        of the starting value. An opened suit is a contiguous chain
+        in Domino order (A 2 3 ... Q K, the ace being the lowest),
+        which accepts the cards adjacent to both its ends.
+    '''
+    playable = 0
+    for suit in range(4):
+        shift = suit * SUIT_SIZE
+        chain = (played >> shift) & SUIT_BITS
+
+        if not chain:
+            playable |= 1 << (shift + starting_value)
+            continue
+
+        # Rotate the suit so that the ace becomes the lowest bit,
+        # find the neighbours of the chain, then rotate back
+        domino = ((chain << 1) & SUIT_BITS) | (chain >> 12)
+        neighbours = ((domino << 1) | (domino >> 1)) & ~domino & SUIT_BITS
+        neighbours = (neighbours >> 1) | ((neighbours & 1) << 12)
+
+        playable |= neighbours << shift
+
+    return hand & playable
+
+def domino_chain(played, suit):
+    '''
+        Returns the integer representations of the played
+        cards of a suit, in Domino order (ace first).
+    '''
+    chain = list(iter_cards(played & SUIT_MASKS[suit]))
+
+    if chain and chain[-1] == suit * SUIT_SIZE + 12:
+        chain = [chain[-1]] + chain[:-1]
+
+    return chain
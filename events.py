@@ -0,0 +1,101 @@
+'''
+    Events published by Barbu and by the games while a match is played.
+
+    Players subscribe to the types of event they care about (see
+    Player.subscribe). An event is built only if at least one callback
+    subscribed to its type, so a match between computer players, which
+    don't subscribe to anything, doesn't pay for notifications.
+'''
+from Card import Card
+
+class Event():
+    '''
+        Base class for every event type.
+
+        Events are built by EventBus.publish() with the
+        arguments it receives after the event type.
+    '''
+    __slots__ = ()
+
+class Message(Event):
+    '''
+        Something to tell the players, e.g. 'Player 2 won the trick!'.
+
+        The text is formatted from the template and its arguments
+        the first time it is read, and then cached.
+    '''
+    __slots__ = ('template', 'args', '_text')
+
+    def __init__(self, template, *args):
+        self.template = template
+        self.args = args
+        self._text = None
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = self.template.format(*self.args)
+
+        return self._text
+
+    def __str__(self):
+        return self.text
+
+class CardPlayed(Event):
+    '''
+        A card has been played by a player.
+    '''
+    __slots__ = ('player', '_card')
+
+    def __init__(self, player, card):
+        self.player = player
+        self._card = card
+
+    @property
+    def card(self):
+        return Card.int_to_card(self._card)
+
+class EventBus():
+
+    def __init__(self):
+        # Event type -> list of callbacks
+        self.subscribers = {}
+
+    def subscribe(self, event_type, callback):
+        self.subscribers.setdefault(event_type, []).append(callback)
+
+    def unsubscribe(self, event_type, callback):
+        callbacks = self.subscribers.get(event_type, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+        if not callbacks:
+            self.subscribers.pop(event_type, None)
+
+    def has_subscribers(self, event_type):
+        return event_type in self.subscribers
+
+    def publish(self, event_type, *args):
+        '''
+            Builds an event of the given type from args and passes it
+            to every callback subscribed to that type. If there are
+            no subscribers, the event is not even built.
+        '''
+        callbacks = self.subscribers.get(event_type)
+        if not callbacks:
+            return
+
+        event = event_type(*args)
+        for callback in callbacks:
+            callback(event)
+
+    @classmethod
+    def for_players(cls, players):
+        '''
+            Returns a new bus to which every player has subscribed.
+        '''
+        bus = cls()
+        for player in players:
+            player.subscribe(bus)
+
+        return bus
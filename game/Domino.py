@@ -1,13 +1,14 @@
 import consts
-from copy import deepcopy
 from game.Game import Game
 from Card import Card
-from utils import int_input, tell_everyone
+from bitboard import nth_card, actions, domino_playable
+from events import Message, CardPlayed
+from transposition import HAND_KEYS, PLAYED_KEYS, PLAYER_KEYS, compute
 
 class Domino(Game):
 
-    def __init__(self, players, first_player, trump_suit=None):
-        super().__init__(players, first_player, trump_suit)
+    def __init__(self, players, first_player, trump_suit=None, bus=None):
+        super().__init__(players, first_player, trump_suit, bus)
 
         # Ask dealer for Domino starting value
         self.starting_value = None
@@ -15,8 +16,9 @@ class Domino(Game):
             self.starting_value = players[first_player].get_starting_value()
 
         self.state.starting_value = self.starting_value
+        self.state.hash = compute(self.state)
         
-        tell_everyone(self.players, '(starting value: {})'.format(Card.labels[self.starting_value]))
+        self.bus.publish(Message, '(starting value: {})', Card.labels[self.starting_value])
 
     def get_next_state(self, action):
         '''
@@ -25,24 +27,22 @@ class Domino(Game):
             This game is *not* trick-taking, so the following attributes
             are *not* used in the state:
                 - first_player
-                - trick_cards
-                - missing_suits
-                - highest
+                - trick / trick_mask
+                - voids
                 - trump_suit
 
-            The played cards are recorded in played_cards, which is a
-            dictionary of suits of the form:
+            The played cards are recorded in the played mask. Since
+            the cards of every suit form a contiguous chain, the played
+            mask is enough to know both ends of every chain. Players see
+            the chains as a dictionary of suits of the form:
 
             {'♥': [...],
              '♦': [...],
              '♣': [...],
              '♠': [...]}
 
-            Every suit is mapped to a list of cards of that suit that
-            have been played so far.
-
             When a card is played, the card is appended or prepended to
-            the list of the corresponding suit.
+            the chain of the corresponding suit.
 
             In Domino, unlike all other games, the ace has the lowest
             value (lower than the 2). So, it will be prepended to the 2
@@ -53,63 +53,56 @@ class Domino(Game):
         '''
         if action > -1:
             # Get card from action number and remove it from player's hand
-            played_card = self.state.hands[self.state.current_player].pop(action)
+            played_card = nth_card(self.state.hands[self.state.current_player], action)
             self.players[self.state.current_player].hand.pop(action)
 
             # Notify players of the played card
-            for i in range(len(self.players)):
-                self.players[i].notify_card(self.state.current_player, deepcopy(played_card))
+            self.bus.publish(CardPlayed, self.state.current_player, played_card)
+        else:
+            played_card = -1
+            self.bus.publish(Message, '{} passed!', self.state.current_player)
+
+        self.apply(played_card)
+
+    def apply(self, card):
+        '''
+            Plays a card (-1 to pass) for the current player, without
+            involving the players. See Game.apply().
+        '''
+        self.save()
+
+        h = self.state.hash ^ PLAYER_KEYS[self.state.current_player]
 
-            # Attach the card to the list.
-            self.attach_card(played_card)
+        if card > -1:
+            h ^= HAND_KEYS[self.state.current_player][card] ^ PLAYED_KEYS[card]
+
+            # Remove the card from the current player's hand
+            # and attach it to its chain.
+            self.state.hands[self.state.current_player] ^= 1 << card
+            self.attach_card(card)
 
             # If the current player has an empty hand
             # and still has a score == 0, update scores
             if not self.state.hands[self.state.current_player] and not self.state.scores[self.state.current_player]:
                 self.update_scores()
 
-        else:
-            tell_everyone(self.players, '{} passed!'.format(self.state.current_player))
-
         self.state.current_player = (self.state.current_player + 1) % consts.NUM_PLAYERS
+        self.state.hash = h ^ PLAYER_KEYS[self.state.current_player]
 
         # If all hands are empty, this state is terminal
         if not any(self.state.hands):
             self.state.terminal = True
 
     def get_playable_actions(self):
-        hand = self.state.hands[self.state.current_player]
-
-        playable_actions = []
-        for i, card in enumerate(hand):
-            # Check starting cards
-            if card.value == self.starting_value:
-                playable_actions.append(i)
-                continue
-
-            suit_cards = self.state.played_cards[card.suit]
-
-            # Besides starting cards,
-            if suit_cards:
-                # Ace (value: 12) can be put *only* before a 2 (value: 0)
-                if card.value == 12:
-                    if suit_cards[0].value == 0:
-                        playable_actions.append(i)
-                # King (value: 11) can be put *only* after a Q (value: 10)
-                elif card.value == 11:
-                    if suit_cards[-1].value == 10:
-                        playable_actions.append(i)
-                # Two can be put *also* after an Ace (value: 12)
-                elif card.value == 0 and suit_cards[0].value == 12:
-                    playable_actions.append(i)
-                # Other cards can be put when there is an adjacent value
-                elif card.value == suit_cards[0].value - 1 or card.value == suit_cards[-1].value + 1:
-                    playable_actions.append(i)
-
-        if not playable_actions:
+        playable_cards = self.get_playable_cards()
+
+        if not playable_cards:
             return [-1]
 
-        return playable_actions
+        return actions(self.state.hands[self.state.current_player], playable_cards)
+
+    def get_playable_cards(self):
+        return domino_playable(self.state.hands[self.state.current_player], self.state.played, self.state.starting_value)
 
     def update_scores(self):
         '''
@@ -124,38 +117,21 @@ class Domino(Game):
 
     def attach_card(self, played_card):
         '''
-            Adds the played card to the state's played cards,
-            keeping into account that these are special cards
-            in this game:
+            Adds the played card (its integer representation)
+            to the state's played cards, keeping into account
+            that these are special cards in this game:
 
-                - Ace (value: 12) *must* be added at the beginning of the list.
-                - Two (value: 0) *must* be added at the beginning of the list,
-                  except if an Ace is already present at the beginning.
-                  In that case, the Two is added at index 1 instead.
-                - King (value: 11) *must* be added at the end of the list.
+                - Ace (value: 12) can *only* be attached before a Two.
+                - Two (value: 0) can be attached before a Three, or
+                  after an Ace if the Ace is the starting value.
+                - King (value: 11) can *only* be attached after a Queen.
 
             The played card is assumed valid, because the action
             passed to get_next_state is validated in the play() method
             against the actions returned by get_playable_actions.
+            Cards are never detached: undo() restores the played mask.
         '''
-        suit_cards = self.state.played_cards[played_card.suit]
-        
-        if not suit_cards:
-            suit_cards = [played_card]
-        elif played_card.value == 12:
-            suit_cards = [played_card] + suit_cards
-        elif played_card.value == 0:
-            if suit_cards[0].value == 12:
-                suit_cards.insert(1, played_card)
-            else:
-                suit_cards = [played_card] + suit_cards
-        elif played_card.value == 11:
-            suit_cards.append(played_card)
-        elif played_card.value > suit_cards[-1].value:
-            suit_cards.append(played_card)
-        elif played_card.value < suit_cards[0].value:
-            suit_cards = [played_card] + suit_cards
-        else:
-            raise ValueError('[-] The selected card cannot be appended nor prepended to the corresponding suit! (suit: {}, value: {})'.format(played_card.suit, played_card.value))
+        if not domino_playable(1 << played_card, self.state.played, self.state.starting_value):
+            raise ValueError('[-] The selected card cannot be appended nor prepended to the corresponding suit! (suit: {}, value: {})'.format(Card.suits[played_card // 13], played_card % 13))
 
-        self.state.played_cards[played_card.suit] = suit_cards
\ No newline at end of file
+        self.state.played |= 1 << played_card
\ No newline at end of file
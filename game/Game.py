@@ -1,35 +1,86 @@
 import consts
-from copy import deepcopy
-from utils import tell_everyone
-from Card import get_trick_winner
+from events import EventBus, Message, CardPlayed
+from Card import Card
+from bitboard import FULL_DECK, SUIT_MASKS, popcount, cards_to_mask, iter_cards, highest, nth_card, actions, trick_winner, domino_chain
 from player.Player import HumanPlayer
+from transposition import HAND_KEYS, TRICK_KEYS, PLAYER_KEYS, FIRST_PLAYER_KEYS, compute
+
+def to_cards(mask):
+    return [Card.int_to_card(card) for card in iter_cards(mask)]
 
 class State():
     def __init__(self, game, players, first_player, trump_suit=None):
         '''
-            Missing suits is a dictionary of 4 lists (one for every suit).
-            Each list has 4 boolean entries (one for every player).
-            If an entry is True, it means that player has ran out of
-            cards of that suit.
-        '''
-        missing_suits = {'♥': [False for _ in range(consts.NUM_PLAYERS)],
-                         '♦': [False for _ in range(consts.NUM_PLAYERS)],
-                         '♣': [False for _ in range(consts.NUM_PLAYERS)],
-                         '♠': [False for _ in range(consts.NUM_PLAYERS)]}
+            This is the state used by the engine, in which every set
+            of cards is a bitboard (see bitboard.py):
+
+                - hands is a list of 4 masks (one for every player).
+                - played is the mask of the cards played so far.
+                - trick is the list of the integer representations
+                  of the cards played in the current trick, in order,
+                  and trick_mask is the corresponding mask.
 
+            Voids is a mask of NUM_PLAYERS bits for every suit.
+            If bit (suit * NUM_PLAYERS + player) is set, it means that
+            player has ran out of cards of that suit.
+
+            Hash is the Zobrist hash of the state (see transposition.py),
+            kept up to date by Game.apply() and Game.undo().
+
+            Players never see this object: they receive a PlayerState,
+            where cards are Card objects.
+        '''
         self.game = game
         self.current_player = first_player
         self.first_player = first_player
-        self.hands = [deepcopy(player.hand) for player in players]
-        self.trick_cards = []
-        self.played_cards = [] if game != 'Domino' else {'♥': [], '♦': [], '♣': [], '♠': []}
-        self.missing_suits = missing_suits
-        self.highest = {'♥': 12, '♦': 12, '♣': 12, '♠': 12}
+        self.hands = [cards_to_mask(player.hand) for player in players]
+        self.trick = []
+        self.trick_mask = 0
+        self.played = 0
+        self.voids = 0
         self.trump_suit = trump_suit
-        self.playable_actions = []
+        self.trump = Card.suits.index(Card.suit_to_symbol(trump_suit)) if trump_suit else None
         self.scores = [0 for _ in range(consts.NUM_PLAYERS)]
         self.terminal = False
         self.starting_value = None # Domino
+        self.hash = compute(self)
+
+    def copy(self):
+        '''
+            Returns a copy of the state which shares nothing mutable
+            with it. Every set of cards is an integer, so this is cheap.
+        '''
+        state = State.__new__(State)
+        state.__dict__.update(self.__dict__)
+        state.hands = list(self.hands)
+        state.trick = list(self.trick)
+        state.scores = list(self.scores)
+        return state
+
+    @classmethod
+    def from_hands(cls, game, hands, first_player, trump_suit=None, starting_value=None):
+        '''
+            Returns the state in which first_player leads a trick and
+            the players hold the given hands (a list of masks): the
+            cards in no hand count as played. Used by search-based
+            players to play out deals without creating players.
+        '''
+        state = cls.__new__(cls)
+        state.game = game
+        state.current_player = first_player
+        state.first_player = first_player
+        state.hands = list(hands)
+        state.trick = []
+        state.trick_mask = 0
+        state.played = FULL_DECK & ~(hands[0] | hands[1] | hands[2] | hands[3])
+        state.voids = 0
+        state.trump_suit = trump_suit
+        state.trump = Card.suits.index(Card.suit_to_symbol(trump_suit)) if trump_suit else None
+        state.scores = [0 for _ in range(consts.NUM_PLAYERS)]
+        state.terminal = False
+        state.starting_value = starting_value
+        state.hash = compute(state)
+        return state
 
     def __str__(self):
         '''
@@ -44,28 +95,227 @@ class State():
     hands[1]: {}
     hands[2]: {}
     hands[3]: {}
-    trick_cards: {}
-    played_cards: {}
-    missing_suits['♥']: {}
-                 ['♦']  {}
-                 ['♣']  {}
-                 ['♠']  {}
-    highest: {}
+    trick: {}
+    played: {}
+    voids: {:016b}
     trump_suit: {}
-    playable_actions: {}
     scores: {}
     terminal: {}
     starting value: {}
     '''.format(self.game, self.current_player, self.first_player,
-               self.hands[0], self.hands[1], self.hands[2],
-               self.hands[3], self.trick_cards, self.played_cards,
-               self.missing_suits['♥'], self.missing_suits['♦'],
-               self.missing_suits['♣'], self.missing_suits['♠'],
-               self.highest, self.trump_suit, self.playable_actions,
+               to_cards(self.hands[0]), to_cards(self.hands[1]),
+               to_cards(self.hands[2]), to_cards(self.hands[3]),
+               [Card.int_to_card(card) for card in self.trick],
+               to_cards(self.played), self.voids, self.trump_suit,
                self.scores, self.terminal, self.starting_value)
 
     def __repr__(self):
-        return __str__(self)
+        return str(self)
+
+class PlayerState():
+    '''
+        A read-only view of the engine State, sent to the current player.
+
+        Building a view costs constant time: it only keeps the masks and
+        values it needs (the hand of the current player, the played cards,
+        the cards of the current trick, the voids and the scores), so the
+        engine can keep changing its own State while the player holds
+        the view. Attributes cannot be assigned.
+
+        Card-based attributes are built the first time they are read
+        and then cached, so every view owns its own copy of them:
+        a player can modify them (e.g. missing_suits) without affecting
+        the engine or other players.
+
+        Only the hand of the current player is visible: the hands of
+        the other players are set to None.
+
+        Missing suits is a dictionary of 4 lists (one for every suit).
+        Each list has 4 boolean entries (one for every player).
+        If an entry is True, it means that player has ran out of
+        cards of that suit: either they did not follow it, or every
+        card of that suit is played or in the current player's hand.
+
+        Highest is a dictionary mapping every suit to the value of the
+        highest card of that suit which has not been played yet (None
+        if every card of that suit has been played).
+
+        Played counts is a dictionary mapping every suit to the number
+        of cards of that suit played so far, and remaining values to the
+        values of the cards of that suit not played yet (the current
+        player's included), from the lowest.
+
+        All of them are read from the played cards and the voids, which
+        the engine keeps as masks updated with every card, so they never
+        need to scan the cards played so far.
+
+        In Domino, played_cards is a dictionary mapping every suit to
+        the list of cards of that suit played so far, in Domino order.
+
+        Hand sizes is a tuple with the number of cards in the hand of
+        every player, which is public information (in Domino, players
+        can pass, so it cannot be derived from the played cards).
+
+        Hand mask and played mask are the masks of the current player's
+        hand and of the played cards, for players that work on masks.
+    '''
+    __slots__ = ('game', 'current_player', 'first_player', 'trump_suit',
+                 'playable_actions', 'scores', 'terminal', 'starting_value', 'hand_sizes',
+                 '_hand', '_trick', '_played', '_voids',
+                 '_hands', '_trick_cards', '_played_cards', '_missing_suits', '_highest',
+                 '_played_counts', '_remaining_values')
+
+    def __init__(self, state, playable_actions):
+        init = object.__setattr__
+        init(self, 'game', state.game)
+        init(self, 'current_player', state.current_player)
+        init(self, 'first_player', state.first_player)
+        init(self, 'trump_suit', state.trump_suit)
+        init(self, 'playable_actions', playable_actions)
+        init(self, 'scores', tuple(state.scores))
+        init(self, 'terminal', state.terminal)
+        init(self, 'starting_value', state.starting_value)
+        init(self, 'hand_sizes', tuple(popcount(hand) for hand in state.hands))
+        init(self, '_hand', state.hands[state.current_player])
+        init(self, '_trick', tuple(state.trick))
+        init(self, '_played', state.played)
+        init(self, '_voids', state.voids)
+        init(self, '_hands', None)
+        init(self, '_trick_cards', None)
+        init(self, '_played_cards', None)
+        init(self, '_missing_suits', None)
+        init(self, '_highest', None)
+        init(self, '_played_counts', None)
+        init(self, '_remaining_values', None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('[-] The state received by a player is read-only!')
+
+    def __delattr__(self, name):
+        raise AttributeError('[-] The state received by a player is read-only!')
+
+    def __setstate__(self, state):
+        '''
+            Called when unpickling (e.g. when the view is sent
+            to a worker process), which would otherwise assign
+            the attributes one by one.
+        '''
+        for name, value in state[1].items():
+            object.__setattr__(self, name, value)
+
+    @property
+    def hand_mask(self):
+        return self._hand
+
+    @property
+    def played_mask(self):
+        return self._played
+
+    @property
+    def hands(self):
+        if self._hands is None:
+            object.__setattr__(self, '_hands', [to_cards(self._hand) if i == self.current_player else None
+                                                for i in range(consts.NUM_PLAYERS)])
+
+        return self._hands
+
+    @property
+    def trick_cards(self):
+        if self._trick_cards is None:
+            object.__setattr__(self, '_trick_cards', [Card.int_to_card(card) for card in self._trick])
+
+        return self._trick_cards
+
+    @property
+    def played_cards(self):
+        if self._played_cards is None:
+            if self.game != 'Domino':
+                played_cards = to_cards(self._played)
+            else:
+                played_cards = {suit: [Card.int_to_card(card) for card in domino_chain(self._played, s)]
+                                for s, suit in enumerate(Card.suits)}
+
+            object.__setattr__(self, '_played_cards', played_cards)
+
+        return self._played_cards
+
+    @property
+    def missing_suits(self):
+        if self._missing_suits is None:
+            # The other players miss the suits with no unseen cards
+            voids = self._voids
+            unseen = self.unseen
+            others = ((1 << consts.NUM_PLAYERS) - 1) & ~(1 << self.current_player)
+            for s in range(4):
+                if not unseen & SUIT_MASKS[s]:
+                    voids |= others << (s * consts.NUM_PLAYERS)
+
+            object.__setattr__(self, '_missing_suits', {suit: [bool(voids >> (s * consts.NUM_PLAYERS + player) & 1)
+                                                               for player in range(consts.NUM_PLAYERS)]
+                                                        for s, suit in enumerate(Card.suits)})
+
+        return self._missing_suits
+
+    @property
+    def highest(self):
+        if self._highest is None:
+            highest_values = {}
+            for s, suit in enumerate(Card.suits):
+                remaining = highest(SUIT_MASKS[s] & ~self._played)
+                highest_values[suit] = remaining % 13 if remaining > -1 else None
+
+            object.__setattr__(self, '_highest', highest_values)
+
+        return self._highest
+
+    @property
+    def played_counts(self):
+        if self._played_counts is None:
+            object.__setattr__(self, '_played_counts', {suit: popcount(self._played & SUIT_MASKS[s])
+                                                        for s, suit in enumerate(Card.suits)})
+
+        return self._played_counts
+
+    @property
+    def remaining_values(self):
+        if self._remaining_values is None:
+            object.__setattr__(self, '_remaining_values', {suit: [card % 13 for card in iter_cards(SUIT_MASKS[s] & ~self._played)]
+                                                           for s, suit in enumerate(Card.suits)})
+
+        return self._remaining_values
+
+    @property
+    def unseen(self):
+        '''
+            Mask of the cards the current player cannot see:
+            the cards in the hands of the other players.
+        '''
+        return FULL_DECK & ~self._played & ~self._hand
+
+    def to_state(self, hands):
+        '''
+            Returns an engine State with the information of this view,
+            in which the players hold the given hands (a list of masks).
+
+            Used by search-based players to play out a guess of
+            the cards of the other players.
+        '''
+        state = State.__new__(State)
+        state.game = self.game
+        state.current_player = self.current_player
+        state.first_player = self.first_player
+        state.hands = list(hands)
+        state.trick = list(self._trick)
+        state.trick_mask = cards_to_mask(self._trick)
+        state.played = self._played
+        state.voids = self._voids
+        state.trump_suit = self.trump_suit
+        state.trump = Card.suits.index(Card.suit_to_symbol(self.trump_suit)) if self.trump_suit else None
+        state.scores = list(self.scores)
+        state.terminal = self.terminal
+        state.starting_value = self.starting_value
+        state.hash = compute(state)
+        return state
 
 class Game():
     '''
@@ -77,38 +327,53 @@ class Game():
         The get_next_state() method calculates the next state based on the
         action chosen by the player. It's reused across every game except for
         Domino, which overrides the method because the state change is very
-        different.
+        different. The state change itself is made by apply(), which can be
+        taken back with undo(): search-based players use this pair to explore
+        the game tree without copying the state.
 
-        The get_playable_actions() method returns the index of the card(s) in
+        The get_playable_cards() method returns the mask of the card(s) in
         the hand of the current player that can be played in the current state.
         Default behavior is just to enforce following suit if possible.
         Games which override this behavior are NoHearts and NoKingOfHearts,
         because hearts may not be led unless no other suit is available,
         and Domino, due to the very different nature of the game.
+        The get_playable_actions() method converts that mask into the index
+        of the card(s) in the hand of the current player.
+
+        Players are notified of what happens through the event bus
+        (see events.py), which does nothing for players that are
+        not interested.
 
         The update_scores() method must be overridden by every specific game.
         It updates the players' scores based on the current state, in which
         current_player is supposed to be the last trick winner.
     '''
-    def __init__(self, players, first_player, trump_suit=None):
+    def __init__(self, players, first_player, trump_suit=None, bus=None):
         assert len(players) == consts.NUM_PLAYERS, '[-] Please give a list of exactly {} players!'.format(consts.NUM_PLAYERS)
         self.players = players
+        self.bus = bus if bus is not None else EventBus.for_players(players)
         self.state = State(self.__class__.__name__, players, first_player, trump_suit)
+        self.history = []
+
+    @classmethod
+    def from_state(cls, state):
+        '''
+            Creates a game without players on the given engine State,
+            which will be changed by apply() and undo(). Used for search.
+        '''
+        game = cls.__new__(cls)
+        game.players = None
+        game.bus = EventBus()
+        game.state = state
+        game.history = []
+        return game
 
     def play(self):
         while not self.state.terminal:
-            # Copy the current state
-            __state = deepcopy(self.state)
-            
-            # Hide the hands of the other players by setting them to None
-            __state.hands = [__state.hands[i]
-                             if i == self.state.current_player else None
-                             for i in range(len(self.players))]
-            
-            # Get playable actions for the current player and embed them into the state
-            __state.playable_actions = self.get_playable_actions()
-
-            # Send modified state to the current player and wait for them to choose an action
+            # Get playable actions for the current player and build the state they see
+            __state = PlayerState(self.state, self.get_playable_actions())
+
+            # Send the state to the current player and wait for them to choose an action
             action = None
             while action not in __state.playable_actions:
                 action = self.players[self.state.current_player].get_next_action(__state)
@@ -128,68 +393,115 @@ class Game():
 
     def get_next_state(self, action):
         # Get card from action number and remove it from player's hand
-        played_card = self.state.hands[self.state.current_player].pop(action)
+        played_card = nth_card(self.state.hands[self.state.current_player], action)
         self.players[self.state.current_player].hand.pop(action)
-        
+
         # Notify players of the played card
-        for i in range(len(self.players)):
-            self.players[i].notify_card(self.state.current_player, deepcopy(played_card))
+        self.bus.publish(CardPlayed, self.state.current_player, played_card)
 
-        # Put the played card in the trick cards and played cards
-        self.state.trick_cards.append(played_card)
-        self.state.played_cards.append(played_card)
+        self.apply(played_card)
 
-        # If the player didn't follow suit, take note of the missing suit
-        if played_card.suit != self.state.trick_cards[0].suit:
-            self.state.missing_suits[self.state.trick_cards[0].suit][self.state.current_player] = True
+        # If the trick ended, tell players the trick winner
+        if not self.state.trick:
+            self.bus.publish(Message, 'Player {} won the trick!', self.state.current_player)
 
-        # If the highest card of a suit has been played,
-        # update the current highest card of that suit
-        if played_card.value == self.state.highest[played_card.suit]:
-            suit_played_values = [card.value for card in self.state.played_cards if card.suit == played_card.suit]
-            remaining_values = [value for value in range(13) if value not in suit_played_values]
+    def apply(self, card):
+        '''
+            Plays a card for the current player and updates the state,
+            without involving the players. The card is given by its
+            integer representation (not by its index in the hand).
 
-            if remaining_values:
-                new_highest = remaining_values[-1]
-            else:
-                new_highest = None
-            
-            self.state.highest[played_card.suit] = new_highest
+            Everything that is needed to restore the previous state
+            is saved in history, so that the move can be taken back
+            with undo(): search-based players can explore the game
+            tree on a single Game object.
+        '''
+        self.save()
+        state = self.state
+        player = state.current_player
+
+        # Update the hash for the card leaving the hand and entering
+        # the trick (which starts with its first card)
+        h = state.hash ^ HAND_KEYS[player][card] ^ TRICK_KEYS[len(state.trick)][card] ^ PLAYER_KEYS[player]
+        if not state.trick:
+            h ^= FIRST_PLAYER_KEYS[state.first_player]
+
+        # Remove the card from the current player's hand
+        state.hands[player] ^= 1 << card
+
+        # Put the played card in the trick cards and played cards
+        state.trick.append(card)
+        state.trick_mask |= 1 << card
+        state.played |= 1 << card
+
+        # If the player didn't follow suit, take note of the missing suit
+        led_suit = state.trick[0] // 13
+        if card // 13 != led_suit:
+            state.voids |= 1 << (led_suit * consts.NUM_PLAYERS + player)
 
         # If the trick ended:
         #     - Calculate trick winner and update first and current player
         #     - Update scores
         #     - Empty trick cards
-        #     - Tell players the trick winner
-        if len(self.state.trick_cards) == consts.NUM_PLAYERS:
-            self.state.current_player = get_trick_winner(self.state.first_player, self.state.trick_cards, self.state.trump_suit)
-            self.state.first_player = self.state.current_player
+        if len(state.trick) == consts.NUM_PLAYERS:
+            h ^= FIRST_PLAYER_KEYS[state.first_player]
+            for i, trick_card in enumerate(state.trick):
+                h ^= TRICK_KEYS[i][trick_card]
+
+            state.current_player = trick_winner(state.first_player, state.trick, state.trump)
+            state.first_player = state.current_player
             self.update_scores()
-            self.state.trick_cards = []
-            tell_everyone(self.players, 'Player {} won the trick!'.format(self.state.current_player))
+            state.trick = []
+            state.trick_mask = 0
         # Otherwise, just pass the turn to next player
         else:
-            self.state.current_player = (self.state.current_player + 1) % consts.NUM_PLAYERS
+            state.current_player = (player + 1) % consts.NUM_PLAYERS
+
+        state.hash = h ^ PLAYER_KEYS[state.current_player]
 
         # If all hands are empty, this state is terminal
-        if not any(self.state.hands):
-            self.state.terminal = True
+        if not any(state.hands):
+            state.terminal = True
+
+    def save(self):
+        '''
+            Saves in history every part of the state which can be
+            changed by apply(). The current trick has at most three
+            cards and the scores are four, so this takes constant time.
+        '''
+        state = self.state
+        self.history.append((state.current_player, state.first_player,
+                             state.hands[state.current_player], tuple(state.trick),
+                             state.trick_mask, state.played, state.voids,
+                             tuple(state.scores), state.terminal, state.hash))
+
+    def undo(self):
+        '''
+            Takes back the last move made with apply().
+        '''
+        state = self.state
+        (state.current_player, state.first_player, hand, trick, state.trick_mask,
+         state.played, state.voids, scores, state.terminal, state.hash) = self.history.pop()
+
+        state.hands[state.current_player] = hand
+        state.trick = list(trick)
+        state.scores = list(scores)
 
     def get_playable_actions(self):
+        return actions(self.state.hands[self.state.current_player], self.get_playable_cards())
+
+    def get_playable_cards(self):
         '''
             Default behavior: enforce following suit if possible.
         '''
         hand = self.state.hands[self.state.current_player]
 
-        if not self.state.trick_cards:
-            return [i for i in range(len(hand))]
-
-        same_suit = [hand.index(card) for card in hand if card.suit == self.state.trick_cards[0].suit]
-
-        if not same_suit:
-            return [i for i in range(len(hand))]
+        if self.state.trick:
+            same_suit = hand & SUIT_MASKS[self.state.trick[0] // 13]
+            if same_suit:
+                return same_suit
 
-        return same_suit
+        return hand
 
     def update_scores(self):
-        raise NotImplementedError('[-] This needs to be implemented by your Game class!')
\ No newline at end of file
+        raise NotImplementedError('[-] This needs to be implemented by your Game class!')
@@ -1,10 +1,11 @@
 from game.Game import Game
+from bitboard import popcount
 
 class NoLastTwo(Game):
 
-    def __init__(self, players, first_player, trump_suit=None):
-        super().__init__(players, first_player, trump_suit)
+    def __init__(self, players, first_player, trump_suit=None, bus=None):
+        super().__init__(players, first_player, trump_suit, bus)
 
     def update_scores(self):
-        if len(self.state.played_cards) > 44:
+        if popcount(self.state.played) > 44:
             self.state.scores[self.state.current_player] -= 12
\ No newline at end of file
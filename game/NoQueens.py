@@ -1,14 +1,13 @@
 from game.Game import Game
+from bitboard import QUEENS, popcount
 
 class NoQueens(Game):
 
-    def __init__(self, players, first_player, trump_suit=None):
-        super().__init__(players, first_player, trump_suit)
+    def __init__(self, players, first_player, trump_suit=None, bus=None):
+        super().__init__(players, first_player, trump_suit, bus)
 
     def update_scores(self):
-        for card in self.state.trick_cards:
-            if card.value == 10:
-                self.state.scores[self.state.current_player] -= 6
+        self.state.scores[self.state.current_player] -= 6 * popcount(self.state.trick_mask & QUEENS)
 
-        if len([card for card in self.state.played_cards if card.value == 10]) == 4:
+        if self.state.played & QUEENS == QUEENS:
             self.state.terminal = True
\ No newline at end of file
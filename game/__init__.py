@@ -0,0 +1,17 @@
+'''
+    The contracts of Barbu, one module (and class) per contract.
+'''
+import importlib
+
+# Contract classes by name, imported once
+_game_classes = {}
+
+def get_game_class(name):
+    '''
+        Returns the class of a contract from its name (e.g. 'NoQueens'),
+        importing its module the first time it is needed.
+    '''
+    if name not in _game_classes:
+        _game_classes[name] = getattr(importlib.import_module('game.' + name), name)
+
+    return _game_classes[name]
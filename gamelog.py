@@ -0,0 +1,244 @@
+'''
+    Append-only binary log of the games (deals) played in matches,
+    and a replay engine which rebuilds any State of a logged game
+    without the players.
+
+    The file starts with an 8-byte header, followed by records of
+    variable size, one for every game:
+
+        dealer  uint8      dealer ID (who leads the first trick)
+        game    uint8      game number
+        option  uint8      trump suit (Atout) or starting value (Domino),
+                           NO_OPTION otherwise
+        moves   uint8      number of moves (52, plus the passes in Domino)
+        deal    13 bytes   the seat of every card (in integer order),
+                           2 bits per card, from the low bits
+        moves   bytes      the card played by every move, or PASS
+
+    A record is a fixed 17-byte header (the head and the deal)
+    followed by one byte per move: contracts that end early (e.g.
+    NoQueens, once the last queen is taken) have fewer moves, and
+    Domino has a byte for every pass. A truncated last record (e.g.
+    after a crash) is ignored when reading.
+'''
+import os, time, struct, consts
+from collections import namedtuple
+from Card import Card
+from game import get_game_class
+from game.Game import State
+
+HEADER = b'BRBGAM01'
+RECORD_HEAD = struct.Struct('<4B')
+DEAL_SIZE = consts.DIFFERENT_CARDS // 4
+
+NO_OPTION = 255
+PASS = 255
+
+# Game name -> game number
+GAME_NUMS = {module_name.split('.')[1]: game_num for game_num, module_name in consts.GAMES.items()}
+
+# Byte of a packed deal -> mask of the cards of every seat among its 4 cards
+_DEAL_MASKS = [[sum(1 << i for i in range(4) if byte >> (2 * i) & 3 == seat) for seat in range(consts.NUM_PLAYERS)]
+               for byte in range(256)]
+
+def encode(game, dealer_ID):
+    '''
+        Returns the record of a game played from its start: the moves
+        and the deal are read from its history, which saves the hand of
+        the current player before every move. Going back from the end,
+        the card played by a move is the one it removed from that hand.
+    '''
+    state = game.state
+    hands = list(state.hands)
+    moves = bytearray(len(game.history))
+
+    for i in range(len(game.history) - 1, -1, -1):
+        player, _, hand = game.history[i][:3]
+        card = hand ^ hands[player]
+        moves[i] = card.bit_length() - 1 if card else PASS
+        hands[player] = hand
+
+    if state.game == 'Atout':
+        option = state.trump
+    elif state.game == 'Domino':
+        option = state.starting_value
+    else:
+        option = NO_OPTION
+
+    deal = bytearray(DEAL_SIZE)
+    for seat, hand in enumerate(hands):
+        while hand:
+            low = hand & -hand
+            card = low.bit_length() - 1
+            deal[card >> 2] |= seat << (2 * (card & 3))
+            hand ^= low
+
+    return RECORD_HEAD.pack(dealer_ID, GAME_NUMS[state.game], option, len(moves)) + bytes(deal) + bytes(moves)
+
+class GameRecord(namedtuple('GameRecord', ['dealer', 'game', 'option', 'deal', 'moves'])):
+    '''
+        A record read from a game log. The deal and the moves are
+        kept as bytes, and decoded only when they are needed.
+    '''
+    __slots__ = ()
+
+    @property
+    def game_name(self):
+        return consts.GAMES[self.game].split('.')[1]
+
+    @property
+    def trump_suit(self):
+        return Card.suits[self.option] if self.game_name == 'Atout' else None
+
+    @property
+    def starting_value(self):
+        return self.option if self.game_name == 'Domino' else None
+
+    @property
+    def hands(self):
+        '''
+            The hands dealt to the players, as masks.
+        '''
+        hands = [0 for _ in range(consts.NUM_PLAYERS)]
+        for i, byte in enumerate(self.deal):
+            masks = _DEAL_MASKS[byte]
+            for seat in range(consts.NUM_PLAYERS):
+                hands[seat] |= masks[seat] << (4 * i)
+
+        return hands
+
+    @property
+    def cards(self):
+        '''
+            The moves, as the integer representation
+            of the cards played (-1 for a pass).
+        '''
+        return [-1 if move == PASS else move for move in self.moves]
+
+def decode(data, offset=0):
+    '''
+        Returns the record starting at offset in data, and the offset
+        of the next one, or (None, offset) if the record is incomplete.
+    '''
+    if len(data) - offset < RECORD_HEAD.size:
+        return None, offset
+
+    dealer, game_num, option, num_moves = RECORD_HEAD.unpack_from(data, offset)
+    start = offset + RECORD_HEAD.size
+    end = start + DEAL_SIZE + num_moves
+    if end > len(data):
+        return None, offset
+
+    return GameRecord(dealer, game_num, option, bytes(data[start:start + DEAL_SIZE]), bytes(data[start + DEAL_SIZE:end])), end
+
+def replay(record, num_moves=None):
+    '''
+        Returns a game without players (see Game.from_state) in the
+        state reached after the first num_moves moves of the record
+        (all of them by default). undo() takes moves back from there.
+    '''
+    state = State.from_hands(record.game_name, record.hands, record.dealer, record.trump_suit, record.starting_value)
+    game = get_game_class(record.game_name).from_state(state)
+
+    for card in record.cards[:num_moves]:
+        game.apply(card)
+
+    return game
+
+class GameLog():
+    '''
+        Writes records to the end of a game log, creating it if needed.
+
+        Like ScoreLog (see scorelog.py), writes are buffered and synced
+        to disk at most every sync_interval seconds.
+    '''
+    def __init__(self, path, sync_interval=5.0, buffer_size=1 << 16):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+
+        if not new:
+            # Drop a truncated last record, if any
+            os.truncate(path, valid_size(path))
+
+        self.file = open(path, 'ab', buffering=buffer_size)
+        if new:
+            self.file.write(HEADER)
+
+        self.path = path
+        self.sync_interval = sync_interval
+        self.last_sync = time.monotonic()
+
+    def append(self, records):
+        '''
+            Appends encoded records (see encode), given as bytes.
+        '''
+        self.file.write(records)
+
+        if time.monotonic() - self.last_sync >= self.sync_interval:
+            self.sync()
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.last_sync = time.monotonic()
+
+    def close(self):
+        if not self.file.closed:
+            self.sync()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+def iter_records(path, chunk_size=1 << 20):
+    '''
+        Yields every record of a game log, reading
+        the file in chunks of about chunk_size bytes.
+    '''
+    with open(path, 'rb') as f:
+        if f.read(len(HEADER)) != HEADER:
+            raise ValueError('[-] Not a game log! (path: {})'.format(path))
+
+        data = b''
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+
+            data += chunk
+            offset = 0
+            while True:
+                record, offset = decode(data, offset)
+                if record is None:
+                    break
+
+                yield record
+
+            data = data[offset:]
+
+def valid_size(path):
+    '''
+        Returns the size of a game log without its truncated
+        last record, if any (reading only the record heads).
+    '''
+    with open(path, 'rb') as f:
+        if f.read(len(HEADER)) != HEADER:
+            raise ValueError('[-] Not a game log! (path: {})'.format(path))
+
+        size = os.fstat(f.fileno()).st_size
+        offset = len(HEADER)
+        while offset + RECORD_HEAD.size <= size:
+            f.seek(offset)
+            end = offset + RECORD_HEAD.size + DEAL_SIZE + RECORD_HEAD.unpack(f.read(RECORD_HEAD.size))[3]
+            if end > size:
+                break
+
+            offset = end
+
+        return offset
@@ -0,0 +1,269 @@
+import sys
+
+sys.path.append('..')
+
+import random, consts
+from math import comb
+from operator import sub
+from bisect import bisect_right
+from functools import lru_cache
+from Card import Card
+from bitboard import SUIT_MASKS, iter_cards, cards_to_mask
+
+@lru_cache(maxsize=None)
+def splits(n, holders, players):
+    '''
+        Returns every way of giving n cards of a suit to the holders
+        (indexes among the given number of players), as a list of
+        (allocation, ways): the allocation is a tuple with the number
+        of cards of every player, and ways the number of ways of
+        splitting the n cards accordingly.
+    '''
+    if not holders:
+        return [((0,) * players, 1)] if n == 0 else []
+
+    result = []
+    def allocate(allocation, n, ways, i):
+        if i == len(holders) - 1:
+            allocation[holders[i]] = n
+            result.append((tuple(allocation), ways))
+            allocation[holders[i]] = 0
+            return
+
+        for a in range(n + 1):
+            allocation[holders[i]] = a
+            allocate(allocation, n - a, ways * comb(n, a), i + 1)
+        allocation[holders[i]] = 0
+
+    allocate([0] * players, n, 1, 0)
+    return result
+
+class DealSampler():
+    '''
+        Draws deals of the unseen cards to the other players,
+        uniformly among the deals consistent with what the current
+        player knows: every player gets as many cards as they hold,
+        and no card of the suits they are known to miss.
+
+        Deals are drawn suit by suit. For every suit, the number of
+        its cards that goes to each player (an allocation) is chosen
+        with probability proportional to the number of complete deals
+        it leads to, then the cards of the suit are split at random
+        according to it. The number of deals that complete every
+        partial allocation is counted by dynamic programming over the
+        suits and the room left in every hand (the table of every suit
+        and room is built the first time a deal reaches it), so drawing
+        a deal never needs to start over. The allocations of a suit are
+        shared by all the samplers (see splits).
+
+        If numpy is installed, batches are drawn all together, suit by
+        suit and card by card, with no Python code run for every deal:
+        once the first batch has built every table, deals cost a few
+        microseconds each (about ten times less than with sample),
+        most of it to turn them into lists of integers.
+
+        If no deal is consistent with the missing suits (which never
+        happens with the information recorded by the engine), they
+        are ignored.
+    '''
+    def __init__(self, hand, player_ID, hand_sizes, unseen, missing_suits):
+        self.hand = hand
+        self.player_ID = player_ID
+        self.others = [player for player in range(consts.NUM_PLAYERS) if player != player_ID]
+
+        # Bits of the unseen cards of every suit
+        self.bits = [[1 << card for card in iter_cards(unseen & SUIT_MASKS[s])] for s in range(4)]
+
+        # Indexes (in others) of the players who can hold every suit
+        self.holders = [tuple(i for i, player in enumerate(self.others) if not missing_suits[suit][player])
+                        for suit in Card.suits]
+
+        # Number of unseen cards of every suit and the following ones
+        self.remaining = [sum(len(bits) for bits in self.bits[s:]) for s in range(4)]
+
+        # (suit, room) -> (allocations, cumulative weights), built as they are needed
+        self.tables = {}
+        self.room = tuple(hand_sizes[player] for player in self.others)
+
+        # The tables as numpy arrays, built for the first batch
+        self.arrays = None
+
+        if not self.count(0, self.room):
+            self.holders = [tuple(range(len(self.others))) for _ in range(4)]
+            self.tables = {}
+            if not self.count(0, self.room):
+                raise ValueError('[-] The unseen cards cannot be dealt to the other players!')
+
+    @classmethod
+    def from_state(cls, state, hand):
+        '''
+            Creates the sampler of the current player of a PlayerState,
+            whose hand (a list of cards) is given.
+        '''
+        return cls(cards_to_mask(hand), state.current_player, state.hand_sizes, state.unseen, state.missing_suits)
+
+    def count(self, s, room):
+        '''
+            Returns the number of ways of dealing the unseen cards of
+            suits s, s+1, ... when the other players have the given
+            room left in their hands.
+
+            If the same players can hold all these suits, the cards can
+            be dealt as if they were of a single suit: the ways of
+            dealing them are counted at once, with no table.
+        '''
+        if s == 4:
+            return 0 if any(room) else 1
+
+        holders = self.holders[s]
+        if all(self.holders[t] == holders for t in range(s + 1, 4)):
+            n = self.remaining[s]
+            if sum(room) != n or any(r and i not in holders for i, r in enumerate(room)):
+                return 0
+
+            ways = 1
+            for r in room:
+                ways *= comb(n, r)
+                n -= r
+
+            return ways
+
+        cum_weights = self.table(s, room)[1]
+        return cum_weights[-1] if cum_weights else 0
+
+    def table(self, s, room):
+        '''
+            Returns the allocations of the cards of suit s which can
+            be completed into a deal when the other players have the
+            given room left, and their cumulative weights (the number
+            of deals they lead to).
+        '''
+        key = (s, room)
+        if key not in self.tables and s == 3:
+            # The last suit fills the room left
+            ways = self.count(s, room)
+            self.tables[key] = ([room], [ways]) if ways else ([], [])
+
+        if key not in self.tables:
+            allocations = []
+            cum_weights = []
+            total = 0
+            for allocation, ways in splits(len(self.bits[s]), self.holders[s], len(room)):
+                left = tuple(map(sub, room, allocation))
+                if min(left) < 0:
+                    continue
+
+                weight = self.count(s + 1, left)
+                if weight:
+                    total += weight * ways
+                    allocations.append(allocation)
+                    cum_weights.append(total)
+
+            self.tables[key] = (allocations, cum_weights)
+
+        return self.tables[key]
+
+    def sample(self):
+        '''
+            Returns the hands of all players (as masks).
+        '''
+        hands = [0 for _ in range(consts.NUM_PLAYERS)]
+        hands[self.player_ID] = self.hand
+
+        room = self.room
+        for s in range(4):
+            allocations, cum_weights = self.table(s, room)
+            if len(allocations) == 1:
+                allocation = allocations[0]
+            else:
+                allocation = allocations[bisect_right(cum_weights, random.random() * cum_weights[-1])]
+
+            bits = self.bits[s]
+            if len(bits) > 1:
+                bits = random.sample(bits, len(bits))
+            start = 0
+            for player, a in zip(self.others, allocation):
+                if a:
+                    hands[player] |= sum(bits[start:start + a])
+                    start += a
+
+            room = tuple(r - a for r, a in zip(room, allocation))
+
+        return hands
+
+    def build_arrays(self, np):
+        '''
+            Returns, for every suit, the arrays used to draw batches:
+            the cumulative probabilities of the allocations of every
+            room that can be left before the suit (numbered from 0),
+            each offset by the number of its room, the allocations,
+            the number of the room they leave, and the bits of the
+            unseen cards of the suit.
+        '''
+        numbers = [{self.room: 0}, {}, {}, {}, {}]
+        arrays = []
+        for s in range(4):
+            keys = []
+            allocations = []
+            nexts = []
+            for room, i in list(numbers[s].items()):
+                table_allocations, cum_weights = self.table(s, room)
+                for allocation, weight in zip(table_allocations, cum_weights):
+                    left = tuple(map(sub, room, allocation))
+                    keys.append(i + weight / cum_weights[-1])
+                    allocations.append(allocation)
+                    nexts.append(numbers[s + 1].setdefault(left, len(numbers[s + 1])))
+
+            arrays.append((np.array(keys), np.array(allocations, dtype=np.int64).reshape(-1, len(self.others)),
+                           np.array(nexts, dtype=np.int64), [np.uint64(bit) for bit in self.bits[s]]))
+
+        return arrays
+
+    def batch(self, size):
+        '''
+            Returns a list of size deals.
+        '''
+        try:
+            import numpy as np
+        except ImportError:
+            return [self.sample() for _ in range(size)]
+
+        if self.arrays is None:
+            self.arrays = self.build_arrays(np)
+
+        # Seeded from random, so that random.seed() repeats the batches
+        rng = np.random.default_rng(random.getrandbits(64))
+
+        # The hands of the other players, one row for every player
+        others = np.zeros((len(self.others), size), dtype=np.uint64)
+        indexes = np.arange(len(self.others))[:, None]
+
+        rooms = np.zeros(size, dtype=np.int64)
+        for keys, allocations, nexts, bits in self.arrays:
+            # The allocation of every deal, among those of its room
+            chosen = np.searchsorted(keys, rooms + rng.random(size), side='right')
+            counts = allocations[chosen]
+
+            # Every card goes to a player with probability proportional
+            # to the number of cards of the suit they still have to get
+            quotas = counts.T.copy()
+            for j, bit in enumerate(bits):
+                draws = rng.random(size) * (len(bits) - j)
+                players = (draws >= quotas.cumsum(axis=0)[:-1]).sum(axis=0)
+                gets = players == indexes
+                others |= gets * bit
+                quotas -= gets
+
+            rooms = nexts[chosen]
+
+        hands = np.zeros((size, consts.NUM_PLAYERS), dtype=np.uint64)
+        hands[:, self.player_ID] = self.hand
+        hands[:, self.others] = others.T
+        return hands.tolist()
+
+    def __iter__(self):
+        '''
+            Yields deals forever, drawing them in batches.
+        '''
+        while True:
+            yield from self.batch(256)
@@ -1,34 +1,53 @@
-import os, consts
+import os, queue, threading, consts
 from player.Player import HumanPlayer
 from utils import is_valid_int
 from Card import Card
+from sprites import CardImages
 from tkinter import *
 from tkinter.simpledialog import askstring
-from PIL import ImageTk, Image
 from random import shuffle
-from time import sleep
 
 class GUIHumanPlayer(HumanPlayer):
     '''
         A human player that can play interactively
         and select actions via Graphical User Interface.
+
+        The window belongs to the thread that creates the player, which
+        runs the Tk event loop, while the match is played on a worker
+        thread (see run()). The methods called by the engine never touch
+        the widgets: they send commands to the GUI through a queue, which
+        the event loop polls. Notifications return at once, and only the
+        choices of the human player wait for an answer.
+
+        Pauses (at the end of a trick, or of Domino) are scheduled
+        with after(): the commands received in the meantime are held
+        back until the pause is over, but neither the window nor the
+        other players wait for it.
     '''
-    APP_NAME   = 'barbu-python'
-    IMG_DIR    = 'img'
-    LEFT_BG    = '#369f4d'
-    RIGHT_BG   = '#096c1f'
-    INFO_LINES = 20
+    APP_NAME     = 'barbu-python'
+    IMG_DIR      = 'img'
+    LEFT_BG      = '#369f4d'
+    RIGHT_BG     = '#096c1f'
+    INFO_LINES   = 20
+    POLL_MS      = 20
+    TRICK_DELAY  = 1000
+    DOMINO_DELAY = 3000
 
     def __init__(self, ID, name=""):
         super().__init__(ID, name)
 
+        # Commands sent by the engine, run by the event loop in order
+        self.commands = queue.Queue()
+        self.paused = False
+
+        self.thread = threading.current_thread()
         self.window = Tk()
         self.window.title(GUIHumanPlayer.APP_NAME)
         self.window.geometry('1050x600')
 
-        # self.card_images is a dictionary associating each Card
-        # to its corresponding ImageTk.PhotoImage.
-        self.card_images = self.load_images()
+        # self.card_images maps each Card to its PhotoImage,
+        # cut out of the sprite atlas the first time it is shown.
+        self.card_images = CardImages(self.window, GUIHumanPlayer.IMG_DIR)
 
         # Create main containers
         self.left_up = Frame(self.window, bg=GUIHumanPlayer.LEFT_BG)
@@ -84,7 +103,7 @@ class GUIHumanPlayer(HumanPlayer):
         y = -85
         for i, n in enumerate(domino_order):
             card = Card.int_to_card(n)
-            label = Label(self.left_up, bg=GUIHumanPlayer.LEFT_BG, image=self.card_images[card])
+            label = Label(self.left_up, bg=GUIHumanPlayer.LEFT_BG)
             x += 49
             if i % 13 == 0:
                 x  = 35
@@ -111,13 +130,90 @@ class GUIHumanPlayer(HumanPlayer):
         self.player_e_label.place(x=530, y=200)
         self.player_s_label.place(x=340, y=360)
 
-        self.refresh()
+        self.window.after(GUIHumanPlayer.POLL_MS, self.poll)
+
+    def run(self, target):
+        '''
+            Runs target (e.g. a match) on a worker thread, and the
+            event loop until the window is closed.
+        '''
+        worker = threading.Thread(target=target, daemon=True)
+        worker.start()
+        self.window.mainloop()
 
     def get_next_game(self):
-        self.show_hand(self.hand)
-        self.refresh()
-        
         available_games = [game_num for game_num, played in self.played_games.items() if not played]
+        return self.ask(self.choose_game, list(self.hand), available_games)
+
+    def get_trump_suit(self):
+        return self.ask(self.choose_trump_suit)
+
+    def get_starting_value(self):
+        return self.ask(self.choose_starting_value)
+
+    def get_next_action(self, state):
+        assert state.hands[state.current_player] == self.hand, '[-] Player {}\'s hand differs from their hand in the received state!'.format(self.ID)
+
+        hand = list(state.hands[state.current_player])
+
+        if state.playable_actions == [-1]:
+            self.send(self.show_hand, hand)
+            return -1
+
+        return self.ask(self.choose_card, hand, state)
+
+    def tell(self, string):
+        self.send(self.show_message, string)
+
+    def notify_card(self, ID, card):
+        self.send(self.show_card, ID, card)
+
+    def send(self, command, *args):
+        '''
+            Sends a command to the GUI, without waiting for it.
+        '''
+        self.commands.put((command, args))
+
+    def ask(self, command, *args):
+        '''
+            Sends a command to the GUI, and waits for the answer
+            it passes to its first argument (a callback).
+        '''
+        assert threading.current_thread() is not self.thread, '[-] The match must be played on a worker thread (see GUIHumanPlayer.run)!'
+
+        answer = queue.Queue()
+        self.send(command, answer.put, *args)
+        return answer.get()
+
+    def poll(self):
+        '''
+            Runs the commands received so far, unless a pause
+            is in progress, and polls again later.
+        '''
+        while not self.paused:
+            try:
+                command, args = self.commands.get_nowait()
+            except queue.Empty:
+                break
+
+            command(*args)
+
+        self.window.after(GUIHumanPlayer.POLL_MS, self.poll)
+
+    def pause(self, delay, then):
+        '''
+            Holds the commands back for delay milliseconds,
+            then calls then() and resumes.
+        '''
+        def resume():
+            then()
+            self.paused = False
+
+        self.paused = True
+        self.window.after(delay, resume)
+
+    def choose_game(self, answer, hand, available_games):
+        self.show_hand(hand)
 
         s = 'Choose game:\n'
         for i in available_games:
@@ -127,9 +223,9 @@ class GUIHumanPlayer(HumanPlayer):
         while not is_valid_int(game) or int(game) not in available_games:
             game = askstring(GUIHumanPlayer.APP_NAME, s)
 
-        return int(game)
+        answer(int(game))
 
-    def get_trump_suit(self):
+    def choose_trump_suit(self, answer):
         s = 'Choose trump suit:\n'
         for i in range(len(Card.suits)):
             s += '    {}: {}\n'.format(i, Card.suits[i])
@@ -138,35 +234,42 @@ class GUIHumanPlayer(HumanPlayer):
         while not is_valid_int(suit) or int(suit) not in range(len(Card.suits)):
             suit = askstring(GUIHumanPlayer.APP_NAME, s)
 
-        return Card.suits[int(suit)]
+        answer(Card.suits[int(suit)])
 
-    def get_starting_value(self):
+    def choose_starting_value(self, answer):
         s = 'Choose starting value (two: 0, ace: 12):'
 
         starting_value = None
         while not is_valid_int(starting_value) or int(starting_value) not in range(13):
             starting_value = askstring(GUIHumanPlayer.APP_NAME, s)
 
-        return int(starting_value)
+        answer(int(starting_value))
 
-    def get_next_action(self, state):
-        assert state.hands[state.current_player] == self.hand, '[-] Player {}\'s hand differs from their hand in the received state!'.format(self.ID)
-
-        hand = state.hands[state.current_player]
+    def choose_card(self, answer, hand, state):
         self.show_hand(hand)
 
-        if state.playable_actions == [-1]:
-            self.refresh()
-            return -1
+        func_ids = []
 
-        # Create integer variable
-        action = IntVar()
+        def select(action):
+            for i, func_id in zip(state.playable_actions, func_ids):
+                # Remove action bindings
+                self.card_labels[i].unbind('<Button-1>', func_id)
+
+                # Put the cards back down
+                if self.card_labels[i].place_info():
+                    x = int(self.card_labels[i].place_info()['x'])
+                    y = int(self.card_labels[i].place_info()['y'])
+                    self.card_labels[i].place(x=x, y=y+10)
+
+            # Remove image from card label in hand
+            self.card_labels[action].place_forget()
+
+            answer(action)
 
-        func_ids = []
         for i in state.playable_actions:
-            # Bind actions to playable cards that set the
-            # action variable to the corresponding value
-            func_id = self.card_labels[i].bind('<Button-1>', (lambda x: lambda _: action.set(x))(i)) # lambda closure
+            # Bind actions to playable cards that
+            # select the corresponding action
+            func_id = self.card_labels[i].bind('<Button-1>', (lambda x: lambda _: select(x))(i)) # lambda closure
             func_ids.append(func_id)
 
             # Highlight playable cards by moving them up 10px
@@ -182,29 +285,6 @@ class GUIHumanPlayer(HumanPlayer):
         self.score2_label.configure(text='Player {}: {} points'.format(2, state.scores[2]))
         self.score3_label.configure(text='Player {}: {} points'.format(3, state.scores[3]))
 
-        self.refresh()
-
-        # Wait for user action
-        self.left_down.wait_variable(action)
-        action = action.get()
-
-        for i, func_id in zip(state.playable_actions, func_ids):
-            # Remove action bindings
-            self.card_labels[i].unbind('<Button-1>', func_id)
-
-            # Put the cards back down
-            if self.card_labels[i].place_info():
-                x = int(self.card_labels[i].place_info()['x'])
-                y = int(self.card_labels[i].place_info()['y'])
-                self.card_labels[i].place(x=x, y=y+10)
-
-        # Remove image from card label in hand
-        self.card_labels[action].place_forget()
-
-        self.refresh()
-
-        return action
-
     def begin_domino(self):
         self.domino = True
         self.player_n_label.place_forget()
@@ -223,7 +303,7 @@ class GUIHumanPlayer(HumanPlayer):
         self.player_e_label.place(x=530, y=200)
         self.player_s_label.place(x=340, y=360)
 
-    def tell(self, string):
+    def show_message(self, string):
         if 'Domino' in string:
             self.begin_domino()
 
@@ -235,31 +315,28 @@ class GUIHumanPlayer(HumanPlayer):
         lines.append(string)
         
         self.info_label.configure(text='\n'.join(lines))
-        self.refresh()
 
-    def notify_card(self, ID, card):
+    def show_card(self, ID, card):
         if self.domino:
             lxy = self.domino_labels[card]
 
+            lxy['label'].configure(image=self.card_images[card])
             lxy['label'].place(x=lxy['x'], y=lxy['y'])
             
             if all([lxy['label'].place_info() for lxy in self.domino_labels.values()]):
-                sleep(3) # fix this
-                self.end_domino()
+                self.pause(GUIHumanPlayer.DOMINO_DELAY, self.end_domino)
             
-            self.refresh()
             return
 
         self.seats[ID].configure(image=self.card_images[card])
-        self.refresh()
 
         # If trick ended
         if all([label.cget('image') != '' for label in self.seats.values()]):
-            sleep(1) # fix this
-            for label in self.seats.values():
-                label.configure(image='')
+            self.pause(GUIHumanPlayer.TRICK_DELAY, self.clear_trick)
 
-        self.refresh()
+    def clear_trick(self):
+        for label in self.seats.values():
+            label.configure(image='')
 
     def show_hand(self, hand):
         x = 35
@@ -270,18 +347,4 @@ class GUIHumanPlayer(HumanPlayer):
                 self.card_labels[i].place(x=x, y=y)
                 x += 49
             else:
-                self.card_labels[i].place_forget()
-
-    def load_images(self):
-        images = {}
-
-        for i in range(consts.DIFFERENT_CARDS):
-            card = Card.int_to_card(i)
-            img = ImageTk.PhotoImage(Image.open('{}/{}.png'.format(GUIHumanPlayer.IMG_DIR, i)))
-            images[card] = img
-
-        return images
-
-    def refresh(self):
-        self.window.update_idletasks()
-        self.window.update()
\ No newline at end of file
+                self.card_labels[i].place_forget()
\ No newline at end of file
@@ -6,6 +6,60 @@ import random, consts
 from copy import deepcopy
 from player.Player import Player
 from Card import Card, Deck, get_winning_card
+from bitboard import SUIT_MASKS, HEARTS, KING_OF_HEARTS, QUEENS, popcount, highest, lowest, iter_cards, position, cards_to_mask
+
+# Cards whose value has bit i set, for every bit of a value
+VALUE_BITS = [sum(1 << card for card in range(consts.DIFFERENT_CARDS) if card % 13 >> i & 1) for i in range(4)]
+
+KING_OF_HEARTS_CARD = highest(KING_OF_HEARTS)
+
+ACES = sum(1 << (suit * 13 + 12) for suit in range(4))
+
+# Cards of every suit with values lower than every value
+LOWER_VALUES = [sum(((1 << value) - 1) << (suit * 13) for suit in range(4)) for value in range(14)]
+
+def highest_value(mask):
+    '''
+        Returns the card of the mask with the highest value (of the
+        first suit if several), or -1 if the mask is empty.
+    '''
+    best = -1
+    for suit_mask in SUIT_MASKS:
+        card = highest(mask & suit_mask)
+        if card > -1 and (best == -1 or card % 13 > best % 13):
+            best = card
+
+    return best
+
+def lowest_value(mask):
+    '''
+        Returns the card of the mask with the lowest value (of the
+        first suit if several), or -1 if the mask is empty.
+    '''
+    best = -1
+    for suit_mask in SUIT_MASKS:
+        card = lowest(mask & suit_mask)
+        if card > -1 and (best == -1 or card % 13 < best % 13):
+            best = card
+
+    return best
+
+def values_mask(suit, low, high):
+    '''
+        Returns the mask of the cards of
+        the suit with values in [low, high).
+    '''
+    if high <= low:
+        return 0
+
+    return ((1 << high) - (1 << low)) << (suit * 13)
+
+def sum_values(mask):
+    '''
+        Returns the sum of the values of the cards of the
+        mask, from the number of cards with every bit set.
+    '''
+    return popcount(mask & VALUE_BITS[0]) + 2 * popcount(mask & VALUE_BITS[1]) + 4 * popcount(mask & VALUE_BITS[2]) + 8 * popcount(mask & VALUE_BITS[3])
 
 def rescale(value, old_low, old_high, new_low, new_high):
     return int(round(((value-old_low)*(new_high-new_low)/(old_high-old_low)) + new_low))
@@ -21,30 +75,30 @@ class HeuristicPlayer(Player):
 
     def get_next_game(self):
         available_games = [game_num for game_num, played in self.played_games.items() if not played]
-        heuristics = list(map(self.calculate_heuristic, available_games))
+        hand = cards_to_mask(self.hand)
+        heuristics = [self.calculate_heuristic(game_num, hand) for game_num in available_games]
         return available_games[heuristics.index(max(heuristics))]
 
     def get_trump_suit(self):
         # Divide cards in different suits and get sum of values
-        suit_values = [sum([card.value for card in self.hand if card.suit == '♥']),
-                       sum([card.value for card in self.hand if card.suit == '♦']),
-                       sum([card.value for card in self.hand if card.suit == '♣']),
-                       sum([card.value for card in self.hand if card.suit == '♠'])]
+        hand = cards_to_mask(self.hand)
+        suit_values = [sum_values(hand & suit_mask) for suit_mask in SUIT_MASKS]
 
         # Return suit corresponding to highest sum of values
         return Card.suits[suit_values.index(max(suit_values))]
 
     def get_starting_value(self):
         # Calculate spread for every card value
+        hand = cards_to_mask(self.hand)
         spread_values = []
         for value in range(13):
-            spread_values.append(self.calculate_spread(value, low_ace=True))
+            spread_values.append(self.calculate_spread(value, low_ace=True, hand=hand))
 
         # Return value corresponding to lowest spread
         return spread_values.index(min(spread_values))
 
     def get_next_action(self, state):
-        assert state.hands[state.current_player] == self.hand, '[-] Player {}\'s hand differs from their hand in the received state!\n{}\n{}'.format(self.ID, self.hand, state.hands[state.current_player])
+        assert state.hand_mask == cards_to_mask(self.hand), '[-] Player {}\'s hand differs from their hand in the received state!\n{}\n{}'.format(self.ID, self.hand, state.hands[state.current_player])
 
         if state.game == 'Atout':
             return self.get_next_action_atout(state)
@@ -80,44 +134,41 @@ class HeuristicPlayer(Player):
             - if we don't:
                 - play the lowest trump, or the lowest card otherwise.
         '''
-        state = self.fix_missing(state)
+        hand = state.hand_mask
+        tops = self.tops(state)
+        trump = Card.suits.index(state.trump_suit) if state.trump_suit else None
 
         if not state.trick_cards:
             # Leading
-            highest_trump = [card for card in self.hand if card.suit == state.trump_suit and self.is_highest(state, card)]
-            if highest_trump:
-                return self.hand.index(highest_trump[0])
-            
-            highest_non_trumps = [card for card in self.hand if card.suit != state.trump_suit and self.is_highest(state, card)]
-            for card in highest_non_trumps:
-                other_players = [i for i in range(consts.NUM_PLAYERS) if i != self.ID]
-                if not state.trump_suit or (state.trump_suit and not any([state.missing_suits[card.suit][player] for player in other_players])):
-                    return self.hand.index(card)
-            
+            if trump is not None and hand & tops & SUIT_MASKS[trump]:
+                return position(hand, highest(hand & tops & SUIT_MASKS[trump]))
+
+            highest_non_trumps = hand & tops & ~(SUIT_MASKS[trump] if trump is not None else 0)
+            for card in iter_cards(highest_non_trumps):
+                if trump is None or not self.anyone_missing(state, Card.suits[card // 13]):
+                    return position(hand, card)
+
             if not highest_non_trumps:
-                non_trumps = [card for card in self.hand if card.suit != state.trump_suit]
+                non_trumps = hand & ~(SUIT_MASKS[trump] if trump is not None else 0)
                 if non_trumps:
-                    lowest_non_trump = min(non_trumps, key=lambda x: x.value)
-                    return self.hand.index(lowest_non_trump)
+                    return position(hand, lowest_value(non_trumps))
+
+            return position(hand, lowest_value(hand))
 
-            return self.play_lowest(self.hand)
-                
         else:
             # Non-leading
-            same_suit = [card for card in self.hand if card.suit == state.trick_cards[0].suit]
+            same_suit = hand & SUIT_MASKS[int(state.trick_cards[0]) // 13]
             if same_suit:
-                suit = state.trick_cards[0].suit
-                highest_card = Card(suit, state.highest[suit])
-                if highest_card in same_suit:
-                    return self.hand.index(highest_card)
+                if same_suit & tops:
+                    return position(hand, highest(same_suit & tops))
                 else:
-                    return self.play_lowest(same_suit)
+                    return position(hand, lowest(same_suit))
             else:
-                sorted_trumps = sorted([card for card in self.hand if card.suit == state.trump_suit], key=lambda x: x.value)
-                if sorted_trumps:
-                    return self.hand.index(sorted_trumps[0])
+                trumps = hand & SUIT_MASKS[trump] if trump is not None else 0
+                if trumps:
+                    return position(hand, lowest(trumps))
                 else:
-                    return self.play_lowest(self.hand)
+                    return position(hand, lowest_value(hand))
 
     def get_next_action_notricks(self, state):
         '''
@@ -134,41 +185,25 @@ class HeuristicPlayer(Player):
             - if we don't:
                 - play the highest card we have.
         '''
-        state = self.fix_missing(state)
+        hand = state.hand_mask
+        tops = self.tops(state)
 
         if not state.trick_cards:
             # Leading
-            other_players = [i for i in range(consts.NUM_PLAYERS) if i != self.ID]
-            valid_suits = []
-            for suit in Card.suits:
-                suit_cards = [card for card in self.hand if card.suit == suit]
-                if suit_cards:
-                    if not all([state.missing_suits[suit][player] for player in other_players]) and \
-                       not self.is_highest(state, min(suit_cards, key=lambda x: x.value)):
-                        valid_suits.append(suit)
-
-            if valid_suits:
-                lowest_card = min([card for card in self.hand if card.suit == valid_suits[0]], key=lambda x: x.value)
-                return self.hand.index(lowest_card)
-            
-            return self.play_lowest(self.hand)
-        
+            for s, suit in enumerate(Card.suits):
+                suit_cards = hand & SUIT_MASKS[s]
+                if suit_cards and not self.everyone_missing(state, suit) and not tops >> lowest(suit_cards) & 1:
+                    return position(hand, lowest(suit_cards))
+
+            return position(hand, lowest_value(hand))
+
         else:
             # Non-leading
-            same_suit = [card for card in self.hand if card.suit == state.trick_cards[0].suit]
-            if same_suit:
-                winning_card = get_winning_card(state.trick_cards)
-                lower_same_suit = [card for card in same_suit if card.value < winning_card.value]
-                if lower_same_suit:
-                    return self.play_highest(lower_same_suit)    
-                else:
-                    not_highest = [card for card in same_suit if card.value < state.highest[same_suit[0].suit]]
-                    if not_highest:
-                        return self.play_highest(not_highest)
-                    else:
-                        return self.play_highest(same_suit)
-            
-            return self.play_highest(self.hand)
+            card = self.follow_lower(state, hand, tops)
+            if card > -1:
+                return position(hand, card)
+
+            return position(hand, highest_value(hand))
 
     def get_next_action_nohearts(self, state):
         '''
@@ -188,48 +223,22 @@ class HeuristicPlayer(Player):
                 - if we don't:
                     - play the highest hearts we have, otherwise the highest card we have.
         '''
-        state = self.fix_missing(state)
+        hand = state.hand_mask
 
         if not state.trick_cards:
             # Leading
-            if all([card.suit == '♥' for card in self.hand]):
-                return self.play_lowest(self.hand)
-
-            diamonds = [card for card in self.hand if card.suit == '♦']
-            clubs = [card for card in self.hand if card.suit == '♣']
-            spades = [card for card in self.hand if card.suit == '♠']
-
-            suits = list(filter(lambda x: len(x) != 0, [diamonds, clubs, spades]))
-            lengths = list(map(len, suits))
-            shortest_suit = suits[lengths.index(min(lengths))]
-
-            other_players = [i for i in range(consts.NUM_PLAYERS) if i != self.ID]
-            if not any([state.missing_suits[shortest_suit[0].suit][player] for player in other_players]) and \
-               sum([1 for card in state.played_cards if card.suit == shortest_suit[0].suit]) < 8:
-                return self.play_highest(shortest_suit)
-            else:
-                return self.play_lowest(shortest_suit)
+            return position(hand, self.lead_shortest(state, hand))
 
         else:
             # Non-leading
-            same_suit = [card for card in self.hand if card.suit == state.trick_cards[0].suit]
-            if same_suit:
-                winning_card = get_winning_card(state.trick_cards)
-                lower_same_suit = [card for card in same_suit if card.value < winning_card.value]
-                if lower_same_suit:
-                    return self.play_highest(lower_same_suit)
-                else:
-                    not_highest = [card for card in same_suit if card.value < state.highest[same_suit[0].suit]]
-                    if not_highest:
-                        return self.play_highest(not_highest)
-                    else:
-                        return self.play_highest(same_suit)
-            
-            hearts = [card for card in self.hand if card.suit == '♥']
-            if hearts:
-                return self.play_highest(hearts)
+            card = self.follow_lower(state, hand, self.tops(state))
+            if card > -1:
+                return position(hand, card)
+
+            if hand & HEARTS:
+                return position(hand, highest(hand & HEARTS))
 
-            return self.play_highest(self.hand)
+            return position(hand, highest_value(hand))
 
     def get_next_action_nokingofhearts(self, state):
         '''
@@ -249,48 +258,22 @@ class HeuristicPlayer(Player):
                 - if we don't:
                     - play the K♥ if possible, otherwise the highest card we have.
         '''
-        state = self.fix_missing(state)
+        hand = state.hand_mask
 
         if not state.trick_cards:
             # Leading
-            if all([card.suit == '♥' for card in self.hand]):
-                return self.play_lowest(self.hand)
-
-            diamonds = [card for card in self.hand if card.suit == '♦']
-            clubs = [card for card in self.hand if card.suit == '♣']
-            spades = [card for card in self.hand if card.suit == '♠']
-
-            suits = list(filter(lambda x: len(x) != 0, [diamonds, clubs, spades]))
-            lengths = list(map(len, suits))
-            shortest_suit = suits[lengths.index(min(lengths))]
-
-            other_players = [i for i in range(consts.NUM_PLAYERS) if i != self.ID]
-            if not any([state.missing_suits[shortest_suit[0].suit][player] for player in other_players]) and \
-               sum([1 for card in state.played_cards if card.suit == shortest_suit[0].suit]) < 8:
-                return self.play_highest(shortest_suit)
-            else:
-                return self.play_lowest(shortest_suit)
+            return position(hand, self.lead_shortest(state, hand))
 
         else:
             # Non-leading
-            same_suit = [card for card in self.hand if card.suit == state.trick_cards[0].suit]
-            if same_suit:
-                winning_card = get_winning_card(state.trick_cards)
-                lower_same_suit = [card for card in same_suit if card.value < winning_card.value]
-                if lower_same_suit:
-                    return self.play_highest(lower_same_suit)   
-                else:
-                    not_highest = [card for card in same_suit if card.value < state.highest[same_suit[0].suit]]
-                    if not_highest:
-                        return self.play_highest(not_highest) 
-                    else:
-                        return self.play_highest(same_suit)
-            
-            king_of_hearts = Card('Hearts', 'K')
-            if king_of_hearts in self.hand:
-                return self.hand.index(king_of_hearts)
+            card = self.follow_lower(state, hand, self.tops(state))
+            if card > -1:
+                return position(hand, card)
+
+            if hand & KING_OF_HEARTS:
+                return position(hand, KING_OF_HEARTS_CARD)
 
-            return self.play_highest(self.hand)
+            return position(hand, highest_value(hand))
 
     def get_next_action_nolasttwo(self, state):
         '''
@@ -307,58 +290,55 @@ class HeuristicPlayer(Player):
                 - if we don't:
                     - play highest
         '''
-        state = self.fix_missing(state)
-        other_players = [i for i in range(consts.NUM_PLAYERS) if i != self.ID]
+        hand = state.hand_mask
+        tops = self.tops(state)
 
-        if len(self.hand) == 2:
+        if popcount(hand) == 2:
             # Special case of last two tricks
             if not state.trick_cards:
                 # Leading
-                ok_cards = []
-                for card in self.hand:
-                    if not all([state.missing_suits[card.suit][player] for player in other_players]) and \
-                       not self.is_highest(state, card):
-                        ok_cards.append(card)
+                ok_cards = 0
+                for s, suit in enumerate(Card.suits):
+                    if hand & SUIT_MASKS[s] and not self.everyone_missing(state, suit):
+                        ok_cards |= hand & SUIT_MASKS[s] & ~tops
 
                 if ok_cards:
-                    return self.play_lowest(ok_cards)
+                    return position(hand, lowest_value(ok_cards))
 
-                return self.play_lowest(self.hand)
+                return position(hand, lowest_value(hand))
             else:
                 # Non-leading
-                same_suit = [card for card in self.hand if card.suit == state.trick_cards[0].suit]
+                same_suit = hand & SUIT_MASKS[int(state.trick_cards[0]) // 13]
                 if same_suit:
-                    return self.play_lowest(same_suit)
+                    return position(hand, lowest(same_suit))
                 else:
-                    return self.play_lowest(self.hand)
+                    return position(hand, lowest_value(hand))
 
         if not state.trick_cards:
             # Leading
-            highest_cards = [card for card in self.hand if self.is_highest(state, card)]
+            highest_cards = hand & tops
             if highest_cards:
-                longest_suit = [card for card in self.hand if card.suit == highest_cards[0].suit]
-                for hc in highest_cards:
-                    suit_cards = [card for card in self.hand if card.suit == hc.suit]
-                    if len(suit_cards) > len(longest_suit):
-                        longest_suit = [card for card in self.hand if card.suit == hc.suit]
+                longest_suit = 0
+                for card in iter_cards(highest_cards):
+                    suit_cards = hand & SUIT_MASKS[card // 13]
+                    if popcount(suit_cards) > popcount(longest_suit):
+                        longest_suit = suit_cards
 
-                return self.play_highest(longest_suit)
+                return position(hand, highest(longest_suit))
 
-            for suit in Card.suits:
-                if all([state.missing_suits[suit][player] for player in other_players]):
-                    suit_cards = [card for card in self.hand if card.suit == suit]
-                    if suit_cards:
-                        return self.play_highest(suit_cards)
+            for s, suit in enumerate(Card.suits):
+                if self.everyone_missing(state, suit) and hand & SUIT_MASKS[s]:
+                    return position(hand, highest(hand & SUIT_MASKS[s]))
 
-            return self.play_highest(self.hand)
+            return position(hand, highest_value(hand))
 
         else:
             # Non-leading
-            same_suit = [card for card in self.hand if card.suit == state.trick_cards[0].suit]
+            same_suit = hand & SUIT_MASKS[int(state.trick_cards[0]) // 13]
             if same_suit:
-                return self.play_highest(same_suit)
+                return position(hand, highest(same_suit))
             else:
-                return self.play_highest(self.hand)
+                return position(hand, highest_value(hand))
 
     def get_next_action_noqueens(self, state):
         '''
@@ -376,60 +356,49 @@ class HeuristicPlayer(Player):
                 - if we don't:
                     - play queen if possible, otherwise the highest card we have.
         '''
-        state = self.fix_missing(state)
+        hand = state.hand_mask
 
         if not state.trick_cards:
-            hearts = [card for card in self.hand if card.suit == '♥']
-            diamonds = [card for card in self.hand if card.suit == '♦']
-            clubs = [card for card in self.hand if card.suit == '♣']
-            spades = [card for card in self.hand if card.suit == '♠']
-
-            def queenless(suit):
-                return len(suit) > 0 and not any([card.value == 10 for card in suit])
-
-            queenless_suits = list(filter(queenless, [hearts, diamonds, clubs, spades]))
-            if queenless_suits:
-                queenless_shortest = sorted(queenless_suits, key=len)
-
-                for qs in queenless_shortest:
-                    other_players = [i for i in range(consts.NUM_PLAYERS) if i != self.ID]
-                    if not any([state.missing_suits[qs[0].suit][player] for player in other_players]) and \
-                       sum([1 for card in state.played_cards if card.suit == qs[0].suit]) < 8:
-                        filtered = list(filter(lambda x: x.value < 10, qs))
-                        if filtered:
-                            return self.play_highest(filtered)
-                
-            return self.play_lowest(self.hand)
+            # Shortest suits first (in suit order for the same length)
+            queenless_suits = sorted((s for s in range(4) if hand & SUIT_MASKS[s] and not hand & SUIT_MASKS[s] & QUEENS),
+                                     key=lambda s: popcount(hand & SUIT_MASKS[s]))
+
+            for s in queenless_suits:
+                suit = Card.suits[s]
+                if not self.anyone_missing(state, suit) and state.played_counts[suit] < 8:
+                    filtered = hand & values_mask(s, 0, 10)
+                    if filtered:
+                        return position(hand, highest(filtered))
+
+            return position(hand, lowest_value(hand))
 
         else:
             # Non-leading
-            same_suit = [card for card in self.hand if card.suit == state.trick_cards[0].suit]
+            led_suit = int(state.trick_cards[0]) // 13
+            same_suit = hand & SUIT_MASKS[led_suit]
             if same_suit:
-                winning_card = get_winning_card(state.trick_cards)
-                lower_same_suit = [card for card in same_suit if card.value < winning_card.value]
+                lower_same_suit = same_suit & values_mask(led_suit, 0, get_winning_card(state.trick_cards).value)
                 if lower_same_suit:
-                    queen_lower = [card for card in lower_same_suit if card.value == 10]
-                    if queen_lower:
-                        return self.hand.index(queen_lower[0])
+                    if lower_same_suit & QUEENS:
+                        return position(hand, highest(lower_same_suit & QUEENS))
 
-                    return self.play_highest(lower_same_suit)
+                    return position(hand, highest(lower_same_suit))
                 else:
-                    not_highest_or_qka = [card for card in same_suit if card.value < state.highest[same_suit[0].suit] and card.value < 10]
+                    not_highest_or_qka = same_suit & ~self.tops(state) & values_mask(led_suit, 0, 10)
                     if not_highest_or_qka:
-                        return self.play_highest(not_highest_or_qka)
+                        return position(hand, highest(not_highest_or_qka))
                     else:
-                        no_queen = [card for card in same_suit if card.value != 10]
+                        no_queen = same_suit & ~QUEENS
                         if no_queen:
-                            return self.play_highest(no_queen)
+                            return position(hand, highest(no_queen))
 
-                return self.play_highest(same_suit)
+                return position(hand, highest(same_suit))
 
             else:
-                queens = [card for card in self.hand if card.value == 10]
-                if queens:
-                    return self.play_highest(queens)
+                if hand & QUEENS:
+                    return position(hand, lowest(hand & QUEENS))
 
-            return self.play_highest(self.hand)
+            return position(hand, highest_value(hand))
 
     def get_next_action_domino(self, state):
         '''
@@ -441,6 +410,8 @@ class HeuristicPlayer(Player):
         if state.playable_actions == [-1]:
             return -1
 
+        hand = state.hand_mask
+        played = state.played_mask
         playable_cards = [self.hand[i] for i in state.playable_actions]
 
         kings_aces = []
@@ -451,11 +422,11 @@ class HeuristicPlayer(Player):
 
         priority_list = []
         for pc in playable_cards:
-            played_suit = state.played_cards[pc.suit]
+            suit = int(pc) // 13
             if pc.value != 0 and pc.value != 12 and \
-               ((Card(pc.suit, pc.value + 1) in played_suit and not any([Card(pc.suit, value) in self.hand for value in range(pc.value)])) \
-               or (Card(pc.suit, pc.value - 1) in played_suit and not any([Card(pc.suit, value) in self.hand for value in range(pc.value + 1, 11)]))):
-               
+               ((played >> (int(pc) + 1) & 1 and not hand & values_mask(suit, 0, pc.value)) \
+               or (played >> (int(pc) - 1) & 1 and not hand & values_mask(suit, pc.value + 1, 11))):
+
                 priority_list.append(pc)
             else:
                 priority_list = [pc] + priority_list
@@ -464,34 +435,41 @@ class HeuristicPlayer(Player):
 
         return self.hand.index(priority_list[0])
 
-    def calculate_spread(self, pivot, low_ace=False):
+    def calculate_spread(self, pivot, low_ace=False, hand=None):
+        '''
+            Returns the sum of the distances between the
+            values of the cards of the hand and the pivot.
+        '''
+        if hand is None:
+            hand = cards_to_mask(self.hand)
+
+        # Fix ace value
         spread = 0
-        for card in self.hand:
-            # Fix ace value
-            if low_ace and card.value == 12:
-                current_value = -1
-            else:
-                current_value = card.value
+        if low_ace:
+            spread += popcount(hand & ACES) * (pivot + 1)
+            hand &= ~ACES
 
-            # Calculate spread
-            spread += abs(pivot - current_value)
+        # Cards lower than the pivot, then higher
+        lower = hand & LOWER_VALUES[pivot]
+        higher = hand & ~lower
+        spread += pivot * popcount(lower) - sum_values(lower)
+        spread += sum_values(higher) - pivot * popcount(higher)
 
-        return int(spread)
+        return spread
+
+    def calculate_heuristic(self, game_num, hand=None):
+        if hand is None:
+            hand = cards_to_mask(self.hand)
 
-    def calculate_heuristic(self, game_num):
         if game_num == 0:
             # Atout
-            return sum([card.value for card in self.hand])
+            return sum_values(hand)
         if game_num == 1:
             # NoTricks
-            return 165 - sum([card.value for card in self.hand])
+            return 165 - sum_values(hand)
         if game_num == 2:
             # NoHearts
-            diamonds = [card for card in self.hand if card.suit == '♦']
-            clubs = [card for card in self.hand if card.suit == '♣']
-            spades = [card for card in self.hand if card.suit == '♠']
-            
-            l = [len(diamonds), len(clubs), len(spades)]
+            l = [popcount(hand & SUIT_MASKS[s]) for s in range(1, 4)]
             spread = max(l) - min(l)
             
             if spread > 5:
@@ -501,46 +479,75 @@ class HeuristicPlayer(Player):
         if game_num == 3:
             # NoKingOfHearts
             # TODO: Improve else case
-            return 141 if Card('Hearts', 'K') in self.hand else 24
+            return 141 if hand & KING_OF_HEARTS else 24
         if game_num == 4:
             #NoLastTwo
-            spread = self.calculate_spread(6)
+            spread = self.calculate_spread(6, hand=hand)
             return rescale(spread, 10, 73, 24, 141)
         if game_num == 5:
             # NoQueens
-            hearts_values = [card.value for card in self.hand if card.suit == '♥']
-            diamonds_values = [card.value for card in self.hand if card.suit == '♦']
-            clubs_values = [card.value for card in self.hand if card.suit == '♣']
-            spades_values = [card.value for card in self.hand if card.suit == '♠']
-
-            is_bad_suit = lambda suit_values: 10 in suit_values and not any([i in suit_values for i in range(10)])
-            bad_suits = sum(list(map(is_bad_suit, [hearts_values, diamonds_values, clubs_values, spades_values])))
+            bad_suits = sum(1 for s in range(4) if hand & SUIT_MASKS[s] & QUEENS and not hand & values_mask(s, 0, 10))
 
             # TODO: improve else case
             return 24 if bad_suits else 140
         if game_num == 6:
             # Domino
-            spread = [self.calculate_spread(value, low_ace=True) for value in range(13)]
+            spread = [self.calculate_spread(value, low_ace=True, hand=hand) for value in range(13)]
             return rescale(min(spread), 10, 73, 24, 141)
 
-    def fix_missing(self, state):
-        other_players = [i for i in range(consts.NUM_PLAYERS) if i != self.ID]
-        for suit in Card.suits:
-            if sum([1 for card in state.played_cards if card.suit == suit]) + sum([1 for card in self.hand if card.suit == suit]) == 13:
-                for player in other_players:
-                    state.missing_suits[suit][player] = True
+    def tops(self, state):
+        '''
+            Returns the mask of the highest card
+            not played yet of every suit.
+        '''
+        tops = 0
+        for suit_mask in SUIT_MASKS:
+            card = highest(suit_mask & ~state.played_mask)
+            if card > -1:
+                tops |= 1 << card
+
+        return tops
+
+    def anyone_missing(self, state, suit):
+        return any([state.missing_suits[suit][player] for player in range(consts.NUM_PLAYERS) if player != self.ID])
 
-        return state
+    def everyone_missing(self, state, suit):
+        return all([state.missing_suits[suit][player] for player in range(consts.NUM_PLAYERS) if player != self.ID])
 
-    def is_highest(self, state, card):
-        for suit, value in state.highest.items():
-            if card.suit == suit and card.value == value:
-                return True
+    def lead_shortest(self, state, hand):
+        '''
+            Returns the card to lead in NoHearts and NoKingOfHearts.
+        '''
+        if not hand & ~HEARTS:
+            return lowest(hand)
+
+        suits = [s for s in range(1, 4) if hand & SUIT_MASKS[s]]
+        shortest_suit = min(suits, key=lambda s: popcount(hand & SUIT_MASKS[s]))
+        suit_cards = hand & SUIT_MASKS[shortest_suit]
+
+        suit = Card.suits[shortest_suit]
+        if not self.anyone_missing(state, suit) and state.played_counts[suit] < 8:
+            return highest(suit_cards)
+        else:
+            return lowest(suit_cards)
+
+    def follow_lower(self, state, hand, tops):
+        '''
+            Returns the card of the led suit to play without winning
+            the trick if possible (-1 if we have none): the highest card
+            lower than the winning one, otherwise the highest card that
+            is not the highest of the suit, otherwise the highest card.
+        '''
+        led_suit = int(state.trick_cards[0]) // 13
+        same_suit = hand & SUIT_MASKS[led_suit]
+        if not same_suit:
+            return -1
 
-        return False
+        lower_same_suit = same_suit & values_mask(led_suit, 0, get_winning_card(state.trick_cards).value)
+        if lower_same_suit:
+            return highest(lower_same_suit)
 
-    def play_highest(self, cards):
-        return self.hand.index(max(cards, key=lambda x: x.value))
+        if same_suit & ~tops:
+            return highest(same_suit & ~tops)
 
-    def play_lowest(self, cards):
-        return self.hand.index(min(cards, key=lambda x: x.value))
\ No newline at end of file
+        return highest(same_suit)
\ No newline at end of file
@@ -1,11 +1,482 @@
-from player.Player import Player
+import sys
 
-class MCPlayer(Player):
+sys.path.append('..')
+
+import math, time, random, multiprocessing, tablebase, consts
+from player.HeuristicPlayer import HeuristicPlayer
+from player.DealSampler import DealSampler
+from game import get_game_class
+from game.Game import State
+from Card import Card
+from bitboard import FULL_DECK, popcount, iter_cards, cards_to_mask
+
+class Node():
+    '''
+        A node of the search tree, reached by playing card
+        (-1 for a pass in Domino) as player.
+
+        Reward is the sum of the rewards of player over the
+        visits of the node, and availability counts how many times
+        the node could have been chosen when its parent was visited.
+    '''
+    __slots__ = ('card', 'player', 'parent', 'children', 'visits', 'reward', 'availability')
+
+    def __init__(self, card=None, player=None, parent=None):
+        self.card = card
+        self.player = player
+        self.parent = parent
+        self.children = {}
+        self.visits = 0
+        self.reward = 0.0
+        self.availability = 0
+
+    def ucb(self, exploration):
+        return self.reward / self.visits + exploration * math.sqrt(math.log(self.availability) / self.visits)
+
+class MCPlayer(HeuristicPlayer):
     '''
         A player that makes use of MCTS (Monte Carlo Tree Search)
         and UCT (Upper Confidence Bound applied to Trees) algorithms
         for action selection.
 
+        The cards of the other players are hidden, so the search is
+        an Information Set MCTS: every iteration guesses the hidden
+        cards (a determinization drawn by a DealSampler), then descends
+        a single tree, shared by all the determinizations, choosing only
+        among the cards that are playable in the current one. Playouts
+        are random.
+
+        The tree is kept between moves: every card played (received
+        through notify_card) moves the root to the corresponding child,
+        so the next search continues from the statistics gathered so
+        far. At most max_nodes nodes are created for a tree: then the
+        search stops expanding it, and the next move starts a new one.
+
+        Playouts stop at the start of the last tricks if the contract
+        has a tablebase (see tablebase.py), which gives the points every
+        player makes when all of them play their best cards (the
+        outcome values). Tablebases is a dictionary mapping the
+        name of every contract to its tablebase; by default, the
+        tablebases in the default directory are used, if any.
+
+        Every move is searched until time_budget seconds have passed
+        or iterations iterations have been run, whichever comes first
+        (either can be None, but not both), and the most visited
+        action is played.
+
+        With more than one worker, the search is root-parallel: the
+        player and workers - 1 worker processes search their own trees
+        at the same time, on their own determinizations, and the visits
+        of the actions are summed over all trees. The iterations are
+        split among the trees. Worker processes are started by the
+        first search and reused until close() is called. They keep
+        their trees between moves too: the cards played in the
+        meantime are sent to them with the next search.
+
+        The game, the trump suit and the starting value are chosen by
+        simulation: every available contract (with every trump suit in
+        Atout and every starting value in Domino) is played out with
+        random cards on the same deals of the unseen cards, and the one
+        with the best average score for the player is chosen. Deals are
+        played within contract_budget seconds and until contract_rollouts
+        deals have been played (either can be None, but not both), in
+        this process and in the worker processes at the same time.
+    '''
+    def __init__(self, ID, name='', time_budget=1.0, iterations=None, exploration=0.7, workers=1, max_nodes=1000000, tablebases=None, contract_budget=1.0, contract_rollouts=None):
+        assert time_budget is not None or iterations is not None, '[-] Please give a time budget or a number of iterations!'
+        assert contract_budget is not None or contract_rollouts is not None, '[-] Please give a time budget or a number of rollouts for the contracts!'
+        super().__init__(ID, name)
+        self.time_budget = time_budget
+        self.iterations = iterations
+        self.exploration = exploration
+        self.workers = workers
+        self.max_nodes = max_nodes
+        self.tablebases = tablebases if tablebases is not None else tablebase.load()
+        self.contract_budget = contract_budget
+        self.contract_rollouts = contract_rollouts
+
+        # Average score of every (game number, trump suit or starting
+        # value) simulated for the last hand, and the hand (a mask)
+        self.contract_values = {}
+        self.contract_hand = None
+
+        # The tree to continue from, the game and the cards played
+        # at its root, and the number of nodes created for it
+        self.root = None
+        self.game = None
+        self.played = 0
+        self.num_nodes = 0
+
+        # Connections to the worker processes, the processes
+        # and the cards played since they last searched
+        self.connections = []
+        self.processes = []
+        self.moves = []
+
+        # Totals over all searches, for iterations_per_second()
+        self.total_iterations = 0
+        self.total_time = 0.0
+
+    def get_next_game(self):
+        available_games = [game_num for game_num, played in self.played_games.items() if not played]
+        values = self.evaluate_contracts(available_games)
+        return max(values, key=values.get)[0]
+
+    def get_trump_suit(self):
+        return self.best_option(list(consts.GAMES.values()).index('game.Atout'))
+
+    def get_starting_value(self):
+        return self.best_option(list(consts.GAMES.values()).index('game.Domino'))
+
+    def best_option(self, game_num):
+        '''
+            Returns the trump suit or the starting value with the best
+            average score in the given contract, simulating it only if
+            get_next_game did not already do it for the current hand.
+        '''
+        if self.contract_hand != cards_to_mask(self.hand) or not any(num == game_num for num, _ in self.contract_values):
+            self.evaluate_contracts([game_num])
+
+        options = {option: value for (num, option), value in self.contract_values.items() if num == game_num}
+        return max(options, key=options.get)
+
+    def evaluate_contracts(self, game_nums):
+        '''
+            Simulates the given contracts (with every trump suit or
+            starting value) with the player as dealer, and returns the
+            average score of the player for every (game number, trump
+            suit or starting value).
+        '''
+        hand = cards_to_mask(self.hand)
+
+        candidates = []
+        for game_num in game_nums:
+            if consts.GAMES[game_num] == 'game.Atout':
+                candidates += [(game_num, suit) for suit in Card.suits]
+            elif consts.GAMES[game_num] == 'game.Domino':
+                candidates += [(game_num, value) for value in range(13)]
+            else:
+                candidates.append((game_num, None))
+
+        rollouts = self.contract_rollouts
+        if self.workers > 1:
+            if not self.processes:
+                self.start_workers()
+
+            # Split the rollouts among the processes
+            if rollouts is not None:
+                rollouts = -(-rollouts // self.workers)
+
+            for connection in self.connections:
+                connection.send(('contracts', hand, self.ID, candidates, self.contract_budget, rollouts))
+
+        totals, deals = simulate_contracts(hand, self.ID, candidates, self.contract_budget, rollouts, self.tablebases)
+
+        for connection in self.connections:
+            worker_totals, worker_deals = connection.recv()
+            totals = [total + worker_total for total, worker_total in zip(totals, worker_totals)]
+            deals += worker_deals
+
+        self.contract_values = {candidate: total / deals for candidate, total in zip(candidates, totals)}
+        self.contract_hand = hand
+
+        return self.contract_values
+
+    def get_next_action(self, state):
+        assert state.hands[state.current_player] == self.hand, '[-] Player {}\'s hand differs from their hand in the received state!\n{}\n{}'.format(self.ID, self.hand, state.hands[state.current_player])
+
+        # Nothing to search
+        if len(state.playable_actions) == 1:
+            return state.playable_actions[0]
+
+        if self.workers > 1:
+            visits = self.parallel_search(state)
+        else:
+            root = self.search(state, self.iterations)
+            visits = {card: child.visits for card, child in root.children.items()}
+
+        # Play the most visited card
+        card = max(visits, key=visits.get)
+        return self.hand.index(Card.int_to_card(card)) if card > -1 else -1
+
+    def notify_card(self, ID, card):
+        self.advance(ID, int(card))
+
+        if self.processes:
+            self.moves.append((ID, int(card)))
+
+    def advance(self, ID, card):
+        '''
+            Moves the root of the tree to the child reached when
+            player ID plays card, dropping the rest of the tree.
+            Passes (in Domino) are not notified, so the root first
+            moves through passes until it finds the card.
+        '''
+        self.played |= 1 << card
+
+        node = self.root
+        while node is not None and (card not in node.children or node.children[card].player != ID):
+            node = node.children.get(-1)
+
+        self.root = node.children[card] if node is not None else None
+        if self.root is not None:
+            self.root.parent = None
+
+    def parallel_search(self, state):
+        '''
+            Searches the given state in this process and in the worker
+            processes, and returns the visits of every action summed
+            over all trees.
+        '''
+        if not self.processes:
+            self.start_workers()
+
+        # Split the iterations among the trees
+        iterations = -(-self.iterations // self.workers) if self.iterations is not None else None
+
+        start = time.perf_counter()
+        total_time = self.total_time
+        for connection in self.connections:
+            connection.send(('search', state, self.hand, iterations, self.moves))
+
+        self.moves = []
+
+        root = self.search(state, iterations)
+        visits = {card: child.visits for card, child in root.children.items()}
+
+        for connection in self.connections:
+            worker_visits, worker_iterations = connection.recv()
+            for card, count in worker_visits.items():
+                visits[card] = visits.get(card, 0) + count
+
+            self.total_iterations += worker_iterations
+
+        # Searches overlap, so count the time to decision once
+        self.total_time = total_time + time.perf_counter() - start
+
+        return visits
+
+    def start_workers(self):
+        for _ in range(self.workers - 1):
+            connection, worker_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=search_worker, args=(worker_connection, self.time_budget, self.iterations, self.exploration, self.tablebases), daemon=True)
+            process.start()
+            self.connections.append(connection)
+            self.processes.append(process)
+
+    def close(self):
+        '''
+            Stops the worker processes.
+        '''
+        for connection in self.connections:
+            connection.send(None)
+
+        for process in self.processes:
+            process.join()
+
+        self.connections = []
+        self.processes = []
+
+    def search(self, state, iterations):
+        '''
+            Runs the search from the given state, within the time
+            budget and the given number of iterations (None for no
+            limit), and returns the root.
+        '''
+        root = self.get_root(state)
+        game = get_game_class(state.game).from_state(None)
+
+        sampler = DealSampler.from_state(state, self.hand)
+
+        start = time.perf_counter()
+        deadline = start + self.time_budget if self.time_budget is not None else math.inf
+        done = 0
+
+        while (iterations is None or done < iterations) and (done == 0 or time.perf_counter() < deadline):
+            game.state = state.to_state(sampler.sample())
+            game.history = []
+            self.iterate(root, game)
+            done += 1
+
+        self.total_iterations += done
+        self.total_time += time.perf_counter() - start
+
+        return root
+
+    def get_root(self, state):
+        '''
+            Returns the root to search the given state from: the
+            root of the kept tree if it was reached by the same cards,
+            a new root otherwise.
+        '''
+        played = FULL_DECK & ~state.unseen & ~cards_to_mask(self.hand)
+
+        root = self.root
+        if root is None or state.game != self.game or played != self.played or self.num_nodes >= self.max_nodes:
+            root = Node()
+            self.num_nodes = 1
+
+        # Skip the passes made before this move (Domino)
+        while root.children and next(iter(root.children.values())).player != state.current_player:
+            root = root.children.get(-1) or Node()
+            root.parent = None
+
+        self.root = root
+        self.game = state.game
+        self.played = played
+
+        return root
+
+    def iterate(self, root, game):
+        '''
+            Runs one iteration (selection, expansion, playout and
+            backpropagation) on the determinized state of game.
+        '''
+        state = game.state
+        node = root
+
+        # Selection and expansion
+        while not state.terminal:
+            playable = list(iter_cards(game.get_playable_cards())) or [-1]
+
+            untried = []
+            for card in playable:
+                child = node.children.get(card)
+                if child is None:
+                    untried.append(card)
+                else:
+                    child.availability += 1
+
+            if untried:
+                if self.num_nodes < self.max_nodes:
+                    card = random.choice(untried)
+                    child = Node(card, state.current_player, node)
+                    child.availability = 1
+                    node.children[card] = child
+                    self.num_nodes += 1
+                    game.apply(card)
+                    node = child
+                break
+
+            node = max((node.children[card] for card in playable), key=lambda child: child.ucb(self.exploration))
+            game.apply(node.card)
+
+        # Playout
+        rewards = get_rewards(playout(game, self.tablebases.get(state.game)))
+        while node is not root:
+            node.visits += 1
+            node.reward += rewards[node.player]
+            node = node.parent
+
+        root.visits += 1
+
+    def iterations_per_second(self):
+        '''
+            Average speed of the searches run so far.
+        '''
+        return self.total_iterations / self.total_time if self.total_time else 0.0
+
+def playout(game, table=None):
     '''
-    def __init__(self, ID, name=''):
-        super().__init__(ID, name)
\ No newline at end of file
+        Plays random cards until the end of the game, or until the
+        given tablebase has the values of the state, and returns
+        the final scores.
+    '''
+    state = game.state
+    while not state.terminal:
+        if table is not None and not state.trick:
+            values = table.outcome(state)
+            if values is not None:
+                return [score + value for score, value in zip(state.scores, values)]
+
+        game.apply(random.choice(list(iter_cards(game.get_playable_cards())) or [-1]))
+
+    return state.scores
+
+def simulate_contracts(hand, player_ID, candidates, time_budget, rollouts, tablebases, clock=time.perf_counter):
+    '''
+        Plays out the candidate contracts, as (game number, trump suit
+        or starting value), with player_ID as dealer holding hand (a
+        mask), on the same random deals of the other cards, within the
+        time budget and until rollouts deals have been played (either
+        can be None, but not both). Time is read from clock (in seconds).
+
+        Returns the total score of player_ID in every candidate,
+        and the number of deals.
+    '''
+    start = clock()
+    deadline = start + time_budget if time_budget is not None else math.inf
+
+    hand_sizes = [popcount(hand) for _ in range(consts.NUM_PLAYERS)]
+    missing_suits = {suit: [False for _ in range(consts.NUM_PLAYERS)] for suit in Card.suits}
+    sampler = DealSampler(hand, player_ID, hand_sizes, FULL_DECK & ~hand, missing_suits)
+
+    games = []
+    for game_num, option in candidates:
+        game_name = consts.GAMES[game_num].split('.')[1]
+        trump_suit = option if game_name == 'Atout' else None
+        starting_value = option if game_name == 'Domino' else None
+        games.append((get_game_class(game_name).from_state(None), game_name, trump_suit, starting_value))
+
+    totals = [0 for _ in candidates]
+    deals = 0
+
+    # A deal is started only if it can end before the deadline,
+    # taking as long as the longest deal played so far
+    now = clock()
+    longest = 0.0
+    while (rollouts is None or deals < rollouts) and (deals == 0 or now + longest < deadline):
+        hands = sampler.sample()
+        for i, (game, game_name, trump_suit, starting_value) in enumerate(games):
+            game.state = State.from_hands(game_name, hands, player_ID, trump_suit, starting_value)
+            game.history = []
+            totals[i] += playout(game, tablebases.get(game_name))[player_ID]
+
+        deals += 1
+        end = clock()
+        longest = max(longest, end - now)
+        now = end
+
+    return totals, deals
+
+def get_rewards(scores):
+    '''
+        Rescales the final scores of a game to [-1, 1]. The sum of
+        the absolute scores is constant for every game, so this keeps
+        the differences between players.
+    '''
+    total = sum(abs(score) for score in scores) or 1
+    return [score / total for score in scores]
+
+def search_worker(connection, time_budget, iterations, exploration, tablebases):
+    '''
+        Main loop of a worker process of a root-parallel search:
+        receives ('search', state, hand, iterations, moves), follows
+        the moves (the cards played since the last search) down its
+        tree, searches the state and sends back the visits of every
+        action and the number of iterations, until it receives None.
+
+        It also simulates contracts for the dealer: receives ('contracts',
+        hand, player_ID, candidates, time budget, rollouts) and sends back
+        the result of simulate_contracts.
+    '''
+    # Forked workers would otherwise share the random state
+    random.seed()
+
+    player = MCPlayer(ID=None, time_budget=time_budget, iterations=iterations, exploration=exploration, tablebases=tablebases)
+    while True:
+        request = connection.recv()
+        if request is None:
+            break
+
+        if request[0] == 'contracts':
+            connection.send(simulate_contracts(*request[1:], tablebases))
+            continue
+
+        _, state, player.hand, iterations, moves = request
+        for ID, card in moves:
+            player.advance(ID, card)
+
+        total_iterations = player.total_iterations
+        root = player.search(state, iterations)
+        connection.send(({card: child.visits for card, child in root.children.items()}, player.total_iterations - total_iterations))
@@ -1,6 +1,7 @@
 import random, consts
 from utils import int_input
 from Card import Card
+from events import Message, CardPlayed
 
 class Player():
 
@@ -30,6 +31,20 @@ class Player():
         # To avoid checking for HumanPlayer every time
         return
 
+    def subscribe(self, bus):
+        '''
+            Subscribes the player to the events they care about.
+
+            Messages and played cards are delivered only to players
+            that override tell() and notify_card() respectively, so
+            nothing is built for players that would ignore them.
+        '''
+        if type(self).tell is not Player.tell:
+            bus.subscribe(Message, lambda event: self.tell(event.text))
+
+        if type(self).notify_card is not Player.notify_card:
+            bus.subscribe(CardPlayed, lambda event: self.notify_card(event.player, event.card))
+
     def reset(self):
         self.hand  = []
         self.played_games = {game_num: False for game_num in range(consts.NUM_GAMES)}
@@ -0,0 +1,114 @@
+'''
+    Append-only binary log of simulation results.
+
+    The file starts with an 8-byte header, followed by fixed-size
+    records of 11 bytes:
+
+        kind    int8     MATCH or CONTRACT
+        game    int8     game number (CONTRACT only, -1 otherwise)
+        dealer  int8     dealer ID (CONTRACT only, -1 otherwise)
+        scores  4*int16  scores of the four players (little-endian)
+
+    A MATCH record holds the total scores of a match. If contracts are
+    logged too, the CONTRACT records of a match precede its MATCH record.
+
+    A truncated last record (e.g. after a crash) is ignored when reading.
+'''
+import os, time, struct
+
+HEADER = b'BRBSCR01'
+RECORD = struct.Struct('<bbb4h')
+
+MATCH = 0
+CONTRACT = 1
+
+class ScoreLog():
+    '''
+        Writes records to the end of a score log, creating it if needed.
+
+        Writes are buffered, and the file is flushed and synced to disk
+        at most every sync_interval seconds, so a crash loses at most
+        the last few seconds of results.
+    '''
+    def __init__(self, path, contracts=False, sync_interval=5.0, buffer_size=1 << 16):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+
+        if not new:
+            with open(path, 'rb') as f:
+                if f.read(len(HEADER)) != HEADER:
+                    raise ValueError('[-] Not a score log! (path: {})'.format(path))
+
+            # Drop a truncated last record, if any
+            os.truncate(path, len(HEADER) + num_records(path) * RECORD.size)
+
+        self.file = open(path, 'ab', buffering=buffer_size)
+        if new:
+            self.file.write(HEADER)
+
+        self.path = path
+        self.contracts = contracts
+        self.sync_interval = sync_interval
+        self.last_sync = time.monotonic()
+
+    def append(self, scores, contracts=()):
+        '''
+            Appends the total scores of a match and, if this log
+            records contracts, the scores of its contracts, given
+            as a list of (dealer ID, game number, scores).
+        '''
+        if self.contracts:
+            for dealer_ID, game_num, game_scores in contracts:
+                self.file.write(RECORD.pack(CONTRACT, game_num, dealer_ID, *game_scores))
+
+        self.file.write(RECORD.pack(MATCH, -1, -1, *scores))
+
+        if time.monotonic() - self.last_sync >= self.sync_interval:
+            self.sync()
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.last_sync = time.monotonic()
+
+    def close(self):
+        if not self.file.closed:
+            self.sync()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+def num_records(path):
+    return (os.path.getsize(path) - len(HEADER)) // RECORD.size
+
+def iter_chunks(path, chunk_records=1 << 16):
+    '''
+        Yields the records of a score log as bytes objects
+        of at most chunk_records whole records each.
+    '''
+    with open(path, 'rb') as f:
+        if f.read(len(HEADER)) != HEADER:
+            raise ValueError('[-] Not a score log! (path: {})'.format(path))
+
+        while True:
+            chunk = f.read(chunk_records * RECORD.size)
+            chunk = chunk[:len(chunk) // RECORD.size * RECORD.size]
+            if not chunk:
+                break
+
+            yield chunk
+
+def iter_records(path, chunk_records=1 << 16):
+    '''
+        Yields every record of a score log as a tuple
+        (kind, game, dealer, score0, score1, score2, score3).
+    '''
+    for chunk in iter_chunks(path, chunk_records):
+        yield from RECORD.iter_unpack(chunk)
@@ -0,0 +1,180 @@
+'''
+    Simulation of matches between computer players, optionally spread
+    across a pool of worker processes.
+
+    Every worker creates its own instances of the players and seeds
+    its own random number generator, so workers never share state.
+
+    In duplicate mode, every result comes from a replay group: the
+    cards of a match are generated once from a seed, then the match is
+    played four times, rotating the players through all the seats.
+    The luck of the cards cancels out, so fewer matches are needed to
+    compare players.
+'''
+import random, signal, multiprocessing, consts
+from collections import deque, namedtuple
+from itertools import count
+from Card import CARDS
+import Barbu
+
+# Result of a simulated match: its total scores, the list of
+# (dealer ID, game number, game scores) of its games, the
+# number of moves played and, if recorded, the records of
+# its games (see gamelog.py) as bytes
+MatchResult = namedtuple('MatchResult', ['scores', 'contracts', 'moves', 'records'], defaults=(b'',))
+
+# Players of the current (worker) process: in duplicate mode,
+# one list of players for every rotation
+_players = None
+
+def init_worker(player_types, seed, worker_counter, duplicate=False):
+    '''
+        Initializes a worker process: creates its players and seeds
+        its random number generator with a stream of its own.
+
+        If seed is None, every worker is seeded from the OS.
+        Otherwise, the stream of worker i is derived from (seed, i).
+    '''
+    global _players
+
+    # The parent process handles Ctrl-C
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    # Every worker takes the next ID from the shared counter
+    with worker_counter.get_lock():
+        worker_ID = worker_counter.value
+        worker_counter.value += 1
+
+    random.seed(None if seed is None else '{}:{}'.format(seed, worker_ID))
+
+    _players = create_players(player_types, duplicate)
+
+def create_players(player_types, duplicate=False):
+    '''
+        Creates the players of the given types, with ID equal to their
+        seat. In duplicate mode, returns one list of players for every
+        rotation r, in which player i of the lineup sits at seat i + r.
+    '''
+    if not duplicate:
+        return [player_type(ID=i) for i, player_type in enumerate(player_types)]
+
+    return [[player_types[(seat - r) % consts.NUM_PLAYERS](ID=seat) for seat in range(consts.NUM_PLAYERS)]
+            for r in range(consts.NUM_PLAYERS)]
+
+def generate_deals(seed):
+    '''
+        Returns the first dealer and the cards of every
+        game of a match, generated from the seed.
+    '''
+    rng = random.Random(seed)
+    dealer_ID = rng.randrange(consts.NUM_PLAYERS)
+
+    deals = []
+    for _ in range(consts.NUM_PLAYERS * consts.NUM_GAMES):
+        cards = list(CARDS)
+        rng.shuffle(cards)
+        deals.append(cards)
+
+    return dealer_ID, deals
+
+def play_match(players, record=False):
+    barbu = Barbu.Barbu(players, record)
+    scores = barbu.play()
+    return MatchResult(scores, barbu.contracts, barbu.moves, b''.join(barbu.records) if record else b'')
+
+def play_duplicate(rotations, seed, record=False):
+    '''
+        Plays the replay group generated from the seed.
+
+        Scores and contracts are given for the players of the lineup
+        (not for the seats), summed over the four rotations. Since every
+        match is zero-sum, the score of a player of the lineup is its
+        difference from the average of the group.
+    '''
+    dealer_ID, deals = generate_deals(seed)
+
+    scores = [0 for _ in range(consts.NUM_PLAYERS)]
+    contracts = []
+    moves = 0
+    records = []
+
+    for r, players in enumerate(rotations):
+        barbu = Barbu.Barbu(players, record)
+        seat_scores = barbu.play(dealer_ID, deals)
+
+        # Player i of the lineup sits at seat i + r
+        seats = [(i + r) % consts.NUM_PLAYERS for i in range(consts.NUM_PLAYERS)]
+
+        for i, seat in enumerate(seats):
+            scores[i] += seat_scores[seat]
+
+        for dealer, game_num, game_scores in barbu.contracts:
+            contracts.append(((dealer - r) % consts.NUM_PLAYERS, game_num, [game_scores[seat] for seat in seats]))
+
+        moves += barbu.moves
+        if record:
+            records += barbu.records
+
+    return MatchResult(scores, contracts, moves, b''.join(records))
+
+def play_matches(num, duplicate=False, record=False):
+    if duplicate:
+        return [play_duplicate(_players, random.getrandbits(64), record) for _ in range(num)]
+
+    return [play_match(_players, record) for _ in range(num)]
+
+def simulate(player_types, workers=1, matches=None, seed=None, batch_size=10, duplicate=False, record=False):
+    '''
+        Yields a MatchResult for every simulated match, until matches
+        have been played (forever if matches is None).
+
+        player_types is the list of the classes of the players, which
+        are created with ID equal to their index in the list.
+
+        In duplicate mode, every result is a replay group (see
+        play_duplicate), and matches counts replay groups.
+
+        If record, every result holds the records of its games, with
+        the seats of the cards as dealt (so, in duplicate mode, the
+        records of the four rotations).
+
+        With more than one worker, matches are played in batches of
+        batch_size by a pool of worker processes, and their results
+        are yielded in the order in which batches were submitted.
+    '''
+    if workers <= 1:
+        random.seed(seed)
+        players = create_players(player_types, duplicate)
+        for _ in (count() if matches is None else range(matches)):
+            if duplicate:
+                yield play_duplicate(players, random.getrandbits(64), record)
+            else:
+                yield play_match(players, record)
+        return
+
+    worker_counter = multiprocessing.Value('i', 0)
+    pool = multiprocessing.Pool(workers, initializer=init_worker, initargs=(player_types, seed, worker_counter, duplicate))
+
+    try:
+        remaining = matches
+        pending = deque()
+
+        def submit():
+            nonlocal remaining
+            num = batch_size if remaining is None else min(batch_size, remaining)
+            if num > 0:
+                pending.append(pool.apply_async(play_matches, (num, duplicate, record)))
+                if remaining is not None:
+                    remaining -= num
+
+        # Keep two batches per worker in flight
+        for _ in range(2 * workers):
+            submit()
+
+        while pending:
+            batch = pending.popleft().get()
+            submit()
+            yield from batch
+    finally:
+        pool.terminate()
+        pool.join()
@@ -0,0 +1,290 @@
+'''
+    Double-dummy solver: exact search of a State in which
+    all four hands are known.
+
+    Barbu is not a two-sided game, so the search is paranoid: the
+    solved player maximizes their own score, while the other three
+    players are assumed to play together against them. The value of
+    a State for a player is the best final score they can guarantee.
+
+    The search is alpha-beta on the engine (apply() and undo() of
+    the contract), driven by zero-window searches (MTD(f)), with:
+
+        - a transposition table (see transposition.py) of the positions
+          at the start of a trick (every position, in Domino), with the
+          bounds found for them and their best card, which is searched
+          first when they are met again, so repeated subtrees are
+          searched once. Domino positions are keyed by their Zobrist
+          hash; the others by the relative ranks of the remaining cards,
+          so positions that differ only by which cards were played (e.g.
+          the 2 or the 3) are solved once;
+        - pruning of equivalent cards: cards of the same suit held by
+          the same player, with no card of another player (or of the
+          current trick) between them and worth the same points in
+          the contract, lead to the same results, so only one of them
+          is searched;
+        - bounds on the points a player can still make, which cut
+          positions whose result cannot change the outcome;
+        - optionally, a tablebase (see tablebase.py), which gives the
+          values of the positions at the start of the last tricks.
+'''
+import math, consts
+from game import get_game_class
+from bitboard import SUIT_MASKS, HEARTS, HIGH_HEARTS, KING_OF_HEARTS, QUEENS, popcount, iter_cards
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+
+# Cards worth more than their neighbours in every contract: equivalent
+# cards must be both inside or both outside of these masks
+POINT_CLASSES = {'NoHearts': HIGH_HEARTS,
+                 'NoKingOfHearts': KING_OF_HEARTS,
+                 'NoQueens': QUEENS}
+
+class Solver():
+    '''
+        Solves the positions reached from a fully revealed State.
+        The State is changed during the search, and restored after.
+
+        The transposition table (of the given number of slots) is kept
+        between calls, so positions solved for one player of the game
+        are not searched again (values depend on the player, who is
+        part of the key).
+    '''
+    def __init__(self, state, tablebase=None, slots=1 << 18):
+        self.game = get_game_class(state.game).from_state(state)
+        self.classes = POINT_CLASSES.get(state.game, 0)
+        self.tablebase = tablebase
+        self.table = TranspositionTable(slots)
+        self.nodes = 0
+
+    def solve(self, player):
+        '''
+            Returns the best final score player can guarantee.
+        '''
+        state = self.game.state
+
+        # Zero-window searches narrow the bounds of the
+        # value until they meet (scores are integers)
+        low, high = self.bounds(player)
+        value = max(low, min(high, 0))
+        while low < high:
+            beta = value + 1 if value == low else value
+            value = self.search(player, beta - 1, beta)
+            if value < beta:
+                high = value
+            else:
+                low = value
+
+        return state.scores[player] + value
+
+    def best_card(self):
+        '''
+            Returns the best card (-1 to pass in Domino) for the current
+            player and the final score it guarantees them.
+        '''
+        state = self.game.state
+        player = state.current_player
+        best, best_value = None, -math.inf
+
+        for card in self.moves():
+            base = state.scores[player]
+            self.game.apply(card)
+            value = state.scores[player] - base + self.search(player, best_value, math.inf)
+            self.game.undo()
+
+            if best is None or value > best_value:
+                best, best_value = card, value
+
+        return best, state.scores[player] + best_value
+
+    def moves(self, first=None):
+        '''
+            Returns the playable cards of the current player,
+            keeping only one card of every group of equivalent cards,
+            from the highest (which cuts more of the search). The
+            first card, if given and still a move, comes first.
+        '''
+        state = self.game.state
+        playable = self.game.get_playable_cards()
+        if not playable:
+            return [-1]
+
+        # Domino: neighbouring cards open different ends of a chain
+        if state.game == 'Domino':
+            moves = list(iter_cards(playable))[::-1]
+            if first in moves:
+                moves.remove(first)
+                moves.insert(0, first)
+
+            return moves
+
+        hand = state.hands[state.current_player]
+        others = state.trick_mask
+        for i, other_hand in enumerate(state.hands):
+            if i != state.current_player:
+                others |= other_hand
+
+        moves = []
+        previous = -1
+        for card in iter_cards(playable):
+            # Equivalent to the previous playable card if no card of another
+            # player lies between them and they are worth the same points
+            if (previous > -1 and previous // 13 == card // 13
+                    and not others & ((1 << card) - (1 << (previous + 1)))
+                    and (self.classes >> card & 1) == (self.classes >> previous & 1)):
+                previous = card
+                continue
+
+            moves.append(card)
+            previous = card
+
+        moves.reverse()
+        if first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+
+        return moves
+
+    def search(self, player, alpha, beta):
+        '''
+            Returns the points player can still make from the
+            current state, if it is between alpha and beta.
+            Otherwise, returns a bound beyond them.
+        '''
+        state = self.game.state
+        self.nodes += 1
+
+        if state.terminal:
+            return 0
+
+        if self.tablebase is not None and not state.trick:
+            values = self.tablebase.lookup(state)
+            if values is not None:
+                return values[player]
+
+        low, high = self.bounds(player)
+        if low >= beta or low == high:
+            return low
+        if high <= alpha:
+            return high
+
+        # Positions are stored at the start of a trick (always, in Domino)
+        key = None
+        first = None
+        if not state.trick:
+            key = self.key(player)
+            entry = self.table.get(key)
+            if entry is not None:
+                _, _, value, flag, first = entry
+                if flag == EXACT:
+                    return value
+                if flag == LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+
+                if alpha >= beta:
+                    return value
+
+        original_alpha, original_beta = alpha, beta
+        maximizing = state.current_player == player
+        best = -math.inf if maximizing else math.inf
+        best_card = None
+
+        for card in self.moves(first):
+            base = state.scores[player]
+            self.game.apply(card)
+            gain = state.scores[player] - base
+            value = gain + self.search(player, alpha - gain, beta - gain)
+            self.game.undo()
+
+            if maximizing and value > best or not maximizing and value < best:
+                best, best_card = value, card
+
+            if maximizing:
+                alpha = max(alpha, best)
+            else:
+                beta = min(beta, best)
+
+            if alpha >= beta:
+                break
+
+        if key is not None:
+            # Deeper positions saved more work, and are kept first
+            depth = popcount(state.hands[0] | state.hands[1] | state.hands[2] | state.hands[3])
+            if best <= original_alpha:
+                self.table.store(key, depth, best, UPPER, best_card)
+            elif best >= original_beta:
+                self.table.store(key, depth, best, LOWER, best_card)
+            else:
+                self.table.store(key, depth, best, EXACT, best_card)
+
+        return best
+
+    def key(self, player):
+        '''
+            Returns the key of the current state in the transposition
+            table: its Zobrist hash, except at the start of a trick
+            outside Domino. There, only the order of the remaining cards
+            of every suit matters, so every suit is encoded as the
+            sequence of the owners of its remaining cards, from the
+            lowest, each with the point class of the card.
+        '''
+        state = self.game.state
+        if state.trick or state.game == 'Domino':
+            return (player, state.hash)
+
+        hands = state.hands
+        key = [player, state.current_player]
+        for suit_mask in SUIT_MASKS:
+            code = 1
+            for card in iter_cards((hands[0] | hands[1] | hands[2] | hands[3]) & suit_mask):
+                owner = 0
+                while not hands[owner] >> card & 1:
+                    owner += 1
+
+                code = code << 3 | owner << 1 | (self.classes >> card & 1)
+
+            key.append(code)
+
+        return tuple(key)
+
+    def bounds(self, player):
+        '''
+            Returns the lowest and highest points
+            player can still make in the contract.
+        '''
+        state = self.game.state
+        remaining = ~state.played & ((1 << consts.DIFFERENT_CARDS) - 1)
+        tricks = (popcount(remaining) + len(state.trick)) // consts.NUM_PLAYERS
+
+        if state.game == 'Atout':
+            return 0, 5 * tricks
+        if state.game == 'NoTricks':
+            return -2 * tricks, 0
+        if state.game == 'NoHearts':
+            hearts = (remaining | state.trick_mask) & HEARTS
+            return -2 * popcount(hearts) - 2 * popcount(hearts & HIGH_HEARTS), 0
+        if state.game == 'NoKingOfHearts':
+            return (-20 if (remaining | state.trick_mask) & KING_OF_HEARTS else 0), 0
+        if state.game == 'NoLastTwo':
+            return -12 * min(tricks, 2), 0
+        if state.game == 'NoQueens':
+            return -6 * popcount((remaining | state.trick_mask) & QUEENS), 0
+
+        # Domino: a player who finished has made their points
+        if state.scores[player]:
+            return 0, 0
+
+        return -10, 45
+
+def solve(state, player=None, tablebase=None):
+    '''
+        Returns the best final score player can guarantee from the
+        given fully revealed State (see Solver), or the list of the
+        scores of all players if player is None.
+    '''
+    solver = Solver(state, tablebase)
+    if player is None:
+        return [solver.solve(player) for player in range(consts.NUM_PLAYERS)]
+
+    return solver.solve(player)
@@ -0,0 +1,145 @@
+'''
+    Card sprite atlas for the GUI.
+
+    The art of the 52 cards is packed into a single image (img/cards.png),
+    13 cards per row (one row per suit, ♥ ♦ ♣ ♠), with the box of every
+    card in img/cards.json. The GUI decodes the atlas once and cuts the
+    card images out of it on demand, the first time they are shown.
+
+    Decoding is cached between sessions: the decoded pixels are written
+    to a raw RGBA file in the user's cache directory, which the next
+    sessions read back without decoding the PNG again. The cache is
+    rebuilt whenever the atlas changes.
+
+    usage: python sprites.py [-i DIRECTORY]
+'''
+import os, sys, json, struct, getopt, consts
+
+DIRECTORY = 'img'
+ATLAS = 'cards.png'
+INDEX = 'cards.json'
+
+CACHE_MAGIC = b'BRBSP001'
+CACHE_HEADER = struct.Struct('<8sIIQQ')
+
+def cache_directory():
+    return os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'barbu-python')
+
+def build(directory=DIRECTORY):
+    '''
+        Packs the card images of the directory (<card int>.png)
+        into the atlas and writes its index, in the same directory.
+    '''
+    from PIL import Image
+
+    images = [Image.open(os.path.join(directory, '{}.png'.format(i))) for i in range(consts.DIFFERENT_CARDS)]
+    cell_width = max(image.width for image in images)
+    cell_height = max(image.height for image in images)
+
+    atlas = Image.new('RGBA', (13 * cell_width, 4 * cell_height))
+    boxes = []
+    for i, image in enumerate(images):
+        x = i % 13 * cell_width
+        y = i // 13 * cell_height
+        atlas.paste(image.convert('RGBA'), (x, y))
+        boxes.append([x, y, x + image.width, y + image.height])
+
+    atlas.save(os.path.join(directory, ATLAS), optimize=True)
+    with open(os.path.join(directory, INDEX), 'w') as f:
+        json.dump({'boxes': boxes}, f)
+
+def decode(path, cache=None):
+    '''
+        Returns the atlas at path as a PIL image, read from the
+        cache directory if it has already been decoded, otherwise
+        decoded and written to the cache (if possible).
+    '''
+    from PIL import Image
+
+    if cache is None:
+        cache = cache_directory()
+
+    info = os.stat(path)
+    cache_path = os.path.join(cache, '{}.rgba'.format(os.path.splitext(os.path.basename(path))[0]))
+
+    try:
+        with open(cache_path, 'rb') as f:
+            magic, width, height, mtime, size = CACHE_HEADER.unpack(f.read(CACHE_HEADER.size))
+            if (magic, mtime, size) == (CACHE_MAGIC, info.st_mtime_ns, info.st_size):
+                data = f.read()
+                if len(data) == 4 * width * height:
+                    return Image.frombuffer('RGBA', (width, height), data, 'raw', 'RGBA', 0, 1)
+    except (OSError, struct.error):
+        pass
+
+    image = Image.open(path).convert('RGBA')
+
+    try:
+        os.makedirs(cache, exist_ok=True)
+
+        # Written aside and renamed, so other sessions never read half a file
+        temp_path = '{}.{}'.format(cache_path, os.getpid())
+        with open(temp_path, 'wb') as f:
+            f.write(CACHE_HEADER.pack(CACHE_MAGIC, image.width, image.height, info.st_mtime_ns, info.st_size))
+            f.write(image.tobytes())
+
+        os.replace(temp_path, cache_path)
+    except OSError:
+        pass
+
+    return image
+
+class CardImages():
+    '''
+        The images of the cards for a Tk window, as a mapping
+        from every Card to its PhotoImage, cut out of the atlas
+        the first time it is requested.
+    '''
+    def __init__(self, master, directory=DIRECTORY, cache=None):
+        from PIL import ImageTk
+
+        with open(os.path.join(directory, INDEX)) as f:
+            self.boxes = json.load(f)['boxes']
+
+        self.master = master
+        self.sheet = ImageTk.PhotoImage(decode(os.path.join(directory, ATLAS), cache), master=master)
+        self.images = {}
+
+    def __getitem__(self, card):
+        i = int(card)
+        image = self.images.get(i)
+        if image is None:
+            from tkinter import PhotoImage
+
+            x1, y1, x2, y2 = self.boxes[i]
+            image = PhotoImage(master=self.master, width=x2 - x1, height=y2 - y1)
+            image.tk.call(image, 'copy', self.sheet, '-from', x1, y1, x2, y2)
+            self.images[i] = image
+
+        return image
+
+def usage():
+    print('usage: python sprites.py [-i DIRECTORY]')
+    print('    -i\tdirectory of the card images (default: {})'.format(DIRECTORY))
+    print('    -h\thelp')
+    print()
+    print('Packs the card images into the sprite atlas of the GUI.')
+
+if __name__ == '__main__':
+    directory = DIRECTORY
+
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], 'i:h')
+    except getopt.GetoptError as e:
+        print('Error: {}. Type -h for help'.format(str(e)))
+        sys.exit(2)
+
+    for opt, arg in opts:
+        if opt == '-h':
+            usage()
+            sys.exit(0)
+        elif opt == '-i':
+            directory = arg
+
+    build(directory)
+    print('[+] Atlas written to {}'.format(os.path.join(directory, ATLAS)))
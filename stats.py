@@ -0,0 +1,105 @@
+'''
+    Statistics computed incrementally, in constant memory,
+    while matches are being simulated.
+'''
+import math, time, consts
+
+class RunningStats():
+    '''
+        Mean and variance of a stream of values, updated
+        with Welford's algorithm every time a value is pushed.
+    '''
+    __slots__ = ('n', 'mean', 'm2')
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def push(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    @property
+    def variance(self):
+        '''
+            Sample variance (0 until there are two values).
+        '''
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def confidence_interval(self, z=1.96):
+        '''
+            Returns the half-width of the confidence interval of the
+            mean (95% with the default z), using the normal approximation.
+        '''
+        return z * math.sqrt(self.variance / self.n) if self.n > 1 else math.inf
+
+    def __str__(self):
+        return '{:8.2f} ± {:6.2f}'.format(self.mean, self.confidence_interval())
+
+class SimulationStats():
+    '''
+        Running statistics of a simulation: the total scores of every
+        seat, the scores of every seat in every game, and the number
+        of matches and moves played per second.
+    '''
+    def __init__(self):
+        self.seats = [RunningStats() for _ in range(consts.NUM_PLAYERS)]
+        self.games = {game_num: [RunningStats() for _ in range(consts.NUM_PLAYERS)]
+                      for game_num in range(consts.NUM_GAMES)}
+        self.matches = 0
+        self.moves = 0
+        self.start = time.monotonic()
+
+    def push(self, result):
+        '''
+            Updates the statistics with a MatchResult.
+        '''
+        self.matches += 1
+        self.moves += result.moves
+
+        for seat, score in zip(self.seats, result.scores):
+            seat.push(score)
+
+        for _, game_num, game_scores in result.contracts:
+            for seat, score in zip(self.games[game_num], game_scores):
+                seat.push(score)
+
+    def report(self):
+        elapsed = max(time.monotonic() - self.start, 1e-9)
+
+        lines = ['{} matches, {:.1f} matches/s, {:.0f} moves/s'.format(self.matches, self.matches / elapsed, self.moves / elapsed)]
+        lines.append('    {:16}'.format('') + ''.join('{:>20}'.format('Player {}'.format(i)) for i in range(consts.NUM_PLAYERS)))
+        lines.append('    {:16}'.format('Total') + ''.join('{:>20}'.format(str(seat)) for seat in self.seats))
+
+        for game_num, seats in self.games.items():
+            lines.append('    {:16}'.format(consts.GAMES[game_num].split('.')[1]) + ''.join('{:>20}'.format(str(seat)) for seat in seats))
+
+        return '\n'.join(lines)
+
+    def summary(self):
+        '''
+            Returns the statistics as a dictionary of plain values
+            (e.g. to be written as JSON). Confidence intervals are
+            None until there are enough values to compute them.
+        '''
+        elapsed = max(time.monotonic() - self.start, 1e-9)
+
+        def values(stats):
+            interval = stats.confidence_interval()
+            return {'mean': stats.mean, 'std': stats.std, 'ci95': interval if math.isfinite(interval) else None}
+
+        return {'matches': self.matches,
+                'moves': self.moves,
+                'elapsed': elapsed,
+                'matches_per_second': self.matches / elapsed,
+                'moves_per_second': self.moves / elapsed,
+                'scores': [values(seat) for seat in self.seats],
+                'games': {consts.GAMES[game_num].split('.')[1]: [values(seat) for seat in seats]
+                          for game_num, seats in self.games.items()}}
@@ -0,0 +1,540 @@
+'''
+    Endgame tablebase: the values of the positions at the start of
+    the last tricks of a contract, computed once (see Builder) and
+    looked up in constant time from a memory-mapped file.
+
+    Every position has two sets of values, the points every player
+    still makes from it:
+
+        - the paranoid values: the points a player can guarantee
+          against the other three players (as in the solver, see
+          solver.py);
+        - the outcome values: the points every player makes when all
+          of them play the cards best for themselves (max^n, the first
+          of the best cards is played). They add up to the points left
+          in the contract, which the paranoid values do not, so
+          playouts use them.
+
+    Positions are keyed by a canonical encoding, which is the same for
+    all the positions that the contract cannot tell apart:
+
+        - only the relative order of the remaining cards of a suit
+          matters (with the cards worth more points, e.g. queens in
+          NoQueens, marked);
+        - owners are counted from the player leading the trick;
+        - suits with the same role are interchangeable, so their
+          encodings are sorted (hearts in NoHearts and NoKingOfHearts,
+          and the trump suit in Atout, keep their own place).
+
+    So a single table holds every trump suit of Atout. Domino is not
+    trick-taking and has no tablebase.
+
+    The key is a 64-bit hash (BLAKE2b) of the canonical encoding.
+    The file starts with a header (magic, game name, maximum number
+    of cards per hand, number of slots), followed by an open-addressing
+    hash table (linear probing, load factor at most 2/3) of 16-byte
+    slots: the key (0 for an empty slot), the 4 paranoid values and
+    the 4 outcome values (int8), ordered from the player leading the
+    trick.
+
+    Tablebases are not shipped: python tablebase.py builds them in
+    the default directory, where players look for them. The number of
+    positions grows fast with the number of cards per hand (with 3
+    cards, positions where the contract is over are counted too):
+
+        contract          2 cards     3 cards
+        NoTricks           24 667     8.6 million
+        NoLastTwo          24 667     8.6 million
+        Atout              83 176      31 million
+        NoKingOfHearts    108 748      76 million
+        NoHearts          241 292     109 million
+        NoQueens          591 099     431 million
+
+    With 2 cards per hand, a table takes from a few seconds (NoTricks)
+    to a minute and a half (NoQueens) to build, and 1 to 16 MB. With
+    3 cards, the tables of NoTricks and NoLastTwo take about an hour
+    each and 270 MB, and are built by default (see MAX_CARDS); the
+    others would take many hours and gigabytes.
+
+    usage: python tablebase.py [-n MAX_CARDS] [-o DIRECTORY] [GAME ...]
+'''
+import os, sys, mmap, struct, getopt, hashlib, itertools, consts
+from bisect import bisect_left
+from operator import sub
+from bitboard import SUIT_MASKS, popcount, iter_cards
+from solver import POINT_CLASSES
+
+MAGIC = b'BRBTB002'
+HEADER = struct.Struct('<8s16sBQ')
+SLOT = struct.Struct('<Q8b')
+SLOT_KEY = struct.Struct('<Q')
+
+# Bits of the classes and owners in the code of a suit (the lowest bit
+# of every card, and the two above)
+CLASS_BITS = sum(1 << 3 * i for i in range(13))
+OWNER_BITS = CLASS_BITS * 6
+
+DIRECTORY = 'tablebase'
+
+# Suit with a role of its own in every contract (besides the trump suit)
+SPECIAL_SUITS = {'NoHearts': 0, 'NoKingOfHearts': 0}
+
+# Default number of cards per hand of the tables (2 for the others)
+MAX_CARDS = {'NoTricks': 3, 'NoLastTwo': 3}
+
+def canonical(state, classes):
+    '''
+        Returns the key of a state at the start of a trick.
+        Classes is the mask of the cards worth more points.
+    '''
+    hands = state.hands
+    leader = state.current_player
+    remaining = hands[0] | hands[1] | hands[2] | hands[3]
+
+    codes = []
+    for suit_mask in SUIT_MASKS:
+        code = 1
+        for card in iter_cards(remaining & suit_mask):
+            owner = 0
+            while not hands[owner] >> card & 1:
+                owner += 1
+
+            code = code << 3 | (owner - leader) % consts.NUM_PLAYERS << 1 | (classes >> card & 1)
+
+        codes.append(code)
+
+    special = state.trump if state.game == 'Atout' else SPECIAL_SUITS.get(state.game)
+    if special is None:
+        codes.sort()
+    else:
+        codes = [codes[special]] + sorted(codes[:special] + codes[special + 1:])
+
+    return hash_codes(codes)
+
+def hash_codes(codes):
+    '''
+        Returns the key of a canonical encoding (the codes of the suits).
+    '''
+    digest = hashlib.blake2b(b''.join(code.to_bytes(8, 'little') for code in codes), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') or 1
+
+class Tablebase():
+    '''
+        A tablebase file, mapped in memory.
+    '''
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, game, self.max_cards, self.slots = HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            raise ValueError('[-] Not a tablebase! (path: {})'.format(path))
+
+        self.game = game.rstrip(b'\0').decode()
+        self.classes = POINT_CLASSES.get(self.game, 0)
+
+    def lookup(self, state):
+        '''
+            Returns the list of the points every player can still
+            guarantee from a (non-terminal) state of the contract,
+            or None if the state is not in the table: in the middle
+            of a trick, or with more than max_cards cards per hand.
+        '''
+        return self.find(state, 0)
+
+    def outcome(self, state):
+        '''
+            Returns the list of the points every player makes from a
+            (non-terminal) state of the contract when every player plays
+            the cards best for themselves (the outcome values), or None
+            if the state is not in the table (see lookup).
+        '''
+        return self.find(state, consts.NUM_PLAYERS)
+
+    def find(self, state, offset):
+        '''
+            Returns the values of a state, starting at the given offset
+            in its slot, for every player, or None if it has no slot.
+        '''
+        if state.trick or state.game != self.game or popcount(state.hands[state.current_player]) > self.max_cards:
+            return None
+
+        key = canonical(state, self.classes)
+        slot = key & (self.slots - 1)
+        while True:
+            slot_key, *values = SLOT.unpack_from(self.map, HEADER.size + slot * SLOT.size)
+            if slot_key == key:
+                leader = state.current_player
+                return [values[offset + (player - leader) % consts.NUM_PLAYERS] for player in range(consts.NUM_PLAYERS)]
+
+            if not slot_key:
+                return None
+
+            slot = (slot + 1) & (self.slots - 1)
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __reduce__(self):
+        # Sent to worker processes by path, and mapped again there
+        return (Tablebase, (self.path,))
+
+def load(directory=DIRECTORY):
+    '''
+        Returns a dictionary mapping the name of every contract to its
+        tablebase, for the tablebases found in the directory.
+    '''
+    tablebases = {}
+    for module_name in consts.GAMES.values():
+        game_name = module_name.split('.')[1]
+        path = os.path.join(directory, '{}.tb'.format(game_name))
+        if os.path.exists(path):
+            tablebases[game_name] = Tablebase(path)
+
+    return tablebases
+
+class Builder():
+    '''
+        Solves the positions of a contract directly on their canonical
+        encoding (see canonical): a tuple with the code of every suit,
+        the suit with a role of its own first (the trump suit, which is
+        the first suit in the positions built, or hearts), the others
+        sorted.
+
+        Positions are solved backwards, one number of cards per hand
+        at a time: only the cards of the first trick are tried, and the
+        values of the positions it leads to are those of the positions
+        solved before, looked up by their codes (see store).
+    '''
+    def __init__(self, game_name):
+        self.game_name = game_name
+        self.classes = POINT_CLASSES.get(game_name, 0)
+        self.special = game_name == 'Atout' or game_name in SPECIAL_SUITS
+        self.trump = 0 if game_name == 'Atout' else None
+
+        # Codes (see pack) -> values of the position, from every
+        # player, when it is led by each of them (see store)
+        self.values = {}
+
+    def patterns(self, suit):
+        '''
+            Returns, for every number of cards, the different
+            sequences of classes of that many cards of the suit.
+        '''
+        offset = suit * 13
+        return [sorted({tuple(self.classes >> (offset + rank) & 1 for rank in ranks)
+                        for ranks in itertools.combinations(range(13), length)})
+                for length in range(14)]
+
+    def codes(self, suit, num_cards):
+        '''
+            Returns a dictionary mapping the number of cards of every
+            player (a tuple, from the leader) to the sorted codes of the
+            suit in which they hold as many, for at most num_cards cards
+            per player.
+        '''
+        codes = {}
+        def encode(pattern, i, code, counts):
+            if i == len(pattern):
+                codes.setdefault(tuple(counts), []).append(code)
+                return
+
+            for owner in range(consts.NUM_PLAYERS):
+                if counts[owner] < num_cards:
+                    counts[owner] += 1
+                    encode(pattern, i + 1, code << 3 | owner << 1 | pattern[i], counts)
+                    counts[owner] -= 1
+
+        for patterns in self.patterns(suit)[:consts.NUM_PLAYERS * num_cards + 1]:
+            for pattern in patterns:
+                encode(pattern, 0, 1, [0 for _ in range(consts.NUM_PLAYERS)])
+
+        for suit_codes in codes.values():
+            suit_codes.sort()
+
+        return codes
+
+    def positions(self, num_cards):
+        '''
+            Yields the encoding of every position with num_cards cards
+            per hand in which the contract is not over, once.
+        '''
+        # The first suit keeps its place, the others are sorted
+        first = self.codes(0, num_cards)
+        others = self.codes(1, num_cards) if self.special else first
+
+        def fill(codes, room, lowest):
+            sorted_suit = len(codes) > 0 or not self.special
+            table = others if sorted_suit else first
+
+            if len(codes) == 3:
+                suit_codes = table.get(room, [])
+                for code in suit_codes[bisect_left(suit_codes, lowest):]:
+                    yield codes + (code,)
+                return
+
+            for counts, suit_codes in table.items():
+                left = tuple(map(sub, room, counts))
+                if min(left) < 0:
+                    continue
+
+                for code in suit_codes[bisect_left(suit_codes, lowest):]:
+                    yield from fill(codes + (code,), left, code if sorted_suit else 0)
+
+        for codes in fill((), (num_cards,) * consts.NUM_PLAYERS, 0):
+            if not self.is_over(codes):
+                yield codes
+
+    def is_over(self, codes):
+        '''
+            Returns True if the contract ended before the cards
+            of the position could be played.
+        '''
+        if self.game_name == 'NoHearts':
+            return codes[0] == 1
+        if self.game_name in ('NoKingOfHearts', 'NoQueens'):
+            # Classes are the lowest bit of every card, under the leading 1
+            return not any(code & CLASS_BITS & ~(1 << (code.bit_length() - 1)) for code in codes)
+
+        return max(codes) == 1
+
+    def points(self, suit, cls):
+        '''
+            Returns the points of a card of a trick, for its winner.
+        '''
+        if self.game_name == 'NoHearts':
+            return -2 - 2 * cls if suit == 0 else 0
+        if self.game_name == 'NoKingOfHearts':
+            return -20 * cls
+        if self.game_name == 'NoQueens':
+            return -6 * cls
+
+        return 0
+
+    def trick_points(self, num_cards):
+        '''
+            Returns the points of the winner of a trick for the
+            trick itself, with num_cards cards in every hand.
+        '''
+        if self.game_name == 'Atout':
+            return 5
+        if self.game_name == 'NoTricks':
+            return -2
+        if self.game_name == 'NoLastTwo' and num_cards <= 2:
+            return -12
+
+        return 0
+
+    def solve(self, codes, num_cards):
+        '''
+            Returns the values of a position (the paranoid values, then
+            the outcome values, from the leader), once every position
+            with fewer cards is solved.
+        '''
+        players = consts.NUM_PLAYERS
+        trump = self.trump
+
+        # Cards of every player, as (suit, position in the suit, points)
+        hands = [[] for _ in range(players)]
+        for suit, code in enumerate(codes):
+            num_suit_cards = (code.bit_length() - 1) // 3
+            previous = None
+            for position in range(num_suit_cards):
+                card = code >> 3 * (num_suit_cards - 1 - position) & 7
+
+                # Only the lowest of equivalent cards (see solver.py)
+                if card != previous:
+                    hands[card >> 1].append((suit, position, self.points(suit, card & 1)))
+                previous = card
+
+        if self.game_name in SPECIAL_SUITS:
+            leads = [card for card in hands[0] if card[0]] or hands[0]
+        else:
+            leads = hands[0]
+
+        played = [0 for _ in codes]
+        trick_points = self.trick_points(num_cards)
+        stored = self.values
+        special = self.special
+
+        def play(player, led, win_suit, win_position, winner, points):
+            if player:
+                playable = [card for card in hands[player] if card[0] == led] or hands[player]
+            else:
+                playable = leads
+
+            best = None
+            for suit, position, card_points in playable:
+                if not player:
+                    led = suit
+                if (not player or suit == win_suit and position > win_position
+                        or suit == trump and win_suit != trump):
+                    card_winner = (suit, position, player)
+                else:
+                    card_winner = (win_suit, win_position, winner)
+
+                played[suit] |= 1 << position
+                if player < players - 1:
+                    values = play(player + 1, led, *card_winner, points + card_points)
+                else:
+                    # The cards left, from the winner, who leads the next trick
+                    new_leader = card_winner[2]
+                    left = [relabel(code, positions, new_leader) if positions or new_leader else code
+                            for code, positions in zip(codes, played)]
+
+                    if special:
+                        left[1:] = sorted(left[1:])
+                    else:
+                        left.sort()
+
+                    # Positions which are not stored are over
+                    rotations = stored.get(pack(left))
+                    values = list(rotations[new_leader]) if rotations else [0 for _ in range(2 * players)]
+                    values[new_leader] += points + card_points + trick_points
+                    values[players + new_leader] += points + card_points + trick_points
+                played[suit] ^= 1 << position
+
+                if best is None:
+                    best = values
+                    continue
+
+                # The player maximizes their own points: their paranoid
+                # value against the others, who minimize it, and their
+                # outcome (the first best card is kept)
+                if values[players + player] > best[players + player]:
+                    best[players:] = values[players:]
+                for p in range(players):
+                    if values[p] > best[p] if p == player else values[p] < best[p]:
+                        best[p] = values[p]
+
+            return best
+
+        return play(0, None, None, -1, None, 0)
+
+    def store(self, codes, values):
+        '''
+            Stores the values of a solved position, for every
+            player who can lead it (see pack).
+        '''
+        players = consts.NUM_PLAYERS
+        self.values[pack(codes)] = [tuple(values[half + (player - leader) % players]
+                                          for half in (0, players) for player in range(players))
+                                    for leader in range(players)]
+
+def relabel(code, positions, leader):
+    '''
+        Returns the code of the cards of a suit left once the cards
+        at the given positions (a mask, from the lowest card) are
+        played, with owners counted from the new leader.
+    '''
+    num_cards = (code.bit_length() - 1) // 3
+
+    # The highest cards first, so that the groups of the others keep their place
+    while positions:
+        position = positions.bit_length() - 1
+        group = 3 * (num_cards - 1 - position)
+        code = code >> group + 3 << group | code & ((1 << group) - 1)
+        positions ^= 1 << position
+        num_cards -= 1
+
+    # Every owner at once: the carries go to the class bits, and are dropped
+    owners = code & OWNER_BITS
+    shift = CLASS_BITS * 2 * (consts.NUM_PLAYERS - leader) & ((1 << 3 * num_cards) - 1)
+    return code ^ owners | (owners + shift) & OWNER_BITS
+
+def pack(codes):
+    '''
+        Returns the codes of the suits as a single integer.
+    '''
+    return codes[0] | codes[1] << 40 | codes[2] << 80 | codes[3] << 120
+
+def build(game_name, path, max_cards=None, verbose=False):
+    '''
+        Solves every position of the contract with at most max_cards
+        cards per hand (by default, see MAX_CARDS), and writes the
+        tablebase to path. Returns the number of positions.
+    '''
+    if max_cards is None:
+        max_cards = MAX_CARDS.get(game_name, 2)
+
+    builder = Builder(game_name)
+
+    # Slots of the positions, as they are solved (the key and the values)
+    slots = bytearray()
+    for num_cards in range(1, max_cards + 1):
+        num_positions = len(slots) // SLOT.size
+        for codes in builder.positions(num_cards):
+            values = builder.solve(codes, num_cards)
+            slots += SLOT.pack(hash_codes(codes), *values)
+
+            # The last positions are not needed to solve others
+            if num_cards < max_cards:
+                builder.store(codes, values)
+
+        if verbose:
+            print('[*] {} cards per hand: {} positions'.format(num_cards, len(slots) // SLOT.size - num_positions))
+
+    write(path, game_name, max_cards, slots)
+    return len(slots) // SLOT.size
+
+def write(path, game_name, max_cards, slots):
+    '''
+        Writes a tablebase with the given slots (in a bytes-like
+        object), placing them in a hash table.
+    '''
+    num_positions = len(slots) // SLOT.size
+    size = 1
+    while 2 * size < 3 * num_positions:
+        size *= 2
+
+    table = bytearray(size * SLOT.size)
+    for start in range(0, len(slots), SLOT.size):
+        key, = SLOT_KEY.unpack_from(slots, start)
+        slot = key & (size - 1)
+        while SLOT_KEY.unpack_from(table, slot * SLOT.size)[0]:
+            slot = (slot + 1) & (size - 1)
+
+        table[slot * SLOT.size:(slot + 1) * SLOT.size] = slots[start:start + SLOT.size]
+
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, game_name.encode(), max_cards, size))
+        f.write(table)
+
+def usage():
+    print('usage: python tablebase.py [-n MAX_CARDS] [-o DIRECTORY] [GAME ...]')
+    print('    -n\tmaximum number of cards per hand (default: 3 for NoTricks and NoLastTwo, 2 for the others)')
+    print('    -o\tdirectory of the tablebases (default: {})'.format(DIRECTORY))
+    print('    -h\thelp')
+    print()
+    print('Builds the tablebases of the given games (default: all but Domino).')
+
+if __name__ == '__main__':
+    max_cards = None
+    directory = DIRECTORY
+
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], 'n:o:h')
+    except getopt.GetoptError as e:
+        print('Error: {}. Type -h for help'.format(str(e)))
+        sys.exit(2)
+
+    for opt, arg in opts:
+        if opt == '-h':
+            usage()
+            sys.exit(0)
+        elif opt == '-n':
+            max_cards = int(arg)
+        elif opt == '-o':
+            directory = arg
+
+    games = args or [module_name.split('.')[1] for module_name in consts.GAMES.values() if module_name != 'game.Domino']
+    for game_name in games:
+        print('[*] Building the tablebase of {}...'.format(game_name))
+        num_positions = build(game_name, os.path.join(directory, '{}.tb'.format(game_name)), max_cards, verbose=True)
+        print('[+] {} positions'.format(num_positions))
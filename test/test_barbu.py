@@ -0,0 +1,29 @@
+import sys, unittest
+sys.path.append('..')
+
+class TestBarbu(unittest.TestCase):
+
+    def test_check_options(self):
+        from Barbu import DEFAULT_OPTIONS, check_options
+
+        check_options(DEFAULT_OPTIONS)
+        check_options({'players': ['RandomPlayer'] * 4, 'matches': 10, 'interval': 2, 'plot': 'plot.png'})
+
+        for options in [{'matches': '10'}, {'matches': True}, {'workers': 0}, {'interval': -1.0},
+                        {'players': 'RandomPlayer'}, {'players': [1, 2, 3, 4]}, {'plot': None}, {'speed': 1}]:
+            with self.assertRaises(ValueError):
+                check_options(options)
+
+    def test_invalid_arguments(self):
+        import os, subprocess
+
+        directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        for arguments in [['-n', 'abc'], ['-r', '1.5'], ['-i', 'often'], ['-w', '0']]:
+            process = subprocess.run([sys.executable, 'Barbu.py', '-p', ','.join(['RandomPlayer'] * 4)] + arguments,
+                                     cwd=directory, capture_output=True, text=True)
+            self.assertEqual(process.returncode, 1)
+            self.assertEqual(process.stdout, '')
+            self.assertTrue(process.stderr.startswith('Error: '), process.stderr)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,29 @@
+import sys, unittest
+sys.path.append('..')
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_compare(self):
+        from benchmark import compare
+
+        baseline = {'fast': 100.0, 'slow': 100.0}
+        results = {'fast': 95.0, 'slow': 70.0, 'new': 1.0}
+        self.assertEqual(compare(results, baseline, 0.2), ['slow'])
+        self.assertEqual(compare(results, baseline, 0.0), ['fast', 'slow'])
+
+    def test_normalise(self):
+        from benchmark import REFERENCE, normalise
+
+        # Twice as fast on a machine twice as fast, so the same relative speeds
+        self.assertEqual(normalise({REFERENCE: 200.0, 'fast': 100.0, 'slow': 10.0}), {'fast': 0.5, 'slow': 0.05})
+        self.assertEqual(normalise({REFERENCE: 400.0, 'fast': 200.0, 'slow': 20.0}), {'fast': 0.5, 'slow': 0.05})
+
+    def test_benchmarks(self):
+        from benchmark import BENCHMARKS
+
+        # Every benchmark runs some operations
+        for name in ['reference', 'get_trick_winner', 'Domino.attach_card', 'HeuristicPlayer.get_next_action.NoHearts']:
+            self.assertGreater(BENCHMARKS[name]()(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import sys, unittest
+sys.path.append('..')
+
+class TestBitboard(unittest.TestCase):
+
+    def test_cards_to_mask(self):
+        from Card import Card
+        from bitboard import cards_to_mask, iter_cards
+
+        cards = [Card('Hearts', 0), Card('Diamonds', 'Q'), Card('Spades', 'A')]
+        mask = cards_to_mask(cards)
+
+        self.assertEqual(list(iter_cards(mask)), [int(card) for card in cards])
+
+    def test_positions(self):
+        from bitboard import position, nth_card, actions
+
+        hand = (1 << 3) | (1 << 17) | (1 << 30) | (1 << 51)
+
+        for i, card in enumerate([3, 17, 30, 51]):
+            self.assertEqual(position(hand, card), i)
+            self.assertEqual(nth_card(hand, i), card)
+
+        self.assertEqual(actions(hand, (1 << 17) | (1 << 51)), [1, 3])
+
+    def test_trick_winner(self):
+        from Card import Card, get_trick_winner
+        from bitboard import trick_winner
+
+        tricks = [[Card('Clubs', 2), Card('Clubs', 7), Card('Clubs', 10), Card('Clubs', 12)],
+                  [Card('Spades', 10), Card('Spades', 11), Card('Diamonds', 0), Card('Spades', 12)],
+                  [Card('Hearts', 0), Card('Diamonds', 12), Card('Clubs', 12), Card('Spades', 12)]]
+
+        for first_player in range(4):
+            for trick in tricks:
+                for trump_suit in [None] + Card.suits:
+                    trump = Card.suits.index(trump_suit) if trump_suit else None
+                    self.assertEqual(trick_winner(first_player, [int(card) for card in trick], trump),
+                                     get_trick_winner(first_player, trick, trump_suit))
+
+    def test_domino_playable(self):
+        from Card import Card
+        from bitboard import FULL_DECK, cards_to_mask, domino_playable, domino_chain
+
+        # Nothing played: only the starting values can be played
+        self.assertEqual(domino_playable(FULL_DECK, 0, 5),
+                         cards_to_mask([Card(suit, 5) for suit in Card.suits]))
+
+        # ♥3 ♥4 ♥5 played: ♥2 and ♥6 can be attached
+        played = cards_to_mask([Card('Hearts', value) for value in (1, 2, 3)])
+        self.assertEqual(domino_playable(FULL_DECK, played, 2) & cards_to_mask(Card('Hearts', value) for value in range(13)),
+                         cards_to_mask([Card('Hearts', 0), Card('Hearts', 4)]))
+
+        # ♦2 ... ♦Q played: ♦A goes before the two, ♦K after the queen
+        played = cards_to_mask([Card('Diamonds', value) for value in range(11)])
+        self.assertEqual(domino_playable(FULL_DECK, played, 4) & cards_to_mask(Card('Diamonds', value) for value in range(13)),
+                         cards_to_mask([Card('Diamonds', 'A'), Card('Diamonds', 'K')]))
+
+        # ♣A opened the suit: only ♣2 can be attached
+        played = cards_to_mask([Card('Clubs', 'A')])
+        self.assertEqual(domino_playable(FULL_DECK, played, 12) & cards_to_mask(Card('Clubs', value) for value in range(13)),
+                         cards_to_mask([Card('Clubs', 0)]))
+
+        # The ace is always the first card of the chain
+        played = cards_to_mask([Card('Spades', value) for value in (12, 0, 1)])
+        self.assertEqual(domino_chain(played, 3), [int(Card('Spades', value)) for value in (12, 0, 1)])
+
+if __name__ == '__main__':
+    unittest.main()
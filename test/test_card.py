@@ -46,6 +46,34 @@ class TestCard(unittest.TestCase):
             Card('suit', 7)
             Card('here', 8)
 
+    def test_flyweight(self):
+        import pickle
+        from copy import copy, deepcopy
+        from Card import Card
+
+        for x in range(52):
+            card = Card.int_to_card(x)
+
+            self.assertIs(Card(card.suit, card.value), card)
+            self.assertIs(Card(card.suit, Card.labels[card.value]), card)
+            self.assertIs(copy(card), card)
+            self.assertIs(deepcopy(card), card)
+            self.assertIs(pickle.loads(pickle.dumps(card)), card)
+            self.assertEqual(int(card), x)
+
+        self.assertIs(Card('Hearts', 'K'), Card('♥', 11))
+
+    def test_immutable(self):
+        from Card import Card
+
+        card = Card('Clubs', 'J')
+
+        with self.assertRaises(AttributeError):
+            card.value = 10
+
+        with self.assertRaises(AttributeError):
+            card.other = 'yolo'
+
     def test_deck(self):
         import consts
         from Card import Card, Deck
@@ -61,6 +89,9 @@ class TestCard(unittest.TestCase):
         deck.draw(remaining)
         self.assertTrue(deck.is_empty())
 
+        # Every deck is a permutation of the same 52 cards
+        self.assertTrue(all(a is b for a, b in zip(sorted(Deck().cards, key=int), sorted(Deck().cards, key=int))))
+
     def test_is_new_winner(self):
         from Card import Card, is_new_winner
 
@@ -0,0 +1,55 @@
+import sys, unittest
+sys.path.append('..')
+
+class TestDealSampler(unittest.TestCase):
+
+    def test_constraints(self):
+        import random
+        from player.DealSampler import DealSampler
+        from bitboard import SUIT_MASKS, FULL_DECK, popcount
+        from Card import Card
+
+        random.seed(0)
+        hand = SUIT_MASKS[0] & ~1
+
+        # Player 1 misses spades, player 2 misses diamonds and spades
+        missing_suits = {suit: [False for _ in range(4)] for suit in Card.suits}
+        missing_suits['♠'][1] = True
+        missing_suits['♦'][2] = True
+        missing_suits['♠'][2] = True
+
+        sampler = DealSampler(hand, 0, (12, 13, 13, 13), FULL_DECK & ~hand & ~1, missing_suits)
+        for hands in sampler.batch(100):
+            self.assertEqual(hands[0], hand)
+            self.assertEqual([popcount(h) for h in hands], [12, 13, 13, 13])
+            self.assertEqual(hands[0] | hands[1] | hands[2] | hands[3], FULL_DECK & ~1)
+            self.assertFalse(hands[1] & SUIT_MASKS[3])
+            self.assertFalse(hands[2] & (SUIT_MASKS[1] | SUIT_MASKS[3]))
+
+    def test_uniform(self):
+        import random
+        from collections import Counter
+        from player.DealSampler import DealSampler
+        from Card import Card
+
+        random.seed(0)
+        missing_suits = {suit: [False for _ in range(4)] for suit in Card.suits}
+
+        # Four cards, two for player 1 and two for player 3: six deals
+        unseen = 1 << 0 | 1 << 1 | 1 << 13 | 1 << 40
+        sampler = DealSampler(0, 0, (0, 2, 0, 2), unseen, missing_suits)
+        self.assertEqual(sampler.count(0, sampler.room), 6)
+        for deals in [sampler.batch(6000), [sampler.sample() for _ in range(6000)]]:
+            counts = Counter(tuple(hands) for hands in deals)
+            self.assertEqual(len(counts), 6)
+            self.assertTrue(all(800 < count < 1200 for count in counts.values()))
+
+        # Player 1 misses hearts: only one deal is left
+        missing_suits['♥'][1] = True
+        sampler = DealSampler(0, 0, (0, 2, 0, 2), unseen, missing_suits)
+        self.assertEqual(sampler.count(0, sampler.room), 1)
+        self.assertEqual(sampler.sample(), [0, 1 << 13 | 1 << 40, 0, 1 << 0 | 1 << 1])
+        self.assertEqual(sampler.batch(2), [[0, 1 << 13 | 1 << 40, 0, 1 << 0 | 1 << 1]] * 2)
+
+if __name__ == '__main__':
+    unittest.main()
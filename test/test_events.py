@@ -0,0 +1,69 @@
+import sys, unittest
+sys.path.append('..')
+
+class TestEventBus(unittest.TestCase):
+
+    def test_lazy(self):
+        from events import EventBus, Message
+
+        class Template():
+            formatted = 0
+            def format(self, *args):
+                Template.formatted += 1
+                return 'formatted'
+
+        bus = EventBus()
+
+        # Nobody subscribed: the event is not built, the message not formatted
+        bus.publish(Message, Template(), 1)
+        self.assertEqual(Template.formatted, 0)
+
+        # The message is formatted once, however many subscribers read it
+        received = []
+        bus.subscribe(Message, lambda event: received.append(event.text))
+        bus.subscribe(Message, lambda event: received.append(event.text))
+        bus.publish(Message, Template(), 1)
+        self.assertEqual(received, ['formatted', 'formatted'])
+        self.assertEqual(Template.formatted, 1)
+
+    def test_player_subscriptions(self):
+        from events import EventBus, Message, CardPlayed
+        from player.Player import RandomPlayer
+        from Card import Card
+
+        class ListeningPlayer(RandomPlayer):
+            def __init__(self, ID, name=''):
+                super().__init__(ID, name)
+                self.messages = []
+                self.cards = []
+
+            def tell(self, string):
+                self.messages.append(string)
+
+            def notify_card(self, ID, card):
+                self.cards.append((ID, card))
+
+        listener = ListeningPlayer(ID=1)
+        bus = EventBus.for_players([RandomPlayer(ID=0), listener])
+
+        # Only the player overriding tell() and notify_card() subscribed
+        self.assertEqual(len(bus.subscribers[Message]), 1)
+        self.assertEqual(len(bus.subscribers[CardPlayed]), 1)
+
+        bus.publish(Message, 'Player {} won the trick!', 3)
+        bus.publish(CardPlayed, 2, int(Card('Spades', 'Q')))
+        self.assertEqual(listener.messages, ['Player 3 won the trick!'])
+        self.assertEqual(listener.cards, [(2, Card('Spades', 'Q'))])
+
+    def test_headless_match(self):
+        import random
+        from Barbu import Barbu
+        from player.Player import RandomPlayer
+
+        random.seed(0)
+        barbu = Barbu([RandomPlayer(ID=i) for i in range(4)])
+        self.assertEqual(barbu.bus.subscribers, {})
+        self.assertEqual(sum(barbu.play()), 0)
+
+if __name__ == '__main__':
+    unittest.main()
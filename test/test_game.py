@@ -0,0 +1,150 @@
+import sys, unittest
+sys.path.append('..')
+
+def deal(seed=0):
+    import random
+    from Card import Deck
+    from player.Player import RandomPlayer
+
+    random.seed(seed)
+    deck = Deck()
+    players = [RandomPlayer(ID=i) for i in range(4)]
+    for i, player in enumerate(players):
+        player.hand = sorted(deck.cards[i*13:(i+1)*13], key=int)
+
+    return players
+
+class TestPlayerState(unittest.TestCase):
+
+    def test_view(self):
+        from game.NoTricks import NoTricks
+        from game.Game import PlayerState
+
+        players = deal()
+        game = NoTricks(players, 1)
+        game.get_next_state(0)
+
+        view = PlayerState(game.state, game.get_playable_actions())
+
+        self.assertEqual(view.current_player, 2)
+        self.assertEqual(view.hands[2], players[2].hand)
+        self.assertEqual([hand for i, hand in enumerate(view.hands) if i != 2], [None, None, None])
+        self.assertEqual(view.trick_cards, view.played_cards)
+        self.assertEqual(len(view.trick_cards), 1)
+
+    def test_read_only(self):
+        from game.NoTricks import NoTricks
+        from game.Game import PlayerState
+
+        game = NoTricks(deal(), 0)
+        view = PlayerState(game.state, game.get_playable_actions())
+
+        with self.assertRaises(AttributeError):
+            view.current_player = 3
+
+        with self.assertRaises(AttributeError):
+            view.hands = None
+
+    def test_copy_on_write(self):
+        from game.NoTricks import NoTricks
+        from game.Game import PlayerState
+
+        game = NoTricks(deal(), 0)
+        view = PlayerState(game.state, game.get_playable_actions())
+        other_view = PlayerState(game.state, game.get_playable_actions())
+
+        # Changing the view does not change the engine state nor other views
+        view.missing_suits['♠'][1] = True
+        view.hands[0].pop()
+        self.assertFalse(other_view.missing_suits['♠'][1])
+        self.assertEqual(len(other_view.hands[0]), 13)
+        self.assertEqual(game.state.voids, 0)
+
+        # Changing the engine state does not change the view,
+        # even if its attributes are read afterwards
+        lazy_view = PlayerState(game.state, game.get_playable_actions())
+        hand = list(other_view.hands[0])
+        game.get_next_state(0)
+        self.assertEqual(lazy_view.hands[0], hand)
+        self.assertEqual(lazy_view.trick_cards, [])
+        self.assertEqual(lazy_view.played_cards, [])
+
+    def test_card_counting(self):
+        import random
+        from Card import Card, CARDS
+        from game.NoTricks import NoTricks
+        from game.Game import PlayerState
+        from bitboard import iter_cards
+
+        random.seed(0)
+        game = NoTricks(deal(), 0)
+        for _ in range(10):
+            game.apply(random.choice(list(iter_cards(game.get_playable_cards()))))
+
+        view = PlayerState(game.state, game.get_playable_actions())
+        for suit in Card.suits:
+            played = sorted(card.value for card in view.played_cards if card.suit == suit)
+            self.assertEqual(view.played_counts[suit], len(played))
+            self.assertEqual(view.remaining_values[suit], sorted(set(range(13)) - set(played)))
+
+        # Holding every card of a suit, the other players miss it
+        players = deal()
+        for i, player in enumerate(players):
+            player.hand = list(CARDS[i*13:(i+1)*13])
+
+        game = NoTricks(players, 0)
+        view = PlayerState(game.state, game.get_playable_actions())
+        self.assertEqual(view.missing_suits['♥'], [False, True, True, True])
+        self.assertEqual(view.missing_suits['♦'], [False, False, False, False])
+
+class TestApplyUndo(unittest.TestCase):
+
+    def snapshot(self, state):
+        return {name: list(value) if isinstance(value, list) else value
+                for name, value in vars(state).items()}
+
+    def test_apply_undo(self):
+        import random, consts, importlib
+        from bitboard import iter_cards
+
+        for game_num, module_name in consts.GAMES.items():
+            class_name = module_name.split('.')[1]
+            class_ = getattr(importlib.import_module(module_name), class_name)
+
+            for seed in range(5):
+                game = class_(deal(seed), seed % 4, '♣' if class_name == 'Atout' else None)
+
+                snapshots = []
+                while not game.state.terminal:
+                    snapshots.append(self.snapshot(game.state))
+                    playable = list(iter_cards(game.get_playable_cards())) or [-1]
+                    game.apply(random.choice(playable))
+
+                self.assertEqual(len(game.history), len(snapshots))
+
+                # Undo every move, checking we get back every previous state
+                while snapshots:
+                    game.undo()
+                    self.assertEqual(self.snapshot(game.state), snapshots.pop())
+
+                self.assertEqual(game.history, [])
+
+    def test_from_state(self):
+        import random
+        from game.NoHearts import NoHearts
+        from bitboard import iter_cards
+
+        players = deal()
+        game = NoHearts(players, 0)
+        search = NoHearts.from_state(game.state.copy())
+
+        # Moves made on the copy do not change the original game
+        while not search.state.terminal:
+            search.apply(random.choice(list(iter_cards(search.get_playable_cards()))))
+
+        self.assertEqual(game.state.played, 0)
+        self.assertEqual(game.state.scores, [0, 0, 0, 0])
+        self.assertTrue(all(len(player.hand) == 13 for player in players))
+
+if __name__ == '__main__':
+    unittest.main()
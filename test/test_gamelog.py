@@ -0,0 +1,79 @@
+import sys, unittest
+sys.path.append('..')
+
+class TestGameLog(unittest.TestCase):
+
+    def test_replay(self):
+        import random, consts
+        from Barbu import Barbu
+        from player.HeuristicPlayer import HeuristicPlayer
+        from player.Player import RandomPlayer
+        import gamelog
+
+        random.seed(0)
+        barbu = Barbu([HeuristicPlayer(ID=0), RandomPlayer(ID=1), HeuristicPlayer(ID=2), RandomPlayer(ID=3)], record=True)
+        barbu.play()
+        self.assertEqual(len(barbu.records), consts.NUM_PLAYERS * consts.NUM_GAMES)
+
+        for data, (dealer_ID, game_num, game_scores) in zip(barbu.records, barbu.contracts):
+            record, offset = gamelog.decode(data)
+            self.assertEqual(offset, len(data))
+            self.assertEqual((record.dealer, record.game), (dealer_ID, game_num))
+
+            # Every card is dealt once, 13 to every player
+            hands = record.hands
+            self.assertEqual(sum(hands), (1 << 52) - 1)
+            self.assertTrue(all(bin(hand).count('1') == 13 for hand in hands))
+
+            # Replaying the moves gives the same scores, and every state on the way
+            game = gamelog.replay(record)
+            self.assertTrue(game.state.terminal)
+            self.assertEqual(game.state.scores, game_scores)
+            self.assertEqual(gamelog.encode(game, dealer_ID), data)
+
+            if record.game_name == 'Domino':
+                self.assertEqual(len([card for card in record.cards if card > -1]), 52)
+                self.assertIn(record.starting_value, range(13))
+
+            middle = gamelog.replay(record, len(record.moves) // 2)
+            while len(game.history) > len(middle.history):
+                game.undo()
+
+            self.assertEqual(game.state.hash, middle.state.hash)
+
+    def test_append_and_read(self):
+        import os, tempfile
+        from simulation import simulate
+        from player.Player import RandomPlayer
+        import gamelog
+
+        results = list(simulate([RandomPlayer] * 4, matches=2, seed=0, record=True))
+        records = [result.records for result in results]
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'games', 'log.bin')
+
+            with gamelog.GameLog(path) as log:
+                log.append(records[0])
+
+            # Simulate a crash in the middle of a record
+            with open(path, 'ab') as f:
+                f.write(records[1][:30])
+
+            # Reopening drops the truncated record and appends to the same log
+            with gamelog.GameLog(path) as log:
+                log.append(records[1])
+
+            read = list(gamelog.iter_records(path, chunk_size=100))
+            self.assertEqual(len(read), 2 * 28)
+            self.assertEqual(b''.join(gamelog.RECORD_HEAD.pack(r.dealer, r.game, r.option, len(r.moves)) + r.deal + r.moves for r in read),
+                             b''.join(records))
+
+            with open(path, 'wb') as f:
+                f.write(b'NOTALOG!')
+
+            with self.assertRaises(ValueError):
+                list(gamelog.iter_records(path))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import sys, unittest
+sys.path.append('..')
+
+class TestHeuristicPlayer(unittest.TestCase):
+
+    def test_values(self):
+        from Card import Card
+        from bitboard import cards_to_mask
+        from player.HeuristicPlayer import highest_value, lowest_value, values_mask
+
+        cards = [Card('Hearts', 3), Card('Diamonds', 'Q'), Card('Clubs', 3), Card('Spades', 'Q')]
+        mask = cards_to_mask(cards)
+
+        # Ties go to the first suit, as with max() and min() on a sorted hand
+        self.assertEqual(highest_value(mask), int(max(cards, key=lambda x: x.value)))
+        self.assertEqual(lowest_value(mask), int(min(cards, key=lambda x: x.value)))
+        self.assertEqual(highest_value(0), -1)
+
+        self.assertEqual(mask & values_mask(1, 0, 10), 0)
+        self.assertEqual(mask & values_mask(1, 0, 11), 1 << int(cards[1]))
+        self.assertEqual(values_mask(2, 5, 5), 0)
+
+    def test_contract_heuristics(self):
+        import random
+        from Card import Deck
+        from player.HeuristicPlayer import HeuristicPlayer
+
+        random.seed(0)
+        player = HeuristicPlayer(ID=0)
+        for _ in range(50):
+            player.hand = sorted(Deck().cards[:13], key=int)
+
+            # Same values as sums over the cards
+            values = [card.value for card in player.hand]
+            self.assertEqual(player.calculate_heuristic(0), sum(values))
+            self.assertEqual(player.calculate_heuristic(1), 165 - sum(values))
+            for pivot in range(13):
+                self.assertEqual(player.calculate_spread(pivot), sum(abs(pivot - value) for value in values))
+                self.assertEqual(player.calculate_spread(pivot, low_ace=True),
+                                 sum(abs(pivot - (-1 if value == 12 else value)) for value in values))
+
+            suit_values = [sum(card.value for card in player.hand if card.suit == suit) for suit in '♥♦♣♠']
+            self.assertEqual(player.get_trump_suit(), '♥♦♣♠'[suit_values.index(max(suit_values))])
+
+    def test_play(self):
+        import random
+        from Barbu import Barbu
+        from player.HeuristicPlayer import HeuristicPlayer
+        from player.Player import RandomPlayer
+
+        random.seed(0)
+        players = [HeuristicPlayer(ID=0), RandomPlayer(ID=1), HeuristicPlayer(ID=2), RandomPlayer(ID=3)]
+        self.assertEqual(sum(Barbu(players).play()), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import sys, unittest
+sys.path.append('..')
+
+class TestMCPlayer(unittest.TestCase):
+
+    def test_games(self):
+        import random, consts
+        from Card import Deck
+        from player.Player import RandomPlayer
+        from player.MCPlayer import MCPlayer, get_game_class
+
+        random.seed(0)
+
+        # MCPlayer plays legal moves in every game (play() asserts it)
+        for game_num, module_name in consts.GAMES.items():
+            deck = Deck()
+            players = [MCPlayer(ID=0, time_budget=None, iterations=20, contract_budget=None, contract_rollouts=5)] + [RandomPlayer(ID=i) for i in range(1, 4)]
+            for i, player in enumerate(players):
+                player.hand = sorted(deck.cards[i*13:(i+1)*13], key=int)
+
+            game = get_game_class(module_name.split('.')[1])(players, 0, '♠')
+            game.play()
+            self.assertTrue(game.state.terminal)
+
+        self.assertGreater(players[0].iterations_per_second(), 0)
+
+    def test_contracts(self):
+        import random, consts
+        from Card import Card, CARDS
+        from player.MCPlayer import MCPlayer
+
+        random.seed(0)
+
+        # With all the spades, Atout with spades as trump wins every trick
+        player = MCPlayer(ID=2, iterations=10, contract_budget=None, contract_rollouts=10)
+        player.hand = list(CARDS[39:52])
+        self.assertEqual(consts.GAMES[player.get_next_game()], 'game.Atout')
+        self.assertEqual(player.get_trump_suit(), '♠')
+        self.assertEqual(max(player.contract_values.values()), 65)
+
+        # Only the available games are chosen, and the
+        # starting value is simulated if it was not yet
+        player.played_games = {game_num: consts.GAMES[game_num] != 'game.Domino' for game_num in consts.GAMES}
+        self.assertEqual(consts.GAMES[player.get_next_game()], 'game.Domino')
+        self.assertIn(player.get_starting_value(), range(13))
+
+        player.hand = list(CARDS[0:13])
+        self.assertIn(player.get_trump_suit(), Card.suits)
+        self.assertEqual(len(player.contract_values), 4)
+
+    def test_contract_deadline(self):
+        from Card import CARDS
+        from bitboard import cards_to_mask
+        from player.MCPlayer import simulate_contracts
+
+        hand = cards_to_mask(CARDS[13:26])
+        candidates = [(1, None), (5, None)]
+
+        # Deal n ends at times[n + 1] (the first two readings are the start):
+        # a deal is started only if it can end before the deadline, taking
+        # as long as the longest one so far (0.3 from the second deal on)
+        times = [0.0, 0.0, 0.1, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9]
+        totals, deals = simulate_contracts(hand, 0, candidates, 1.0, None, {}, clock=iter(times).__next__)
+        self.assertEqual(deals, 5)
+        self.assertEqual(len(totals), 2)
+
+        # The first deal is always played
+        _, deals = simulate_contracts(hand, 0, candidates, 0.0, None, {}, clock=iter([0.0, 0.0, 5.0]).__next__)
+        self.assertEqual(deals, 1)
+
+        # Without a deadline, exactly the given number of deals
+        _, deals = simulate_contracts(hand, 0, candidates, None, 7, {})
+        self.assertEqual(deals, 7)
+
+    def test_advance(self):
+        from player.MCPlayer import MCPlayer, Node
+
+        player = MCPlayer(ID=0, iterations=10)
+
+        # Player 1 plays card 5 or passes, then player 2 plays card 7
+        root = Node()
+        root.children[5] = Node(5, 1, root)
+        root.children[-1] = Node(-1, 1, root)
+        root.children[-1].children[7] = Node(7, 2, root.children[-1])
+        root.children[-1].children[7].visits = 3
+
+        player.root = root
+        player.advance(1, 5)
+        self.assertIs(player.root, root.children[5])
+        self.assertIsNone(player.root.parent)
+
+        # Passes are not notified
+        player.root = root
+        player.advance(2, 7)
+        self.assertEqual(player.root.visits, 3)
+
+        # Unknown cards drop the tree
+        player.advance(3, 8)
+        self.assertIsNone(player.root)
+        self.assertEqual(player.played, 1 << 5 | 1 << 7 | 1 << 8)
+
+    def test_parallel(self):
+        import pickle
+        from Card import Deck
+        from game.Game import PlayerState
+        from game.NoQueens import NoQueens
+        from player.Player import RandomPlayer
+        from player.MCPlayer import MCPlayer
+
+        deck = Deck()
+        players = [MCPlayer(ID=0, time_budget=None, iterations=30, workers=2)] + [RandomPlayer(ID=i) for i in range(1, 4)]
+        for i, player in enumerate(players):
+            player.hand = sorted(deck.cards[i*13:(i+1)*13], key=int)
+
+        game = NoQueens(players, 0)
+
+        # Views are sent to the workers
+        state = PlayerState(game.state, game.get_playable_actions())
+        self.assertEqual(pickle.loads(pickle.dumps(state)).unseen, state.unseen)
+
+        try:
+            # The iterations are split between the two trees
+            self.assertIn(players[0].get_next_action(state), state.playable_actions)
+            self.assertEqual(players[0].total_iterations, 30)
+
+            game.play()
+            self.assertTrue(game.state.terminal)
+        finally:
+            players[0].close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import sys, unittest
+sys.path.append('..')
+
+class TestScoreLog(unittest.TestCase):
+
+    def test_append_and_read(self):
+        import os, tempfile
+        import scorelog
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'scores', 'log.bin')
+
+            with scorelog.ScoreLog(path, contracts=True) as log:
+                log.append([10, -5, -5, 0], [(0, 1, [-2, -6, -8, -10]), (0, 0, [5, 20, 15, 25])])
+                log.append([-1, 1, 2, -2])
+
+            # Reopening appends to the same log
+            with scorelog.ScoreLog(path) as log:
+                log.append([3, 3, -3, -3], [(1, 6, [45, 20, 10, -10])])
+
+            self.assertEqual(list(scorelog.iter_records(path, chunk_records=2)),
+                             [(scorelog.CONTRACT, 1, 0, -2, -6, -8, -10),
+                              (scorelog.CONTRACT, 0, 0, 5, 20, 15, 25),
+                              (scorelog.MATCH, -1, -1, 10, -5, -5, 0),
+                              (scorelog.MATCH, -1, -1, -1, 1, 2, -2),
+                              (scorelog.MATCH, -1, -1, 3, 3, -3, -3)])
+
+    def test_truncated_record(self):
+        import os, tempfile
+        import scorelog
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'log.bin')
+
+            with scorelog.ScoreLog(path) as log:
+                log.append([1, 2, 3, -6])
+
+            # Simulate a crash in the middle of a record
+            with open(path, 'ab') as f:
+                f.write(b'\x00\xff\xff\x01')
+
+            self.assertEqual(scorelog.num_records(path), 1)
+            self.assertEqual(len(list(scorelog.iter_records(path))), 1)
+
+            with scorelog.ScoreLog(path) as log:
+                log.append([0, 0, 0, 0])
+
+            self.assertEqual([record[3:] for record in scorelog.iter_records(path)], [(1, 2, 3, -6), (0, 0, 0, 0)])
+
+    def test_invalid_log(self):
+        import os, tempfile
+        import scorelog
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'log.bin')
+            with open(path, 'wb') as f:
+                f.write(b'not a score log')
+
+            with self.assertRaises(ValueError):
+                scorelog.ScoreLog(path)
+
+if __name__ == '__main__':
+    unittest.main()
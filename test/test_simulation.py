@@ -0,0 +1,46 @@
+import sys, unittest
+sys.path.append('..')
+
+class TestSimulation(unittest.TestCase):
+
+    def test_single_process(self):
+        from simulation import simulate
+        from player.Player import RandomPlayer
+        from player.HeuristicPlayer import HeuristicPlayer
+
+        player_types = [HeuristicPlayer, RandomPlayer, HeuristicPlayer, RandomPlayer]
+        results = list(simulate(player_types, matches=3, seed=42))
+
+        self.assertEqual(len(results), 3)
+        for result in results:
+            self.assertEqual(sum(result.scores), 0)
+            self.assertEqual(len(result.contracts), 28)
+            self.assertEqual([sum(scores) for scores in zip(*[game_scores for _, _, game_scores in result.contracts])],
+                             result.scores)
+
+        # Same seed, same matches
+        self.assertEqual(results, list(simulate(player_types, matches=3, seed=42)))
+
+    def test_worker_pool(self):
+        from simulation import simulate
+        from player.Player import RandomPlayer
+
+        results = list(simulate([RandomPlayer] * 4, workers=2, matches=5, seed=42, batch_size=2))
+
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(sum(result.scores) == 0 for result in results))
+
+    def test_duplicate(self):
+        from simulation import simulate, generate_deals
+        from player.HeuristicPlayer import HeuristicPlayer
+
+        self.assertEqual(generate_deals(7), generate_deals(7))
+
+        # Identical deterministic players get the same cards in every
+        # seat, so within a replay group nobody is luckier than the others
+        for result in simulate([HeuristicPlayer] * 4, matches=2, seed=42, duplicate=True):
+            self.assertEqual(result.scores, [0, 0, 0, 0])
+            self.assertEqual(len(result.contracts), 4 * 28)
+
+if __name__ == '__main__':
+    unittest.main()
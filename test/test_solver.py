@@ -0,0 +1,78 @@
+import sys, unittest
+sys.path.append('..')
+
+def deal(game_name, num_cards, seed):
+    import random
+    from Card import Deck
+    from player.Player import RandomPlayer
+    from solver import get_game_class
+
+    random.seed(seed)
+    deck = Deck()
+    players = [RandomPlayer(ID=i) for i in range(4)]
+    for i, player in enumerate(players):
+        player.hand = sorted(deck.cards[i*13:i*13 + num_cards], key=int)
+
+    return get_game_class(game_name)(players, seed % 4, '♣')
+
+def minimax(game, player):
+    '''
+        Paranoid search without any pruning.
+    '''
+    from bitboard import iter_cards
+
+    state = game.state
+    if state.terminal:
+        return state.scores[player]
+
+    values = []
+    for card in list(iter_cards(game.get_playable_cards())) or [-1]:
+        game.apply(card)
+        values.append(minimax(game, player))
+        game.undo()
+
+    return max(values) if state.current_player == player else min(values)
+
+class TestSolver(unittest.TestCase):
+
+    def test_solve(self):
+        from solver import Solver
+
+        # Same values as a search without pruning
+        for game_name in ['Atout', 'NoTricks', 'NoHearts', 'NoKingOfHearts', 'NoLastTwo', 'NoQueens']:
+            for seed in range(4):
+                game = deal(game_name, 3, seed)
+                solver = Solver(game.state.copy())
+                for player in range(4):
+                    self.assertEqual(solver.solve(player), minimax(game, player), (game_name, seed, player))
+
+    def test_domino(self):
+        import random
+        from solver import Solver
+        from bitboard import popcount, iter_cards
+
+        # Endgames of random Domino games
+        for seed in range(4):
+            game = deal('Domino', 13, seed)
+            while sum(popcount(hand) for hand in game.state.hands) > 9:
+                game.apply(random.choice(list(iter_cards(game.get_playable_cards())) or [-1]))
+
+            solver = Solver(game.state.copy())
+            for player in range(4):
+                self.assertEqual(solver.solve(player), minimax(game, player))
+
+    def test_best_card(self):
+        from solver import Solver, solve
+
+        game = deal('NoQueens', 4, 0)
+        state = game.state.copy()
+        card, value = Solver(state).best_card()
+        self.assertTrue(game.get_playable_cards() >> card & 1)
+        self.assertEqual(value, solve(state, state.current_player))
+
+        # The state is restored after the search
+        self.assertEqual(state.hands, game.state.hands)
+        self.assertEqual(len(solve(state)), 4)
+
+if __name__ == '__main__':
+    unittest.main()
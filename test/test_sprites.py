@@ -0,0 +1,37 @@
+import sys, unittest
+sys.path.append('..')
+
+class TestSprites(unittest.TestCase):
+
+    def test_atlas(self):
+        import os, shutil, tempfile, json, consts
+        from PIL import Image
+        from sprites import build, decode, DIRECTORY, ATLAS, INDEX
+
+        with tempfile.TemporaryDirectory() as directory:
+            for i in range(consts.DIFFERENT_CARDS):
+                shutil.copy(os.path.join(DIRECTORY, '{}.png'.format(i)), directory)
+
+            build(directory)
+            with open(os.path.join(directory, INDEX)) as f:
+                boxes = json.load(f)['boxes']
+
+            # Every card is cut out of the atlas as it was
+            cache = os.path.join(directory, 'cache')
+            atlas = decode(os.path.join(directory, ATLAS), cache)
+            for i, box in enumerate(boxes):
+                image = Image.open(os.path.join(directory, '{}.png'.format(i))).convert('RGBA')
+                self.assertEqual(atlas.crop(box).tobytes(), image.tobytes())
+
+            # The next sessions read the decoded atlas from the cache
+            self.assertEqual(os.listdir(cache), ['cards.rgba'])
+            self.assertEqual(decode(os.path.join(directory, ATLAS), cache).tobytes(), atlas.tobytes())
+
+            # The atlas in the repository is up to date
+            with open(os.path.join(DIRECTORY, INDEX)) as f:
+                self.assertEqual(json.load(f)['boxes'], boxes)
+
+            self.assertEqual(decode(os.path.join(DIRECTORY, ATLAS), cache).tobytes(), atlas.tobytes())
+
+if __name__ == '__main__':
+    unittest.main()
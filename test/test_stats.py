@@ -0,0 +1,46 @@
+import sys, unittest
+sys.path.append('..')
+
+class TestStats(unittest.TestCase):
+
+    def test_running_stats(self):
+        import random, statistics
+        from stats import RunningStats
+
+        random.seed(0)
+        values = [random.randint(-200, 200) for _ in range(1000)]
+
+        running = RunningStats()
+        for value in values:
+            running.push(value)
+
+        self.assertEqual(running.n, len(values))
+        self.assertAlmostEqual(running.mean, statistics.mean(values))
+        self.assertAlmostEqual(running.variance, statistics.variance(values))
+        self.assertAlmostEqual(running.confidence_interval(), 1.96 * statistics.stdev(values) / len(values) ** 0.5)
+
+    def test_simulation_stats(self):
+        import json
+        from simulation import simulate
+        from stats import SimulationStats
+        from player.Player import RandomPlayer
+
+        simulation_stats = SimulationStats()
+        for result in simulate([RandomPlayer] * 4, matches=3, seed=0):
+            simulation_stats.push(result)
+
+        self.assertEqual(simulation_stats.matches, 3)
+        self.assertTrue(simulation_stats.moves >= 3 * 28 * 13)
+        self.assertTrue(all(seat.n == 3 for seat in simulation_stats.seats))
+        self.assertTrue(all(seat.n == 12 for seats in simulation_stats.games.values() for seat in seats))
+        self.assertIn('matches/s', simulation_stats.report())
+
+        # The summary can be written as (strict) JSON
+        summary = json.loads(json.dumps(simulation_stats.summary(), allow_nan=False))
+        self.assertEqual(summary['matches'], 3)
+        self.assertEqual(sum(seat['mean'] for seat in summary['scores']), 0)
+        self.assertEqual(len(summary['games']['Domino']), 4)
+        self.assertIsNone(SimulationStats().summary()['scores'][0]['ci95'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import sys, unittest
+sys.path.append('..')
+
+class TestTablebase(unittest.TestCase):
+
+    def test_lookup(self):
+        import os, random, tempfile, consts
+        from Card import Card, Deck
+        from player.Player import RandomPlayer
+        from bitboard import iter_cards, popcount
+        from solver import Solver, get_game_class
+        from tablebase import Tablebase, build
+
+        random.seed(0)
+        with tempfile.TemporaryDirectory() as directory:
+            for game_name in ['Atout', 'NoHearts', 'NoQueens']:
+                path = os.path.join(directory, '{}.tb'.format(game_name))
+                build(game_name, path, max_cards=1)
+                table = Tablebase(path)
+
+                # Values of the last tricks of random games, with any leader and trump suit
+                for _ in range(10):
+                    deck = Deck()
+                    players = [RandomPlayer(ID=i) for i in range(4)]
+                    for i, player in enumerate(players):
+                        player.hand = sorted(deck.cards[i*13:(i+1)*13], key=int)
+
+                    trump_suit = random.choice(Card.suits) if game_name == 'Atout' else None
+                    game = get_game_class(game_name)(players, random.randrange(4), trump_suit)
+                    while not game.state.terminal and (game.state.trick or popcount(game.state.hands[0]) > 2):
+                        game.apply(random.choice(list(iter_cards(game.get_playable_cards()))))
+
+                    if game.state.terminal:
+                        continue
+
+                    # Two cards per hand: the last trick comes from the table
+                    self.assertIsNone(table.lookup(game.state))
+                    self.assertIsNone(table.outcome(game.state))
+                    solver = Solver(game.state.copy())
+                    table_solver = Solver(game.state.copy(), table)
+                    for player in range(consts.NUM_PLAYERS):
+                        self.assertEqual(table_solver.solve(player), solver.solve(player))
+
+                    # One card per hand
+                    game.apply(random.choice(list(iter_cards(game.get_playable_cards()))))
+                    while game.state.trick and not game.state.terminal:
+                        game.apply(random.choice(list(iter_cards(game.get_playable_cards()))))
+
+                    if not game.state.terminal:
+                        values = table.lookup(game.state)
+                        solver = Solver(game.state.copy())
+                        self.assertEqual(values, [solver.solve(player) - game.state.scores[player] for player in range(4)])
+
+                        # The last trick is forced: its outcome is what is played
+                        outcome = table.outcome(game.state)
+                        scores = list(game.state.scores)
+                        while not game.state.terminal:
+                            game.apply(next(iter_cards(game.get_playable_cards())))
+                        self.assertEqual(outcome, [score - start for score, start in zip(game.state.scores, scores)])
+
+                table.close()
+
+    def test_outcome(self):
+        import consts
+        from tablebase import Builder
+
+        # The outcome values share the points of the tricks left, and
+        # every player makes at least their paranoid value
+        builder = Builder('NoTricks')
+        for num_cards, num_positions in [(1, 73), (2, 24594)]:
+            positions = list(builder.positions(num_cards))
+            self.assertEqual(len(positions), num_positions)
+            for codes in positions:
+                values = builder.solve(codes, num_cards)
+                paranoid, outcome = values[:consts.NUM_PLAYERS], values[consts.NUM_PLAYERS:]
+                self.assertEqual(sum(outcome), -2 * num_cards)
+                for player in range(consts.NUM_PLAYERS):
+                    self.assertGreaterEqual(outcome[player], paranoid[player])
+
+                builder.store(codes, values)
+
+if __name__ == '__main__':
+    unittest.main()
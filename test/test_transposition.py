@@ -0,0 +1,73 @@
+import sys, unittest
+sys.path.append('..')
+
+class TestTransposition(unittest.TestCase):
+
+    def test_hash(self):
+        import random, consts
+        from Card import Card, Deck
+        from player.Player import RandomPlayer
+        from solver import get_game_class
+        from bitboard import iter_cards
+        from transposition import compute
+
+        random.seed(0)
+        for module_name in consts.GAMES.values():
+            game_name = module_name.split('.')[1]
+            deck = Deck()
+            players = [RandomPlayer(ID=i) for i in range(4)]
+            for i, player in enumerate(players):
+                player.hand = sorted(deck.cards[i*13:(i+1)*13], key=int)
+
+            trump_suit = random.choice(Card.suits) if game_name == 'Atout' else None
+            game = get_game_class(game_name)(players, random.randrange(4), trump_suit)
+            self.assertEqual(game.state.hash, compute(game.state))
+
+            # The hash is updated by apply() and restored by undo()
+            hashes = [game.state.hash]
+            while not game.state.terminal:
+                game.apply(random.choice(list(iter_cards(game.get_playable_cards())) or [-1]))
+                self.assertEqual(game.state.hash, compute(game.state))
+                hashes.append(game.state.hash)
+
+            while game.history:
+                game.undo()
+                hashes.pop()
+                self.assertEqual(game.state.hash, hashes[-1])
+
+            # Who played which card of the trick matters
+            if game_name != 'Domino':
+                state = game.state.copy()
+                state.trick = [0, 1]
+                other = game.state.copy()
+                other.trick = [1, 0]
+                self.assertNotEqual(compute(state), compute(other))
+
+    def test_table(self):
+        from transposition import TranspositionTable, EXACT, LOWER
+
+        table = TranspositionTable(slots=3)
+        self.assertEqual(table.mask, 3)
+
+        table.store(1, 5, 10, EXACT, 7)
+        self.assertEqual(table.get(1), (1, 5, 10, EXACT, 7))
+        self.assertIsNone(table.get(5))
+
+        # Key 5 maps to the slot of key 1: a shallower search does not replace it
+        table.store(5, 4, 0, LOWER)
+        self.assertIsNone(table.get(5))
+        self.assertIsNotNone(table.get(1))
+
+        # A deeper one does, and so does a new result for the same key
+        table.store(5, 6, 0, LOWER)
+        self.assertIsNone(table.get(1))
+        self.assertEqual(table.get(5)[2], 0)
+        table.store(5, 1, 3, EXACT)
+        self.assertEqual(table.get(5)[2:4], (3, EXACT))
+
+        self.assertEqual(len(table), 1)
+        table.clear()
+        self.assertEqual(len(table), 0)
+
+if __name__ == '__main__':
+    unittest.main()
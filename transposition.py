@@ -0,0 +1,121 @@
+'''
+    Zobrist hashing of engine States, and a transposition
+    table of bounded size for search players.
+
+    The hash of a State is the XOR of random 64-bit keys, one for
+    every feature of the state that affects the rest of the game:
+
+        - every card in the hand of every player;
+        - every card in the current trick, at its place in the trick,
+          and the player who led it;
+        - every card played, in Domino (the chains of every suit);
+        - the current player;
+        - the trump suit, and the starting value of Domino.
+
+    Scores are not hashed: search players store the points that can
+    still be made from a state, which do not depend on them.
+
+    Game.apply() updates the hash with a few XORs, and undo() restores
+    it, so it never has to be computed from scratch during a search.
+'''
+import random, consts
+
+# Keys are always the same, so hashes can be compared between processes
+_random = random.Random('barbu-zobrist')
+
+def _key():
+    return _random.getrandbits(64)
+
+HAND_KEYS = [[_key() for _ in range(consts.DIFFERENT_CARDS)] for _ in range(consts.NUM_PLAYERS)]
+TRICK_KEYS = [[_key() for _ in range(consts.DIFFERENT_CARDS)] for _ in range(consts.NUM_PLAYERS)]
+PLAYED_KEYS = [_key() for _ in range(consts.DIFFERENT_CARDS)]
+PLAYER_KEYS = [_key() for _ in range(consts.NUM_PLAYERS)]
+FIRST_PLAYER_KEYS = [_key() for _ in range(consts.NUM_PLAYERS)]
+TRUMP_KEYS = [_key() for _ in range(4)]
+STARTING_VALUE_KEYS = [_key() for _ in range(13)]
+
+def compute(state):
+    '''
+        Returns the hash of a State, computed from scratch.
+    '''
+    h = PLAYER_KEYS[state.current_player]
+
+    for player, hand in enumerate(state.hands):
+        while hand:
+            low = hand & -hand
+            h ^= HAND_KEYS[player][low.bit_length() - 1]
+            hand ^= low
+
+    if state.game == 'Domino':
+        played = state.played
+        while played:
+            low = played & -played
+            h ^= PLAYED_KEYS[low.bit_length() - 1]
+            played ^= low
+
+        if state.starting_value is not None:
+            h ^= STARTING_VALUE_KEYS[state.starting_value]
+    elif state.trick:
+        h ^= FIRST_PLAYER_KEYS[state.first_player]
+        for i, card in enumerate(state.trick):
+            h ^= TRICK_KEYS[i][card]
+
+    if state.trump is not None:
+        h ^= TRUMP_KEYS[state.trump]
+
+    return h
+
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+class TranspositionTable():
+    '''
+        A table of search results with a fixed number of slots
+        (a power of two), so its memory never grows beyond about
+        200 bytes per slot. Slots are only allocated when they are
+        first used, so small searches stay cheap.
+
+        Every entry holds its key, the depth of the search that found
+        it, a value with its flag (EXACT, LOWER or UPPER bound) and
+        the best move. Keys are usually Zobrist hashes, but any hashable
+        key works. Every key is mapped to a single slot: when two keys
+        compete for it, the entry of the deeper search is kept, since
+        it saved more work (depth-preferred replacement).
+    '''
+    def __init__(self, slots=1 << 20):
+        size = 1
+        while size < slots:
+            size *= 2
+
+        self.slots = {}
+        self.mask = size - 1
+        self.hits = 0
+        self.stores = 0
+
+    def get(self, key):
+        '''
+            Returns the entry (key, depth, value, flag, move)
+            stored for key, or None.
+        '''
+        entry = self.slots.get(hash(key) & self.mask)
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+
+        return None
+
+    def store(self, key, depth, value, flag, move=None):
+        index = hash(key) & self.mask
+        entry = self.slots.get(index)
+        if entry is None or entry[0] == key or depth >= entry[1]:
+            self.slots[index] = (key, depth, value, flag, move)
+            self.stores += 1
+
+    def clear(self):
+        self.slots = {}
+        self.hits = 0
+        self.stores = 0
+
+    def __len__(self):
+        return len(self.slots)
@@ -1,5 +1,4 @@
-import numpy as np
-import matplotlib.pyplot as plt
+import scorelog
 
 def int_input(prompt='Please enter a number: '):
     while True:
@@ -21,19 +20,54 @@ def is_valid_int(n):
 
     return True
 
-def tell_everyone(players, string):
-    for player in players:
-        player.tell(string)
+def create_plot(names, log_path, path, max_points=10000, show=True):
+    '''
+        Plots the cumulative sum of the scores of every player (names
+        are the names of their types), reading the matches from the
+        score log in chunks, so that memory usage does not depend on
+        the number of matches. At most max_points points are plotted
+        for every player. The plot is saved to path, and shown if show.
+    '''
+    # Imported here: they take most of the startup time, and only plots need them
+    import numpy as np
+    import matplotlib.pyplot as plt
 
-def create_plot(players, scores, path):
-    # Convert to numpy array
-    scores = np.asarray(scores)
+    record_dtype = np.dtype([('kind', 'i1'), ('game', 'i1'), ('dealer', 'i1'), ('scores', '<i2', (4,))])
+    assert record_dtype.itemsize == scorelog.RECORD.size
 
-    for col in range(scores.shape[1]):
-        cs = np.cumsum(scores[:, col])
-        plt.plot(cs)
+    # Keep one match every stride (the number of records is an upper bound for the matches)
+    stride = max(1, scorelog.num_records(log_path) // max_points)
 
-    labels = ['Player ' + str(i) + ' (' + players[i].__class__.__name__ + ')' for i in range(len(players))]
+    xs = []
+    points = []
+    total = np.zeros(len(names), dtype=np.int64)
+    num_matches = 0
+
+    for chunk in scorelog.iter_chunks(log_path):
+        records = np.frombuffer(chunk, dtype=record_dtype)
+        scores = records['scores'][records['kind'] == scorelog.MATCH].astype(np.int64)
+        if not len(scores):
+            continue
+
+        cs = np.cumsum(scores, axis=0) + total
+        total = cs[-1]
+
+        indexes = np.arange(num_matches, num_matches + len(scores))
+        kept = indexes % stride == 0
+        xs.append(indexes[kept])
+        points.append(cs[kept])
+
+        num_matches += len(scores)
+
+    if points:
+        xs = np.concatenate(xs)
+        points = np.concatenate(points)
+
+        for col in range(points.shape[1]):
+            plt.plot(xs, points[:, col])
+
+    labels = ['Player ' + str(i) + ' (' + names[i] + ')' for i in range(len(names))]
     plt.legend(labels)
     plt.savefig(path)
-    plt.show()
\ No newline at end of file
+    if show:
+        plt.show()
\ No newline at end of file